@@ -4,9 +4,11 @@ from .models import DiaperSize, GlobalSetting
 
 @admin.register(DiaperSize)
 class DiaperSizeAdmin(admin.ModelAdmin):
-    list_display = ("label", "is_active", "order")
+    list_display = ("label", "household", "is_active", "order")
+    list_filter = ("household", "is_active")
 
 
 @admin.register(GlobalSetting)
 class GlobalSettingAdmin(admin.ModelAdmin):
-    list_display = ("key", "value", "description")
+    list_display = ("key", "household", "value", "description")
+    list_filter = ("household",)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfigConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core_config"
+
+    def ready(self):
+        # Invalidación de la caché de GlobalSetting
+        from apps.core_config import signals  # noqa: F401
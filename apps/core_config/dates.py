@@ -0,0 +1,17 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+
+
+def local_day_range(date_obj):
+    """
+    (inicio, fin) del día local como datetimes aware: [00:00, 00:00 del día siguiente).
+
+    Filtrar con campo__gte=inicio, campo__lt=fin equivale a campo__date=date_obj,
+    pero sin convertir la columna, así la BD puede usar los índices.
+    """
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(date_obj, time.min), tz)
+    end = timezone.make_aware(
+        datetime.combine(date_obj + timedelta(days=1), time.min), tz
+    )
+    return start, end
@@ -0,0 +1,52 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+# Pool acotado: como máximo DB_POOL_SIZE consultas (y conexiones) simultáneas
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_POOL_SIZE, thread_name_prefix="babybot-db"
+        )
+    return _executor
+
+
+def _with_fresh_connection(func):
+    """Descarta conexiones caídas o vencidas (CONN_MAX_AGE) del hilo antes de usarlo"""
+
+    @functools.wraps(func)
+    def inner(*args, **kwargs):
+        close_old_connections()
+        return func(*args, **kwargs)
+
+    return inner
+
+
+def db_sync_to_async(func):
+    """
+    Igual que sync_to_async, pero las consultas corren en un pool de hilos
+    en vez de un único hilo compartido: un chat lento no bloquea a los demás.
+
+    Con DB_POOL_SIZE = 0 (SQLite / tests) se comporta como sync_to_async.
+    """
+    if settings.DB_POOL_SIZE <= 0:
+        return sync_to_async(func)
+    return sync_to_async(
+        _with_fresh_connection(func), thread_sensitive=False, executor=_get_executor()
+    )
+
+
+def supports_update_returning():
+    """PostgreSQL y SQLite >= 3.35 aceptan UPDATE ... RETURNING"""
+    if connection.vendor == "postgresql":
+        return True
+    return (
+        connection.vendor == "sqlite"
+        and connection.features.can_return_columns_from_insert
+    )
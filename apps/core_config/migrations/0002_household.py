@@ -0,0 +1,25 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0001_initial'),
+        ('core_config', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diapersize',
+            name='household',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sizes', to='households.household', verbose_name='Familia'),
+        ),
+        migrations.AddField(
+            model_name='globalsetting',
+            name='household',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='settings', to='households.household', verbose_name='Familia'),
+        ),
+    ]
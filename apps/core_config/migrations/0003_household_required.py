@@ -0,0 +1,43 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0002_default_household'),
+        ('core_config', '0002_household'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diapersize',
+            name='household',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sizes', to='households.household', verbose_name='Familia'),
+        ),
+        migrations.AlterField(
+            model_name='diapersize',
+            name='label',
+            field=models.CharField(max_length=10, verbose_name='Etiqueta Talla'),
+        ),
+        migrations.AlterField(
+            model_name='globalsetting',
+            name='household',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='settings', to='households.household', verbose_name='Familia'),
+        ),
+        migrations.AlterField(
+            model_name='globalsetting',
+            name='key',
+            field=models.CharField(max_length=50, verbose_name='Clave Config'),
+        ),
+        migrations.AddConstraint(
+            model_name='diapersize',
+            constraint=models.UniqueConstraint(fields=('household', 'label'), name='core_size_household_label_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='globalsetting',
+            constraint=models.UniqueConstraint(fields=('household', 'key'), name='core_setting_household_key_uniq'),
+        ),
+    ]
@@ -1,10 +1,18 @@
 from django.db import models
+from apps.households.managers import TenantManager
+from apps.households.models import Household
 
 
 class DiaperSize(models.Model):
     """Gestión dinámica de tallas (RN, P, M, G, etc.)"""
 
-    label = models.CharField(max_length=10, unique=True, verbose_name="Etiqueta Talla")
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        related_name="sizes",
+        verbose_name="Familia",
+    )
+    label = models.CharField(max_length=10, verbose_name="Etiqueta Talla")
     is_active = models.BooleanField(default=True, verbose_name="¿Disponible en menú?")
     order = models.PositiveIntegerField(
         default=0, verbose_name="Orden de visualización"
@@ -13,16 +21,29 @@ class DiaperSize(models.Model):
     def __str__(self):
         return self.label
 
+    objects = TenantManager()
+
     class Meta:
         ordering = ["order"]
         verbose_name = "Talla de Pañal"
         verbose_name_plural = "Config: Tallas de Pañales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["household", "label"], name="core_size_household_label_uniq"
+            ),
+        ]
 
 
 class GlobalSetting(models.Model):
     """Almacén clave-valor para configuraciones editables desde el bot"""
 
-    key = models.CharField(max_length=50, unique=True, verbose_name="Clave Config")
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        related_name="settings",
+        verbose_name="Familia",
+    )
+    key = models.CharField(max_length=50, verbose_name="Clave Config")
     value = models.CharField(max_length=255, verbose_name="Valor")
     description = models.CharField(
         max_length=255, blank=True, verbose_name="Descripción"
@@ -31,6 +52,13 @@ class GlobalSetting(models.Model):
     def __str__(self):
         return f"{self.key}: {self.value}"
 
+    objects = TenantManager()
+
     class Meta:
         verbose_name = "Configuración Global"
         verbose_name_plural = "Config: Globales"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["household", "key"], name="core_setting_household_key_uniq"
+            ),
+        ]
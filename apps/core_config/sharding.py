@@ -0,0 +1,58 @@
+import hashlib
+
+# --- REPARTO ENTRE WORKERS (Rendezvous / HRW) ---
+# Cada clave (un chat, una familia) va al worker con mayor puntaje
+# hash(clave, worker). El hash es estable entre procesos (no el hash() de
+# Python, que cambia en cada arranque) y, si un worker entra o sale, solo
+# cambian de dueño las claves de ese worker.
+
+
+def _score(key, worker_id):
+    digest = hashlib.blake2b(f"{key}|{worker_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def rendezvous_owner(key, worker_ids):
+    """El worker (de `worker_ids`) dueño de `key`"""
+    return max(worker_ids, key=lambda worker_id: _score(key, worker_id))
+
+
+def chat_key(chat_id):
+    return f"chat:{chat_id}"
+
+
+def household_key(household_id):
+    return f"household:{household_id}"
+
+
+# --- SHARD DE ESTE PROCESO ---
+# Sin configurar (runbot clásico, webhook, tests) el proceso es dueño de todo.
+_current = {"worker_id": None, "workers": ()}
+
+
+def configure(worker_id, workers):
+    """Fija el shard del proceso (lo llama cada worker al arrancar)"""
+    _current["worker_id"] = worker_id
+    _current["workers"] = tuple(sorted(workers))
+
+
+def is_sharded():
+    return _current["worker_id"] is not None
+
+
+def current_worker():
+    """Id del worker de este proceso (None sin sharding)"""
+    return _current["worker_id"]
+
+
+def owns_household(household_id):
+    """¿Los recordatorios y alertas de esta familia le tocan a este proceso?"""
+    if not is_sharded():
+        return True
+    owner = rendezvous_owner(household_key(household_id), _current["workers"])
+    return owner == _current["worker_id"]
+
+
+def is_leader():
+    """Tareas globales (fotos de inventario): solo el worker de menor id"""
+    return not is_sharded() or _current["worker_id"] == _current["workers"][0]
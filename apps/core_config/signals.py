@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core_config.models import GlobalSetting
+from apps.core_config.utils import invalidate_settings_cache
+
+
+@receiver(post_save, sender=GlobalSetting)
+@receiver(post_delete, sender=GlobalSetting)
+def global_setting_changed(sender, instance, **kwargs):
+    """Cualquier escritura (bot o Django Admin) invalida la caché de esa familia"""
+    invalidate_settings_cache(instance.household_id)
@@ -1,3 +1,67 @@
-from django.test import TestCase
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from apps.core_config import utils
+from apps.core_config.models import GlobalSetting
+from apps.core_config.sharding import household_key, rendezvous_owner
+from apps.core_config.utils import (
+    DEFAULT_DIAPER_THRESHOLD,
+    KEY_DIAPER_THRESHOLD,
+    invalidate_settings_cache,
+    read_int_setting,
+    set_setting,
+)
+from apps.households.models import Household
+
+
+class RendezvousTests(SimpleTestCase):
+    """Reparto estable: al quitar un worker solo se mueven sus familias"""
+
+    def test_only_removed_worker_keys_move(self):
+        keys = [household_key(i) for i in range(500)]
+        before = {key: rendezvous_owner(key, [0, 1, 2, 3]) for key in keys}
+        after = {key: rendezvous_owner(key, [0, 1, 3]) for key in keys}
+
+        moved = {key for key in keys if before[key] != after[key]}
+        self.assertEqual(moved, {key for key in keys if before[key] == 2})
+        # Reparto razonable entre los cuatro
+        counts = [list(before.values()).count(w) for w in range(4)]
+        self.assertTrue(all(80 < count < 170 for count in counts), counts)
+
+
+class SettingsCacheTests(TestCase):
+    def setUp(self):
+        invalidate_settings_cache()
+        self.home = Household.objects.create(name="Casa")
+
+    def threshold(self):
+        return read_int_setting(
+            self.home.id, KEY_DIAPER_THRESHOLD, DEFAULT_DIAPER_THRESHOLD
+        )
+
+    async def test_update_invalidates_cache(self):
+        read = utils.db_sync_to_async(self.threshold)
+        self.assertEqual(await read(), int(DEFAULT_DIAPER_THRESHOLD))
+        await set_setting(self.home.id, KEY_DIAPER_THRESHOLD, "40")
+        self.assertEqual(await read(), 40)
+
+    def test_admin_save_invalidates_cache(self):
+        self.threshold()
+        GlobalSetting.objects.create(
+            household=self.home, key=KEY_DIAPER_THRESHOLD, value="25"
+        )
+        self.assertEqual(self.threshold(), 25)
+
+    def test_load_racing_an_invalidation_is_not_cached(self):
+        real = GlobalSetting.objects.for_household
+
+        def invalidated_midway(household_id):
+            # Otro hilo guarda un cambio mientras esta carga consulta
+            invalidate_settings_cache(household_id)
+            return real(household_id)
+
+        with mock.patch.object(
+            GlobalSetting.objects, "for_household", side_effect=invalidated_midway
+        ):
+            self.threshold()
+        self.assertNotIn(self.home.id, utils._cache)
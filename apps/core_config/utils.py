@@ -1,26 +1,124 @@
-from asgiref.sync import sync_to_async
+import time
+from apps.core_config.db import db_sync_to_async
 from apps.core_config.models import GlobalSetting
 
 # Claves constantes para evitar errores de dedo
 KEY_LACTATION_INTERVAL = "lactation_interval"
 KEY_DIAPER_THRESHOLD = "diaper_threshold"
+KEY_DIAPER_LEAD_DAYS = "diaper_lead_days"
 
 # Valores por defecto
 DEFAULT_LACTATION_INTERVAL = "3.0"
 DEFAULT_DIAPER_THRESHOLD = "15"
+DEFAULT_DIAPER_LEAD_DAYS = "5"
 
+# --- CACHÉ EN MEMORIA ---
+# Una entrada por familia, cargada completa en una consulta e invalidada al
+# escribir (set_setting / admin). El TTL cubre cambios hechos desde otro proceso
+# (ej. Django Admin en gunicorn).
+SETTINGS_CACHE_TTL = 300
 
-async def get_setting(key, default_val):
-    """Obtiene un valor de la BD, si no existe devuelve el default"""
-    try:
-        setting = await sync_to_async(GlobalSetting.objects.get)(key=key)
-        return setting.value
-    except GlobalSetting.DoesNotExist:
-        return default_val
+# {household_id: {"values": {...}, "parsed": {...}, "loaded_at": float}}
+_cache = {}
+# Sube con cada invalidación: una carga que empezó antes no se guarda
+_version = {"value": 0}
 
 
-async def set_setting(key, value, description=""):
-    """Guarda o actualiza un valor en la BD"""
-    await sync_to_async(GlobalSetting.objects.update_or_create)(
-        key=key, defaults={"value": value, "description": description}
+def invalidate_settings_cache(household_id=None):
+    """Sin argumento invalida todas las familias"""
+    _version["value"] += 1
+    if household_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(household_id, None)
+
+
+def _fresh_entry(household_id):
+    entry = _cache.get(household_id)
+    if entry is None or time.monotonic() - entry["loaded_at"] >= SETTINGS_CACHE_TTL:
+        return None
+    return entry
+
+
+def _load_settings(household_id):
+    """Trae TODAS las configuraciones de la familia en una sola consulta"""
+    version = _version["value"]
+    entry = {
+        "values": dict(
+            GlobalSetting.objects.for_household(household_id).values_list(
+                "key", "value"
+            )
+        ),
+        "parsed": {},
+        "loaded_at": time.monotonic(),
+    }
+    # Si hubo una invalidación mientras leíamos, no guardamos datos viejos
+    if _version["value"] == version:
+        _cache[household_id] = entry
+    return entry
+
+
+def _parsed(entry, key, default_val, cast):
+    """Convierte (y memoriza) el valor para no re-parsear en cada lectura"""
+    cache_key = (key, cast)
+    if cache_key not in entry["parsed"]:
+        raw = entry["values"].get(key, default_val)
+        try:
+            value = cast(raw)
+        except (TypeError, ValueError):
+            value = cast(default_val)
+        entry["parsed"][cache_key] = value
+    return entry["parsed"][cache_key]
+
+
+# --- LECTURA SÍNCRONA (Para código que ya corre dentro de un hilo de BD) ---
+
+
+def _read_entry(household_id):
+    return _fresh_entry(household_id) or _load_settings(household_id)
+
+
+def read_setting(household_id, key, default_val):
+    return _read_entry(household_id)["values"].get(key, default_val)
+
+
+def read_float_setting(household_id, key, default_val):
+    return _parsed(_read_entry(household_id), key, default_val, float)
+
+
+def read_int_setting(household_id, key, default_val):
+    return _parsed(_read_entry(household_id), key, default_val, int)
+
+
+# --- LECTURA ASÍNCRONA (Handlers) ---
+
+
+async def _get_entry(household_id):
+    entry = _fresh_entry(household_id)
+    if entry is None:
+        entry = await db_sync_to_async(_load_settings)(household_id)
+    return entry
+
+
+async def get_setting(household_id, key, default_val):
+    """Obtiene un valor (desde memoria), si no existe devuelve el default"""
+    return (await _get_entry(household_id))["values"].get(key, default_val)
+
+
+async def get_float_setting(household_id, key, default_val):
+    return _parsed(await _get_entry(household_id), key, default_val, float)
+
+
+async def get_int_setting(household_id, key, default_val):
+    return _parsed(await _get_entry(household_id), key, default_val, int)
+
+
+async def set_setting(household_id, key, value, description=""):
+    """Guarda o actualiza un valor de la familia en la BD"""
+    await db_sync_to_async(GlobalSetting.objects.update_or_create)(
+        household_id=household_id,
+        key=key,
+        defaults={"value": value, "description": description},
     )
+    # La señal post_save ya invalida; lo repetimos por claridad en este proceso
+    invalidate_settings_cache(household_id)
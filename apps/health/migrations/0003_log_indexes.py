@@ -0,0 +1,21 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0002_treatment_end_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['date'], name='health_appt_pending_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medicationlog',
+            index=models.Index(fields=['treatment', 'administered_at'], name='health_medlog_treat_time_idx'),
+        ),
+    ]
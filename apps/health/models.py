@@ -1,5 +1,6 @@
 from datetime import timedelta
 from django.db import models
+from apps.households.managers import TenantManager
 from apps.profiles.models import Profile
 from apps.users.models import TelegramUser
 
@@ -21,6 +22,9 @@ class Treatment(models.Model):
     is_active = models.BooleanField(default=True, verbose_name="Tratamiento Activo")
     created_by = models.ForeignKey(TelegramUser, on_delete=models.SET_NULL, null=True)
 
+    household_lookup = "profile__household"
+    objects = TenantManager()
+
     def save(self, *args, **kwargs):
         # Calcular fecha fin automáticamente al guardar
         if self.start_date and self.duration_days:
@@ -43,6 +47,15 @@ class MedicationLog(models.Model):
     )
     was_late = models.BooleanField(default=False, verbose_name="¿Fue atrasada?")
 
+    class Meta:
+        indexes = [
+            # Dosis del día por tratamiento y última dosis (MAX) de cada uno
+            models.Index(
+                fields=["treatment", "administered_at"],
+                name="health_medlog_treat_time_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.treatment.medicine_name} - {self.administered_at}"
 
@@ -74,5 +87,19 @@ class Appointment(models.Model):
     )
     is_completed = models.BooleanField(default=False)
 
+    household_lookup = "profile__household"
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            # Alertas diarias: WHERE NOT is_completed AND date >= ? AND date < ?
+            # Índice parcial: solo las citas pendientes (las completadas no se escanean)
+            models.Index(
+                fields=["date"],
+                condition=models.Q(is_completed=False),
+                name="health_appt_pending_date_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"Cita {self.specialist} - {self.date.strftime('%d/%m')}"
@@ -0,0 +1,135 @@
+from django.db import transaction
+from django.db.models import Q
+
+from apps.core_config.db import db_sync_to_async
+from apps.core_config.dates import local_day_range
+from apps.health.models import Appointment, MedicationLog, Treatment
+from apps.profiles.models import Profile
+
+# Acceso a datos de salud: cada función async = un solo salto al pool de BD
+
+
+# --- TRATAMIENTOS ---
+
+
+def _get_treatment(household_id, treatment_id):
+    try:
+        return (
+            Treatment.objects.for_household(household_id)
+            .select_related("profile", "created_by")
+            .get(id=treatment_id)
+        )
+    except Treatment.DoesNotExist:
+        return None
+
+
+def _create_treatment(household_id, profile_id, created_by, notify=None, **fields):
+    with transaction.atomic():
+        profile = Profile.objects.for_household(household_id).get(id=profile_id)
+        treatment = Treatment.objects.create(
+            profile=profile, created_by=created_by, **fields
+        )
+        if notify:
+            notify(treatment, profile)
+    return treatment, profile
+
+
+async def get_treatment(household_id, treatment_id):
+    """Tratamiento con perfil y creador (None si no existe o es de otra familia)"""
+    return await db_sync_to_async(_get_treatment)(household_id, treatment_id)
+
+
+async def record_dose(treatment, user, administered_at):
+    return await db_sync_to_async(MedicationLog.objects.create)(
+        treatment=treatment, administered_at=administered_at, administered_by=user
+    )
+
+
+async def deactivate_treatment(treatment):
+    treatment.is_active = False
+    await db_sync_to_async(Treatment.objects.filter(id=treatment.id).update)(
+        is_active=False
+    )
+
+
+async def create_treatment(household_id, profile_id, created_by, notify=None, **fields):
+    """
+    Crea el tratamiento. Retorna (treatment, profile).
+    Lanza Profile.DoesNotExist si el perfil es de otra familia.
+    notify(treatment, profile), si se pasa, corre en la misma transacción.
+    """
+    return await db_sync_to_async(_create_treatment)(
+        household_id, profile_id, created_by, notify, **fields
+    )
+
+
+# --- CITAS ---
+
+
+def _create_appointment(household_id, profile_id, **fields):
+    profile = Profile.objects.for_household(household_id).get(id=profile_id)
+    return Appointment.objects.create(profile=profile, **fields)
+
+
+def _complete_appointment(household_id, appt_id, **results):
+    """Guarda resultados solo si nadie lo hizo antes (UPDATE condicional)"""
+    appointments = Appointment.objects.for_household(household_id)
+    with transaction.atomic():
+        updated = appointments.filter(id=appt_id, is_completed=False).update(
+            is_completed=True, **results
+        )
+        if not updated:
+            return None
+        return appointments.select_related("profile").get(id=appt_id)
+
+
+async def get_appointment(household_id, appt_id):
+    """
+    Cita con su perfil.
+    Lanza Appointment.DoesNotExist si no existe o es de otra familia.
+    """
+    return await db_sync_to_async(
+        Appointment.objects.for_household(household_id).select_related("profile").get
+    )(id=appt_id)
+
+
+async def create_appointment(household_id, profile_id, **fields):
+    """Lanza Profile.DoesNotExist si el perfil es de otra familia"""
+    return await db_sync_to_async(_create_appointment)(
+        household_id, profile_id, **fields
+    )
+
+
+async def complete_appointment(household_id, appt_id, **results):
+    """
+    Retorna la cita actualizada, o None si otro usuario ya la completó
+    (o si es de otra familia).
+    """
+    return await db_sync_to_async(_complete_appointment)(
+        household_id, appt_id, **results
+    )
+
+
+def _pending_appointments_on(dates):
+    """QuerySet de citas pendientes en las fechas dadas (None si no hay fechas)"""
+    # Un rango semiabierto por día (usa el índice parcial health_appt_pending_date_idx:
+    # date, solo filas con NOT is_completed)
+    days = Q()
+    for date_obj in dates:
+        start, end = local_day_range(date_obj)
+        days |= Q(date__gte=start, date__lt=end)
+    if not days:
+        return None
+    return (
+        Appointment.objects.filter(days, is_completed=False)
+        .select_related("profile")
+        .order_by("date")
+    )
+
+
+async def list_pending_appointments_on(dates):
+    """Citas pendientes en cualquiera de las fechas dadas (una sola consulta)"""
+    appointments = _pending_appointments_on(dates)
+    if appointments is None:
+        return []
+    return await db_sync_to_async(list)(appointments)
@@ -0,0 +1,60 @@
+from datetime import timedelta, timezone as dt_timezone
+
+
+class DoseSchedule:
+    """
+    Horario de dosis de un tratamiento: anchor + k * frecuencia (k >= 1).
+
+    Todas las consultas son aritméticas (división entera sobre el tiempo
+    transcurrido), sin bucles de "catch-up" aunque haya días de dosis perdidas.
+    """
+
+    def __init__(self, anchor, frequency_hours, end=None):
+        self.anchor = anchor
+        self.frequency = timedelta(hours=frequency_hours)
+        self.end = end
+        # Aritmética en UTC: "cada 8 h" son 8 h reales aunque haya cambio de
+        # hora; las dosis se devuelven en la zona del ancla (para mostrarlas)
+        self._tz = anchor.tzinfo
+        self._origin = anchor.astimezone(dt_timezone.utc) if self._tz else anchor
+
+    @classmethod
+    def for_treatment(cls, treatment, last_log_time=None):
+        """El ancla es la última toma registrada o, si no hay, el inicio"""
+        anchor = last_log_time or treatment.start_date
+        return cls(anchor, treatment.frequency_hours, treatment.end_date)
+
+    def _at(self, k):
+        slot = self._origin + self.frequency * k
+        return slot.astimezone(self._tz) if self._tz else slot
+
+    def _slot(self, k):
+        slot = self._at(k)
+        if self.end and slot > self.end:
+            return None
+        return slot
+
+    def _first_after(self, moment):
+        return max(1, (moment - self._origin) // self.frequency + 1)
+
+    def next_after(self, moment):
+        """Primera dosis estrictamente posterior a `moment` (None si ya terminó)"""
+        return self._slot(self._first_after(moment))
+
+    def next_slots(self, moment, count):
+        """Las siguientes `count` dosis después de `moment` (recortadas al fin)"""
+        first = self._first_after(moment)
+        slots = [self._at(k) for k in range(first, first + count)]
+        return [s for s in slots if not self.end or s <= self.end]
+
+    def slots_between(self, start, end):
+        """Todas las dosis en [start, end] (ej. lo que queda del día)"""
+        if self.end and self.end < end:
+            end = self.end
+        if end < start:
+            return []
+
+        # k mínimo con origen + k*f >= start (techo) y k máximo con <= end (piso)
+        k_first = max(1, -((self._origin - start) // self.frequency))
+        k_last = (end - self._origin) // self.frequency
+        return [self._at(k) for k in range(k_first, k_last + 1)]
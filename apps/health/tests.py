@@ -1,3 +1,127 @@
-from django.test import TestCase
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
 
-# Create your tests here.
+from apps.core_config.dates import local_day_range
+from apps.health.models import Appointment
+from apps.health.repository import (
+    _pending_appointments_on,
+    list_pending_appointments_on,
+)
+from apps.health.schedule import DoseSchedule
+from apps.households.models import Household
+from apps.profiles.models import Profile
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+class DoseScheduleTests(SimpleTestCase):
+    """Dosis = ancla + k * frecuencia (k >= 1), recortadas al fin del tratamiento"""
+
+    def setUp(self):
+        self.anchor = datetime(2025, 5, 1, 8, 0, tzinfo=dt_timezone.utc)
+        self.every = timedelta(hours=8)
+
+    def slot(self, k):
+        return self.anchor + self.every * k
+
+    def test_first_dose_is_one_interval_after_the_anchor(self):
+        schedule = DoseSchedule(self.anchor, 8)
+        self.assertEqual(schedule.next_after(self.anchor), self.slot(1))
+        # Antes del inicio también: la primera dosis nunca es el ancla
+        self.assertEqual(schedule.next_after(self.slot(-3)), self.slot(1))
+        self.assertEqual(
+            schedule.slots_between(self.slot(-1), self.slot(1)), [self.slot(1)]
+        )
+
+    def test_exact_slot_hits(self):
+        schedule = DoseSchedule(self.anchor, 8)
+        # Estrictamente posterior: justo en una dosis salta a la siguiente
+        self.assertEqual(schedule.next_after(self.slot(2)), self.slot(3))
+        self.assertEqual(
+            schedule.next_after(self.slot(2) - timedelta(seconds=1)), self.slot(2)
+        )
+        # [start, end] cerrado en ambos extremos
+        self.assertEqual(
+            schedule.slots_between(self.slot(2), self.slot(4)),
+            [self.slot(2), self.slot(3), self.slot(4)],
+        )
+        self.assertEqual(
+            schedule.next_slots(self.slot(2), 3),
+            [self.slot(3), self.slot(4), self.slot(5)],
+        )
+
+    def test_missed_days_need_no_catch_up(self):
+        schedule = DoseSchedule(self.anchor, 8)
+        late = self.slot(30) + timedelta(minutes=1)
+        self.assertEqual(schedule.next_after(late), self.slot(31))
+
+    def test_end_date_cuts_off(self):
+        end = self.slot(2)
+        schedule = DoseSchedule(self.anchor, 8, end)
+
+        self.assertEqual(schedule.next_after(self.slot(1)), end)
+        self.assertIsNone(schedule.next_after(end))
+        self.assertEqual(schedule.next_slots(self.anchor, 5), [self.slot(1), end])
+        self.assertEqual(
+            schedule.slots_between(self.anchor, self.slot(6)), [self.slot(1), end]
+        )
+        self.assertEqual(schedule.slots_between(self.slot(3), self.slot(6)), [])
+
+    def test_dst_keeps_real_intervals(self):
+        # Cambio de hora de primavera (2025-03-09 02:00 EST -> 03:00 EDT)
+        spring = datetime(2025, 3, 8, 22, 0, tzinfo=NEW_YORK)
+        schedule = DoseSchedule(spring, 8)
+        first = schedule.next_after(spring)
+        self.assertEqual(first, datetime(2025, 3, 9, 7, 0, tzinfo=NEW_YORK))
+        self.assertEqual(first.utcoffset(), timedelta(hours=-4))
+        self.assertEqual(
+            first.astimezone(dt_timezone.utc) - spring.astimezone(dt_timezone.utc),
+            timedelta(hours=8),
+        )
+
+        # Otoño (2025-11-02 02:00 EDT -> 01:00 EST), con `moment` en UTC
+        fall = datetime(2025, 11, 1, 22, 0, tzinfo=NEW_YORK)
+        schedule = DoseSchedule(fall, 8)
+        slots = schedule.next_slots(fall.astimezone(dt_timezone.utc), 2)
+        self.assertEqual(
+            [slot.strftime("%H:%M %Z") for slot in slots], ["05:00 EST", "13:00 EST"]
+        )
+
+
+class PendingAppointmentsTests(TestCase):
+    """Días semiabiertos [00:00, 00:00 del día siguiente) en una consulta"""
+
+    def setUp(self):
+        household = Household.objects.create(name="Casa")
+        self.profile = Profile.objects.create(
+            household=household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        self.day = date(2025, 5, 1)
+        self.start, self.end = local_day_range(self.day)
+
+    def appointment(self, when, **fields):
+        return Appointment.objects.create(
+            profile=self.profile, date=when, specialist="Pediatra", **fields
+        )
+
+    def test_next_midnight_and_completed_are_excluded(self):
+        first = self.appointment(self.start)
+        last = self.appointment(self.end - timedelta(microseconds=1))
+        self.appointment(self.end)
+        self.appointment(self.start + timedelta(hours=9), is_completed=True)
+
+        with self.assertNumQueries(1):
+            found = async_to_sync(list_pending_appointments_on)([self.day])
+        self.assertEqual([a.id for a in found], [first.id, last.id])
+
+    def test_query_uses_partial_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("El plan se revisa con EXPLAIN QUERY PLAN de SQLite")
+        # La consulta real: hoy y mañana (dos rangos unidos con OR)
+        plan = _pending_appointments_on(
+            [self.day, self.day + timedelta(days=1)]
+        ).explain()
+        self.assertIn("health_appt_pending_date_idx", plan)
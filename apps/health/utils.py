@@ -1,42 +1,22 @@
 from datetime import timedelta
 from django.utils import timezone
-from asgiref.sync import sync_to_async
-from apps.health.models import Appointment
+from apps.health.repository import list_pending_appointments_on
+from apps.health.schedule import DoseSchedule
 
 
 def calculate_next_dose_time(treatment, last_log_time=None):
     """
     Calcula la hora de la siguiente dosis.
-    Si la hora calculada ya pasó, avanza intervalos hasta encontrar una futura.
+    Si la hora calculada ya pasó, salta directo al siguiente intervalo futuro.
     """
-    if not last_log_time:
-        base_time = treatment.start_date
-    else:
-        base_time = last_log_time
-
-    # 1. Calculamos la teórica siguiente
-    next_time = base_time + timedelta(hours=treatment.frequency_hours)
-
-    # 2. CORRECCIÓN: Ajuste de tiempo ("Catch-up")
-    # Si next_time es menor o igual a "ahora", seguimos sumando horas
-    # hasta caer en el futuro.
-    now = timezone.localtime()
-
-    # Solo aplicamos esto si no estamos registrando una toma atrasada intencional
-    # (Para alarmas automáticas es vital).
-    while next_time <= now:
-        next_time += timedelta(hours=treatment.frequency_hours)
-
-    # 3. Validar fin del tratamiento
-    if treatment.end_date and next_time > treatment.end_date:
-        return None
-
-    return next_time
+    schedule = DoseSchedule.for_treatment(treatment, last_log_time)
+    return schedule.next_after(timezone.localtime())
 
 
 async def check_daily_alerts():
     """
     Busca citas médicas y genera mensajes DETALLADOS.
+    Retorna pares (household_id, mensaje): cada alerta va solo a su familia.
     """
     now = timezone.localtime()
     today = now.date()
@@ -47,12 +27,14 @@ async def check_daily_alerts():
 
     notifications = []
 
+    # Una sola consulta para las tres ventanas; luego repartimos por día local
+    appts = await list_pending_appointments_on([today, target_tomorrow, target_week])
+    by_day = {}
+    for appt in appts:
+        by_day.setdefault(timezone.localtime(appt.date).date(), []).append(appt)
+
     # --- 1. ALERTA: HOY (URGENTE) ---
-    appts_today = await sync_to_async(list)(
-        Appointment.objects.filter(is_completed=False, date__date=today).select_related(
-            "profile"
-        )
-    )
+    appts_today = by_day.get(today, [])
     for appt in appts_today:
         time_str = timezone.localtime(appt.date).strftime("%I:%M %p")
         msg = (
@@ -63,14 +45,10 @@ async def check_daily_alerts():
             f"📍 **Lugar:** {appt.location or 'No especificado'}\n\n"
             f"⚠️ *No olvides los documentos necesarios.*"
         )
-        notifications.append(msg)
+        notifications.append((appt.profile.household_id, msg))
 
     # --- 2. ALERTA: MAÑANA (RECORDATORIO) ---
-    appts_tomorrow = await sync_to_async(list)(
-        Appointment.objects.filter(
-            is_completed=False, date__date=target_tomorrow
-        ).select_related("profile")
-    )
+    appts_tomorrow = by_day.get(target_tomorrow, [])
     for appt in appts_tomorrow:
         time_str = timezone.localtime(appt.date).strftime("%I:%M %p")
         msg = (
@@ -80,14 +58,10 @@ async def check_daily_alerts():
             f"🕒 **Hora:** {time_str}\n"
             f"📍 **Lugar:** {appt.location or 'No especificado'}"
         )
-        notifications.append(msg)
+        notifications.append((appt.profile.household_id, msg))
 
     # --- 3. ALERTA: 1 SEMANA (PLANIFICACIÓN) ---
-    appts_week = await sync_to_async(list)(
-        Appointment.objects.filter(
-            is_completed=False, date__date=target_week
-        ).select_related("profile")
-    )
+    appts_week = by_day.get(target_week, [])
     for appt in appts_week:
         date_str = timezone.localtime(appt.date).strftime("%d/%m a las %I:%M %p")
         msg = (
@@ -96,7 +70,7 @@ async def check_daily_alerts():
             f"👤 **{appt.profile.name}** con {appt.specialist}\n"
             f"🗓️ **Fecha:** {date_str}"
         )
-        notifications.append(msg)
+        notifications.append((appt.profile.household_id, msg))
 
     print(f"📤 [DEBUG] Alertas generadas: {len(notifications)}\n")
     return notifications
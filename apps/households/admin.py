@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Household
+
+
+@admin.register(Household)
+class HouseholdAdmin(admin.ModelAdmin):
+    list_display = ("name", "invite_code", "created_at")
+    search_fields = ("name", "invite_code")
@@ -0,0 +1,15 @@
+from django.db import models
+
+# --- MANAGERS POR FAMILIA ---
+# Model.objects.for_household(h) filtra por la familia (objeto o id). Los modelos
+# que cuelgan de otro ya acotado (inventario -> talla, preferencias -> usuario)
+# declaran `household_lookup` con la ruta hasta la familia.
+
+
+class TenantQuerySet(models.QuerySet):
+    def for_household(self, household):
+        lookup = getattr(self.model, "household_lookup", "household")
+        return self.filter(**{lookup: household})
+
+
+TenantManager = models.Manager.from_queryset(TenantQuerySet)
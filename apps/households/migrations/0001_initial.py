@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:35
+
+import apps.households.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Household',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Nombre')),
+                ('invite_code', models.CharField(default=apps.households.models.generate_invite_code, max_length=16, unique=True, verbose_name='Código de Invitación')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Familia',
+                'verbose_name_plural': 'Familias',
+            },
+        ),
+    ]
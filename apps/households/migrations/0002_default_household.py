@@ -0,0 +1,45 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:40
+
+from django.db import migrations
+
+# Modelos con familia propia; el resto (inventario, preferencias, salud,
+# bitácoras) cuelga de ellos
+TENANT_MODELS = [
+    ('users', 'TelegramUser'),
+    ('profiles', 'Profile'),
+    ('core_config', 'DiaperSize'),
+    ('core_config', 'GlobalSetting'),
+    ('notifications', 'ScheduledEvent'),
+]
+
+
+def assign_default_household(apps, schema_editor):
+    """Lo que existía antes de las familias pasa a una sola familia"""
+    Household = apps.get_model('households', 'Household')
+    orphans = [
+        apps.get_model(app_label, model_name).objects.filter(household__isnull=True)
+        for app_label, model_name in TENANT_MODELS
+    ]
+    if not any(qs.exists() for qs in orphans):
+        return
+
+    household = Household.objects.order_by('id').first()
+    if household is None:
+        household = Household.objects.create(name='Mi Casa')
+    for qs in orphans:
+        qs.update(household=household)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0001_initial'),
+        ('users', '0002_household'),
+        ('profiles', '0002_household'),
+        ('core_config', '0002_household'),
+        ('notifications', '0003_household'),
+    ]
+
+    operations = [
+        migrations.RunPython(assign_default_household, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+import secrets
+from django.db import models
+
+# Sin caracteres ambiguos (0/O, 1/I/L): el código se dicta por teléfono
+INVITE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ23456789"
+INVITE_CODE_LENGTH = 8
+
+
+def generate_invite_code():
+    return "".join(secrets.choice(INVITE_ALPHABET) for _ in range(INVITE_CODE_LENGTH))
+
+
+class Household(models.Model):
+    """Familia (tenant): agrupa usuarios, perfiles, tallas, inventario y configuración"""
+
+    name = models.CharField(max_length=100, verbose_name="Nombre")
+    invite_code = models.CharField(
+        max_length=16,
+        unique=True,
+        default=generate_invite_code,
+        verbose_name="Código de Invitación",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Familia"
+        verbose_name_plural = "Familias"
@@ -0,0 +1,48 @@
+from django.db import transaction
+
+from apps.core_config.db import db_sync_to_async
+from apps.households.models import Household, generate_invite_code
+from apps.users.models import TelegramUser
+
+# Acceso a datos de familias: cada función async = un solo salto al pool de BD
+
+
+def _create_household(name, **owner_fields):
+    """Crea la familia y su dueño (activo) en una transacción"""
+    with transaction.atomic():
+        household = Household.objects.create(name=name)
+        owner = TelegramUser.objects.create(
+            household=household,
+            role=TelegramUser.Role.OWNER,
+            is_active=True,
+            **owner_fields,
+        )
+    return household, owner
+
+
+def _rotate_invite_code(household_id):
+    code = generate_invite_code()
+    Household.objects.filter(id=household_id).update(invite_code=code)
+    return code
+
+
+async def create_household(name, **owner_fields):
+    """Retorna (household, owner)"""
+    return await db_sync_to_async(_create_household)(name, **owner_fields)
+
+
+async def get_household(household_id):
+    """Lanza Household.DoesNotExist si no existe"""
+    return await db_sync_to_async(Household.objects.get)(id=household_id)
+
+
+async def find_household_by_invite(code):
+    """La familia con ese código de invitación o None"""
+    return await db_sync_to_async(
+        Household.objects.filter(invite_code=code.strip().upper()).first
+    )()
+
+
+async def rotate_invite_code(household_id):
+    """Genera un código nuevo (el anterior deja de servir) y lo retorna"""
+    return await db_sync_to_async(_rotate_invite_code)(household_id)
@@ -0,0 +1,172 @@
+from datetime import date
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.core_config.db import db_sync_to_async
+from apps.core_config.models import DiaperSize, GlobalSetting
+from apps.core_config.utils import (
+    DEFAULT_DIAPER_THRESHOLD,
+    KEY_DIAPER_THRESHOLD,
+    invalidate_settings_cache,
+)
+from apps.health.models import Appointment, Treatment
+from apps.health.repository import (
+    complete_appointment,
+    create_appointment,
+    create_treatment,
+    get_appointment,
+    get_treatment,
+)
+from apps.households.models import Household
+from apps.notifications.models import ScheduledEvent, UserAlertPreference
+from apps.notifications.repository import (
+    _subscriber_ids,
+    get_or_create_preferences,
+    list_pending_reminders,
+    toggle_preference,
+)
+from apps.nursery.business import _registrar_uso_panal_sync
+from apps.nursery.models import DiaperInventory
+from apps.nursery.repository import _add_stock, list_forecasts, list_sizes, toggle_size
+from apps.profiles.models import Profile
+from apps.profiles.repository import (
+    count_profiles,
+    get_profile,
+    list_babies,
+    list_profiles,
+)
+from apps.users.cache import invalidate_user_cache
+from apps.users.models import TelegramUser
+from apps.users.repository import approve_user, delete_user, list_active_users
+
+
+class HouseholdIsolationTests(TestCase):
+    """Dos familias con las mismas tallas no deben verse entre sí"""
+
+    def setUp(self):
+        invalidate_settings_cache()
+        invalidate_user_cache()
+        self.homes = [Household.objects.create(name=f"Casa {i}") for i in range(2)]
+        self.babies, self.users = [], []
+        for i, home in enumerate(self.homes):
+            DiaperSize.objects.create(household=home, label="P")
+            _add_stock(home.id, "P", 50)
+            self.babies.append(
+                Profile.objects.create(
+                    household=home, name="Bebé", birth_date=date(2025, 1, 1)
+                )
+            )
+            user = TelegramUser.objects.create(
+                household=home, telegram_id=1000 + i, first_name=f"Cuidador {i}"
+            )
+            UserAlertPreference.objects.create(user=user)
+            self.users.append(user)
+
+    def stock(self, home):
+        return DiaperInventory.objects.get(size__household=home, size__label="P")
+
+    def test_usage_only_touches_own_inventory(self):
+        _registrar_uso_panal_sync(
+            self.babies[0].id, "P", "PEE", self.users[0], timezone.now()
+        )
+        self.assertEqual(self.stock(self.homes[0]).quantity, 49)
+        self.assertEqual(self.stock(self.homes[1]).quantity, 50)
+
+    def test_settings_are_per_household(self):
+        GlobalSetting.objects.create(
+            household=self.homes[0], key=KEY_DIAPER_THRESHOLD, value="100"
+        )
+        thresholds = [
+            _registrar_uso_panal_sync(baby.id, "P", "PEE", user, timezone.now())[2]
+            for baby, user in zip(self.babies, self.users)
+        ]
+        self.assertEqual(thresholds, [100, int(DEFAULT_DIAPER_THRESHOLD)])
+
+    def test_alerts_stay_in_household(self):
+        self.assertEqual(_subscriber_ids(self.homes[0].id, "alert_diapers"), [1000])
+        self.assertEqual(_subscriber_ids(self.homes[1].id, "alert_diapers"), [1001])
+
+    async def test_foreign_ids_are_not_found(self):
+        # Un id ajeno (ej. callback_data forjado) no lee ni escribe en otra familia
+        mine, theirs = self.homes[0].id, self.babies[1]
+        appt = await db_sync_to_async(Appointment.objects.create)(
+            profile=theirs, specialist="Pediatra", date=timezone.now()
+        )
+        with self.assertRaises(Profile.DoesNotExist):
+            await get_profile(mine, theirs.id)
+        with self.assertRaises(Profile.DoesNotExist):
+            await create_treatment(
+                mine,
+                theirs.id,
+                self.users[0],
+                medicine_name="X",
+                dose="1ml",
+                frequency_hours=8,
+                duration_days=1,
+                start_date=timezone.now(),
+            )
+        with self.assertRaises(Profile.DoesNotExist):
+            await create_appointment(
+                mine, theirs.id, specialist="X", date=timezone.now()
+            )
+        with self.assertRaises(Appointment.DoesNotExist):
+            await get_appointment(mine, appt.id)
+        self.assertIsNone(await complete_appointment(mine, appt.id, notes="x"))
+        with self.assertRaises(Profile.DoesNotExist):
+            await db_sync_to_async(_registrar_uso_panal_sync)(
+                theirs.id, "P", "PEE", self.users[0], timezone.now()
+            )
+
+        self.assertEqual((await get_profile(theirs.household_id, theirs.id)), theirs)
+        self.assertFalse(await db_sync_to_async(Treatment.objects.exists)())
+        self.assertEqual(await db_sync_to_async(Appointment.objects.count)(), 1)
+        stock = await db_sync_to_async(self.stock)(self.homes[1])
+        self.assertEqual(stock.quantity, 50)
+
+    async def test_repositories_only_see_own_household(self):
+        mine = self.homes[0].id
+        their_baby, their_user = self.babies[1], self.users[1]
+        their_size = await DiaperSize.objects.aget(household_id=self.homes[1].id)
+        their_treatment = await Treatment.objects.acreate(
+            profile=their_baby,
+            medicine_name="X",
+            dose="1ml",
+            frequency_hours=8,
+            duration_days=1,
+            start_date=timezone.now(),
+        )
+        await ScheduledEvent.objects.acreate(
+            household_id=their_baby.household_id,
+            profile=their_baby,
+            event_type=ScheduledEvent.EventType.MEDICATION_REMINDER,
+            scheduled_time=timezone.now(),
+        )
+
+        # Lecturas: solo lo propio
+        self.assertEqual([p.id for p in await list_profiles(mine)], [self.babies[0].id])
+        self.assertEqual([p.id for p in await list_babies(mine)], [self.babies[0].id])
+        self.assertEqual(await count_profiles(mine), 1)
+        self.assertEqual({s.household_id for s in await list_sizes(mine)}, {mine})
+        self.assertEqual(len(await list_forecasts(mine)), 1)
+        self.assertEqual([u.telegram_id for u in await list_active_users(mine)], [1000])
+        self.assertEqual(await list_pending_reminders(mine), [])
+        self.assertIsNone(await get_treatment(mine, their_treatment.id))
+        self.assertIsNone(await get_or_create_preferences(mine, their_user.telegram_id))
+
+        # Escrituras con ids ajenos: no encontradas, nada cambia
+        self.assertEqual(
+            await toggle_preference(mine, their_user.telegram_id, "alert_diapers"),
+            (None, False),
+        )
+        with self.assertRaises(DiaperSize.DoesNotExist):
+            await toggle_size(mine, their_size.id)
+        with self.assertRaises(TelegramUser.DoesNotExist):
+            await approve_user(mine, their_user.telegram_id, "Intruso", "OWNER")
+        with self.assertRaises(TelegramUser.DoesNotExist):
+            await delete_user(mine, their_user.telegram_id)
+
+        their_user = await TelegramUser.objects.aget(pk=their_user.pk)
+        self.assertEqual((their_user.nickname, their_user.role), (None, "GUEST"))
+        self.assertTrue((await DiaperSize.objects.aget(pk=their_size.pk)).is_active)
+        prefs = await UserAlertPreference.objects.aget(user=their_user)
+        self.assertTrue(prefs.alert_diapers)
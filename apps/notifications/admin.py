@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ScheduledEvent, UserAlertPreference
+from .models import OutboxMessage, ScheduledEvent, UserAlertPreference
 
 
 @admin.register(UserAlertPreference)
@@ -11,15 +11,33 @@ class UserAlertPreferenceAdmin(admin.ModelAdmin):
         "alert_meds",
         "alert_appointments",
     )
+    list_filter = ("user__household",)
 
 
 @admin.register(ScheduledEvent)
 class ScheduledEventAdmin(admin.ModelAdmin):
     list_display = (
         "event_type",
+        "profile",
         "related_id",
         "scheduled_time",
         "payload",
         "is_sent",
         "created_at",
     )
+    list_filter = ("household", "event_type", "is_sent")
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        "chat_id",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "last_error",
+        "created_at",
+        "sent_at",
+    )
+    list_filter = ("household", "status")
+    search_fields = ("idempotency_key",)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+logger = logging.getLogger("apps.notifications")
+
+# Límites de la Bot API de Telegram (aprox.): 30 msg/s global, 1 msg/s por chat
+GLOBAL_RATE_PER_SECOND = 30
+PER_CHAT_RATE_PER_SECOND = 1
+PER_CHAT_BURST = 3
+
+# Envíos simultáneos máximos por difusión
+MAX_CONCURRENT_SENDS = 10
+
+# Reintentos ante RetryAfter / errores de red
+MAX_ATTEMPTS = 3
+BASE_BACKOFF_SECONDS = 0.5
+
+
+class TokenBucket:
+    """Limitador de tasa clásico (token bucket) para corrutinas"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    def _get_lock(self):
+        # El lock se ata al loop activo (los tests crean loops nuevos)
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+
+    @property
+    def is_idle(self):
+        self._refill()
+        return self.tokens >= self.capacity
+
+    async def acquire(self):
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+_global_bucket = TokenBucket(GLOBAL_RATE_PER_SECOND)
+_chat_buckets = {}
+
+
+def _chat_bucket(chat_id):
+    bucket = _chat_buckets.get(chat_id)
+    if bucket is None:
+        # Limpieza perezosa de chats inactivos para no crecer sin límite
+        if len(_chat_buckets) > 1000:
+            for key in [k for k, b in _chat_buckets.items() if b.is_idle]:
+                del _chat_buckets[key]
+        bucket = TokenBucket(PER_CHAT_RATE_PER_SECOND, PER_CHAT_BURST)
+        _chat_buckets[chat_id] = bucket
+    return bucket
+
+
+def _retry_after_seconds(error):
+    value = error.retry_after
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    return float(value)
+
+
+async def send_once(bot, chat_id, text, attempt=1, **kwargs):
+    """
+    Un intento de envío respetando los límites de tasa.
+
+    Returns:
+        (enviado, espera antes de reintentar o None si no vale la pena, error)
+    """
+    await _chat_bucket(chat_id).acquire()
+    await _global_bucket.acquire()
+    try:
+        await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        return True, None, None
+    except (BadRequest, Forbidden) as e:
+        # Errores definitivos (chat bloqueado, markdown inválido...): no reintentar
+        return False, None, e
+    except RetryAfter as e:
+        return False, _retry_after_seconds(e), e
+    except NetworkError as e:
+        return False, BASE_BACKOFF_SECONDS * (2 ** (attempt - 1)), e
+    except Exception as e:
+        return False, None, e
+
+
+async def _send_with_retry(bot, chat_id, text, semaphore, report, **kwargs):
+    async with semaphore:
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            sent, delay, error = await send_once(bot, chat_id, text, attempt, **kwargs)
+            if sent:
+                report["sent"] += 1
+                return True
+            if delay is None or attempt == MAX_ATTEMPTS:
+                break
+            report["retries"] += 1
+            await asyncio.sleep(delay)
+
+        report["failed"].append((chat_id, str(error)))
+        return False
+
+
+async def deliver(bot, chat_ids, text, **kwargs):
+    """
+    Envía el mismo mensaje a varios chats en paralelo, respetando los límites de Telegram.
+
+    Args:
+        bot: Instancia del bot.
+        chat_ids: Lista de chat IDs destino.
+        text: Texto a enviar.
+        **kwargs: Parámetros extra de send_message (parse_mode, reply_markup...).
+
+    Returns:
+        dict con el reporte de entrega: total, sent, retries y failed [(chat_id, error)].
+    """
+    report = {"total": len(chat_ids), "sent": 0, "retries": 0, "failed": []}
+    if not chat_ids:
+        return report
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+    await asyncio.gather(
+        *(
+            _send_with_retry(bot, chat_id, text, semaphore, report, **kwargs)
+            for chat_id in chat_ids
+        )
+    )
+
+    for chat_id, error in report["failed"]:
+        logger.error(f"Fallo enviando mensaje a {chat_id}: {error}")
+    return report
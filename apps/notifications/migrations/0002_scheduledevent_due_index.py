@@ -0,0 +1,22 @@
+# Generated by Django 4.2.28 on 2026-10-17 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledevent',
+            name='event_type',
+            field=models.CharField(choices=[('LACTATION', 'Recordatorio Lactancia'), ('MEDICATION', 'Recordatorio Medicina'), ('APPOINTMENT', 'Recordatorio Cita'), ('RESULTS', 'Solicitud de Resultados'), ('CUSTOM', 'Personalizado')], max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='scheduledevent',
+            index=models.Index(fields=['is_sent', 'scheduled_time'], name='notif_event_due_idx'),
+        ),
+    ]
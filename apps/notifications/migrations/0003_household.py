@@ -0,0 +1,20 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0001_initial'),
+        ('notifications', '0002_scheduledevent_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledevent',
+            name='household',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_events', to='households.household', verbose_name='Familia'),
+        ),
+    ]
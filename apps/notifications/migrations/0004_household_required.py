@@ -0,0 +1,20 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0002_default_household'),
+        ('notifications', '0003_household'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='scheduledevent',
+            name='household',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_events', to='households.household', verbose_name='Familia'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def dedupe_and_link_profiles(apps, schema_editor):
+    """
+    Antes de la restricción: de los pendientes apilados por objeto queda el
+    más reciente. Y cada pendiente se enlaza con su perfil.
+    """
+    ScheduledEvent = apps.get_model('notifications', 'ScheduledEvent')
+    Treatment = apps.get_model('health', 'Treatment')
+    Appointment = apps.get_model('health', 'Appointment')
+
+    pending = ScheduledEvent.objects.filter(is_sent=False).exclude(related_id='')
+    seen = set()
+    stacked = []
+    for event in pending.order_by('-scheduled_time', '-id'):
+        key = (event.household_id, event.event_type, event.related_id)
+        if key in seen:
+            stacked.append(event.id)
+        seen.add(key)
+    ScheduledEvent.objects.filter(id__in=stacked).delete()
+
+    # related_id -> perfil, según el tipo de evento
+    owners = {
+        'MEDICATION': dict(Treatment.objects.values_list('id', 'profile_id')),
+        'RESULTS': dict(Appointment.objects.values_list('id', 'profile_id')),
+    }
+    for event in pending.exclude(id__in=stacked):
+        if not event.related_id.isdigit():
+            continue
+        related_id = int(event.related_id)
+        if event.event_type == 'LACTATION':
+            profile_id = related_id
+        else:
+            profile_id = owners.get(event.event_type, {}).get(related_id)
+        if profile_id is not None:
+            ScheduledEvent.objects.filter(id=event.id).update(profile_id=profile_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0003_log_indexes'),
+        ('profiles', '0003_household_required'),
+        ('notifications', '0004_household_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduledevent',
+            name='profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scheduled_events', to='profiles.profile', verbose_name='Perfil'),
+        ),
+        migrations.RunPython(dedupe_and_link_profiles, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='scheduledevent',
+            index=models.Index(fields=['profile', 'is_sent', 'scheduled_time'], name='notif_event_profile_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduledevent',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_sent', False), models.Q(('related_id', ''), _negated=True)), fields=('household', 'event_type', 'related_id'), name='notif_event_one_pending'),
+        ),
+    ]
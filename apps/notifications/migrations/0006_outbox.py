@@ -0,0 +1,37 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0002_default_household'),
+        ('notifications', '0005_reminder_registry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField()),
+                ('text', models.TextField()),
+                ('parse_mode', models.CharField(blank=True, max_length=20)),
+                ('reply_markup', models.JSONField(blank=True, null=True)),
+                ('idempotency_key', models.CharField(help_text='Origen + destinatario: repetir el encolado no duplica el aviso', max_length=150, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('SENT', 'Enviado'), ('FAILED', 'Fallido')], default='PENDING', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo intento')),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('household', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='households.household', verbose_name='Familia')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='notif_outbox_due_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,8 @@
 from django.db import models
+from django.utils import timezone
+from apps.households.managers import TenantManager
+from apps.households.models import Household
+from apps.profiles.models import Profile
 from apps.users.models import TelegramUser
 
 
@@ -13,6 +17,9 @@ class UserAlertPreference(models.Model):
     alert_meds = models.BooleanField(default=True, verbose_name="Alerta Medicinas")
     alert_appointments = models.BooleanField(default=True, verbose_name="Alerta Citas")
 
+    household_lookup = "user__household"
+    objects = TenantManager()
+
     def __str__(self):
         return f"Prefs de {self.user}"
 
@@ -24,8 +31,23 @@ class ScheduledEvent(models.Model):
         LACTATION_REMINDER = "LACTATION", "Recordatorio Lactancia"
         MEDICATION_REMINDER = "MEDICATION", "Recordatorio Medicina"
         APPOINTMENT_REMINDER = "APPOINTMENT", "Recordatorio Cita"
+        RESULTS_PROMPT = "RESULTS", "Solicitud de Resultados"
         CUSTOM = "CUSTOM", "Personalizado"
 
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        related_name="scheduled_events",
+        verbose_name="Familia",
+    )
+    profile = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="scheduled_events",
+        verbose_name="Perfil",
+    )
     event_type = models.CharField(max_length=20, choices=EventType.choices)
     related_id = models.CharField(
         max_length=50,
@@ -41,5 +63,81 @@ class ScheduledEvent(models.Model):
     is_sent = models.BooleanField(default=False, verbose_name="¿Enviado?")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            # Escaneo de pendientes: WHERE is_sent = false AND scheduled_time <= ...
+            models.Index(
+                fields=["is_sent", "scheduled_time"], name="notif_event_due_idx"
+            ),
+            # Recordatorios pendientes de un perfil
+            models.Index(
+                fields=["profile", "is_sent", "scheduled_time"],
+                name="notif_event_profile_idx",
+            ),
+        ]
+        constraints = [
+            # Un solo recordatorio pendiente por objeto (ej. un tratamiento):
+            # programar otro reemplaza al anterior en vez de apilar alarmas
+            models.UniqueConstraint(
+                fields=["household", "event_type", "related_id"],
+                condition=models.Q(is_sent=False) & ~models.Q(related_id=""),
+                name="notif_event_one_pending",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.event_type} - {self.scheduled_time}"
+
+
+class OutboxMessage(models.Model):
+    """
+    Bandeja de salida: cada aviso se anota (un registro por destinatario) en la
+    misma transacción que el registro que lo origina y un despachador en
+    segundo plano lo envía con reintentos.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pendiente"
+        SENT = "SENT", "Enviado"
+        FAILED = "FAILED", "Fallido"
+
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        related_name="outbox_messages",
+        verbose_name="Familia",
+    )
+    chat_id = models.BigIntegerField()
+    text = models.TextField()
+    parse_mode = models.CharField(max_length=20, blank=True)
+    reply_markup = models.JSONField(null=True, blank=True)
+    idempotency_key = models.CharField(
+        max_length=150,
+        unique=True,
+        help_text="Origen + destinatario: repetir el encolado no duplica el aviso",
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Próximo intento"
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        indexes = [
+            # Vaciado: WHERE status = 'PENDING' AND next_attempt_at <= ahora
+            models.Index(
+                fields=["status", "next_attempt_at"], name="notif_outbox_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.chat_id} - {self.status}"
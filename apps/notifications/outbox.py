@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from datetime import timedelta
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from telegram import InlineKeyboardMarkup
+
+from apps.core_config.db import db_sync_to_async, supports_update_returning
+from apps.notifications.fanout import MAX_CONCURRENT_SENDS, send_once
+from apps.notifications.models import OutboxMessage
+from apps.notifications.repository import _subscriber_ids
+from apps.telegram_bot import metrics
+
+logger = logging.getLogger("apps.notifications")
+
+# --- BANDEJA DE SALIDA (Outbox transaccional) ---
+# El handler anota los avisos en la transacción de su registro (si ésta falla,
+# no sale ningún aviso; si se confirma, ninguno se pierde) y responde al
+# usuario sin esperar la difusión. El despachador los envía por lotes:
+# reclama filas con un "arriendo" (next_attempt_at en el futuro), envía en
+# paralelo y anota el resultado. Si el proceso muere a mitad, el arriendo
+# vence y otro intento los retoma (entrega al-menos-una-vez).
+
+# Sondeo de respaldo (reintentos y avisos encolados por otros procesos)
+OUTBOX_POLL_SECONDS = 5
+# Filas reclamadas por vuelta
+OUTBOX_BATCH_SIZE = 50
+# Tiempo que una fila reclamada queda reservada para quien la envía
+OUTBOX_LEASE = timedelta(minutes=2)
+# Intentos antes de marcar el aviso como fallido
+OUTBOX_MAX_ATTEMPTS = 5
+# Días que se guardan los avisos ya enviados
+OUTBOX_RETENTION_DAYS = 7
+
+_state = {"draining": False, "again": False}
+
+
+def enqueue_alert(
+    household_id,
+    topic_field,
+    text,
+    key,
+    exclude_user_id=None,
+    reply_markup=None,
+    parse_mode="Markdown",
+):
+    """
+    Encola un aviso para los suscritos a `topic_field` de la familia.
+    Llamar DENTRO de la transacción que escribe el registro de origen.
+
+    Args:
+        key: Origen del aviso (ej. "diaper_log:42"). Con el chat destino forma
+            la clave de idempotencia: encolar dos veces lo mismo no duplica.
+
+    Returns:
+        Cantidad de destinatarios.
+    """
+    chat_ids = _subscriber_ids(household_id, topic_field, exclude_user_id)
+    markup = reply_markup.to_dict() if reply_markup else None
+    OutboxMessage.objects.bulk_create(
+        [
+            OutboxMessage(
+                household_id=household_id,
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode or "",
+                reply_markup=markup,
+                idempotency_key=f"{key}:{topic_field}:{chat_id}",
+            )
+            for chat_id in chat_ids
+        ],
+        ignore_conflicts=True,
+    )
+    return len(chat_ids)
+
+
+# --- CONSULTAS (Síncronas, se ejecutan vía sync_to_async) ---
+
+
+def _claim_batch(limit=OUTBOX_BATCH_SIZE):
+    """Reserva hasta `limit` avisos vencidos; retorna las filas ganadas"""
+    now = timezone.now()
+    lease_until = now + OUTBOX_LEASE
+    due = OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.PENDING, next_attempt_at__lte=now
+    )
+    ids = list(due.order_by("id").values_list("id", flat=True)[:limit])
+    if not ids:
+        return []
+
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        adapt = connection.ops.adapt_datetimefield_value
+        placeholders = ", ".join(["%s"] * len(ids))
+        sql = (
+            f"UPDATE {qn(OutboxMessage._meta.db_table)} "
+            f"SET {qn('attempts')} = {qn('attempts')} + 1, "
+            f"{qn('next_attempt_at')} = %s "
+            f"WHERE {qn('status')} = %s AND {qn('next_attempt_at')} <= %s "
+            f"AND {qn('id')} IN ({placeholders}) RETURNING {qn('id')}"
+        )
+        params = [adapt(lease_until), OutboxMessage.Status.PENDING, adapt(now), *ids]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            claimed = [row[0] for row in cursor.fetchall()]
+    else:
+        claimed = [
+            message_id
+            for message_id in ids
+            if due.filter(id=message_id).update(
+                attempts=F("attempts") + 1, next_attempt_at=lease_until
+            )
+        ]
+    return list(OutboxMessage.objects.filter(id__in=claimed).order_by("id"))
+
+
+def _record_results(sent_ids, retries, failures):
+    """
+    Anota el resultado del lote.
+    retries: [(id, segundos de espera, error)]; failures: [(id, error)].
+    """
+    now = timezone.now()
+    if sent_ids:
+        OutboxMessage.objects.filter(id__in=sent_ids).update(
+            status=OutboxMessage.Status.SENT, sent_at=now, last_error=""
+        )
+    for message_id, delay, error in retries:
+        OutboxMessage.objects.filter(id=message_id).update(
+            next_attempt_at=now + timedelta(seconds=delay), last_error=error
+        )
+    for message_id, error in failures:
+        OutboxMessage.objects.filter(id=message_id).update(
+            status=OutboxMessage.Status.FAILED, last_error=error
+        )
+
+
+def _purge_sent():
+    cutoff = timezone.now() - timedelta(days=OUTBOX_RETENTION_DAYS)
+    deleted, _ = OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.SENT, sent_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+# --- DESPACHADOR ---
+
+
+async def _send(bot, message, semaphore):
+    markup = (
+        InlineKeyboardMarkup.de_json(message.reply_markup, bot)
+        if message.reply_markup
+        else None
+    )
+    async with semaphore:
+        return await send_once(
+            bot,
+            message.chat_id,
+            message.text,
+            message.attempts,
+            parse_mode=message.parse_mode or None,
+            reply_markup=markup,
+        )
+
+
+async def _drain_batch(bot):
+    """Un lote: reclamar, enviar en paralelo y anotar. Retorna filas atendidas."""
+    batch = await db_sync_to_async(_claim_batch)()
+    if not batch:
+        return 0
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_SENDS)
+    results = await asyncio.gather(*(_send(bot, m, semaphore) for m in batch))
+
+    now = timezone.now()
+    sent_ids, retries, failures = [], [], []
+    for message, (sent, delay, error) in zip(batch, results):
+        if sent:
+            sent_ids.append(message.id)
+            metrics.observe(
+                "lag:outbox", (now - message.created_at).total_seconds() * 1000
+            )
+        elif delay is not None and message.attempts < OUTBOX_MAX_ATTEMPTS:
+            retries.append((message.id, delay, str(error)))
+        else:
+            logger.error(f"Aviso {message.id} a {message.chat_id} falló: {error}")
+            failures.append((message.id, str(error)))
+
+    await db_sync_to_async(_record_results)(sent_ids, retries, failures)
+    return len(batch)
+
+
+async def drain(bot):
+    """Vacía la bandeja por lotes; una sola pasada a la vez por proceso"""
+    if _state["draining"]:
+        # Ya hay una pasada en curso: que repita al terminar
+        _state["again"] = True
+        return
+    _state["draining"] = True
+    try:
+        while True:
+            _state["again"] = False
+            handled = await _drain_batch(bot)
+            if handled < OUTBOX_BATCH_SIZE and not _state["again"]:
+                break
+    finally:
+        _state["draining"] = False
+
+
+def wake_outbox(application):
+    """Tras encolar: vaciar ya, sin esperar al sondeo (no bloquea al handler)"""
+    application.create_task(drain(application.bot))
+
+
+async def drain_outbox(context):
+    """Job de PTB: sondeo de respaldo"""
+    await drain(context.bot)
+
+
+async def purge_outbox(context):
+    """Job diario: borra los avisos enviados hace más de OUTBOX_RETENTION_DAYS"""
+    deleted = await db_sync_to_async(_purge_sent)()
+    logger.info(f"Outbox: {deleted} avisos enviados eliminados.")
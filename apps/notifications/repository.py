@@ -0,0 +1,81 @@
+from django.db import transaction
+
+from apps.core_config.db import db_sync_to_async
+from apps.notifications.models import ScheduledEvent, UserAlertPreference
+from apps.users.models import TelegramUser
+
+# Acceso a datos de notificaciones: cada función async = un solo salto al pool de BD
+
+
+def _get_or_create_preferences(household_id, user_id):
+    try:
+        user = TelegramUser.objects.for_household(household_id).get(telegram_id=user_id)
+    except TelegramUser.DoesNotExist:
+        return None
+    prefs, created = UserAlertPreference.objects.get_or_create(user=user)
+    prefs.user = user  # Ya lo tenemos: evita otra consulta al leer prefs.user
+    return prefs
+
+
+def _toggle_preference(household_id, user_id, field_name):
+    with transaction.atomic():
+        prefs = _get_or_create_preferences(household_id, user_id)
+        if not prefs:
+            return None, False
+
+        # Obtenemos el valor actual dinámicamente
+        new_value = not getattr(prefs, field_name)
+
+        # Guardamos el nuevo valor
+        setattr(prefs, field_name, new_value)
+        prefs.save(update_fields=[field_name])
+    return prefs, new_value
+
+
+def _subscriber_ids(household_id, topic_field, exclude_id=None):
+    """
+    Chat IDs de usuarios activos de la familia con la preferencia activada
+    (excluye al remitente si es necesario).
+    """
+    qs = UserAlertPreference.objects.for_household(household_id).filter(
+        **{"user__is_active": True, topic_field: True}
+    )
+    if exclude_id:
+        qs = qs.exclude(user__telegram_id=exclude_id)
+    return list(qs.values_list("user__telegram_id", flat=True))
+
+
+def _pending_reminders(household_id, profile_id=None):
+    """Por el índice (perfil, is_sent, hora) si se pide un perfil"""
+    qs = (
+        ScheduledEvent.objects.for_household(household_id)
+        .filter(is_sent=False)
+        .select_related("profile")
+    )
+    if profile_id is not None:
+        qs = qs.filter(profile_id=profile_id)
+    return list(qs.order_by("scheduled_time"))
+
+
+async def get_or_create_preferences(household_id, user_id):
+    """
+    Busca las preferencias de un usuario de la familia (con .user), si no existen
+    las crea por defecto. None si el usuario no es de esa familia.
+    """
+    return await db_sync_to_async(_get_or_create_preferences)(household_id, user_id)
+
+
+async def toggle_preference(household_id, user_id, field_name):
+    """Invierte el valor de una alerta específica (True <-> False)"""
+    return await db_sync_to_async(_toggle_preference)(household_id, user_id, field_name)
+
+
+async def list_subscriber_ids(household_id, topic_field, exclude_id=None):
+    return await db_sync_to_async(_subscriber_ids)(
+        household_id, topic_field, exclude_id
+    )
+
+
+async def list_pending_reminders(household_id, profile_id=None):
+    """Recordatorios pendientes de la familia (o de un perfil), el más próximo primero"""
+    return await db_sync_to_async(_pending_reminders)(household_id, profile_id)
@@ -0,0 +1,251 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from apps.core_config.db import db_sync_to_async, supports_update_returning
+from apps.core_config.sharding import owns_household
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from telegram.ext import ContextTypes, Job
+
+from apps.notifications.models import ScheduledEvent
+from apps.notifications.timer_wheel import TimerWheel
+from apps.telegram_bot import metrics
+
+logger = logging.getLogger("apps.notifications")
+
+# Resolución de los recordatorios: la rueda avanza un tick por segundo
+TICK_SECONDS = 1
+# Cada cuánto revisamos la tabla buscando eventos que no estén en memoria
+POLL_INTERVAL_SECONDS = 60
+# Ventana hacia adelante que cubre cada revisión periódica
+POLL_LOOKAHEAD = timedelta(seconds=POLL_INTERVAL_SECONDS * 2)
+
+# Registro event_type -> callback (misma firma que un job de PTB)
+_EVENT_CALLBACKS = {}
+
+# Recordatorios en memoria de este proceso, por clave de evento
+_wheel = TimerWheel(tick_seconds=TICK_SECONDS, now=timezone.now().timestamp())
+
+
+def register_event_callback(event_type, callback):
+    """Asocia un tipo de evento con la función que lo atiende"""
+    _EVENT_CALLBACKS[event_type] = callback
+
+
+def _event_key(event_id):
+    return f"scheduled_event_{event_id}"
+
+
+def _job_data(event):
+    data = dict(event.payload or {})
+    data["event_id"] = event.id
+    data["event_type"] = event.event_type
+    data["household_id"] = event.household_id
+    data["related_id"] = event.related_id
+    return data
+
+
+# --- CONSULTAS (Síncronas, se ejecutan vía sync_to_async) ---
+
+
+def _drop_pending(household_id, event_type, related_id):
+    """Borra los pendientes de un objeto; retorna sus ids"""
+    stale = ScheduledEvent.objects.for_household(household_id).filter(
+        event_type=event_type, related_id=str(related_id), is_sent=False
+    )
+    event_ids = list(stale.values_list("id", flat=True))
+    if event_ids:
+        ScheduledEvent.objects.filter(id__in=event_ids, is_sent=False).delete()
+    return event_ids
+
+
+def _upsert_event(household_id, profile_id, event_type, related_id, when, payload):
+    with transaction.atomic():
+        superseded = []
+        if str(related_id):
+            superseded = _drop_pending(household_id, event_type, related_id)
+        event = ScheduledEvent.objects.create(
+            household_id=household_id,
+            profile_id=profile_id,
+            event_type=event_type,
+            related_id=str(related_id),
+            scheduled_time=when,
+            payload=payload,
+        )
+    return event, superseded
+
+
+def _save_event(*args):
+    """
+    Registro por objeto: el nuevo pendiente reemplaza a los anteriores del
+    mismo (tipo, objeto). Retorna (evento, ids reemplazados).
+    """
+    try:
+        return _upsert_event(*args)
+    except IntegrityError:
+        # Otro cuidador programó el mismo objeto a la vez: gana el último
+        return _upsert_event(*args)
+
+
+def _pending_events(until=None):
+    """Escaneo por el índice (is_sent, scheduled_time). Una sola consulta."""
+    qs = ScheduledEvent.objects.filter(is_sent=False)
+    if until is not None:
+        qs = qs.filter(scheduled_time__lte=until)
+    return list(qs.order_by("scheduled_time"))
+
+
+def _claim_event(event_id):
+    """Marca el evento como enviado. Solo un proceso/job puede ganarlo."""
+    return (
+        ScheduledEvent.objects.filter(id=event_id, is_sent=False).update(is_sent=True)
+        == 1
+    )
+
+
+def _claim_events(event_ids):
+    """Reclama un lote de eventos; retorna el set de ids ganados (una consulta)"""
+    if not supports_update_returning():
+        return {event_id for event_id in event_ids if _claim_event(event_id)}
+    qn = connection.ops.quote_name
+    placeholders = ", ".join(["%s"] * len(event_ids))
+    sql = (
+        f"UPDATE {qn(ScheduledEvent._meta.db_table)} SET {qn('is_sent')} = %s "
+        f"WHERE {qn('is_sent')} = %s AND {qn('id')} IN ({placeholders}) "
+        f"RETURNING {qn('id')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [True, False, *event_ids])
+        return {row[0] for row in cursor.fetchall()}
+
+
+# --- MOTOR ---
+
+
+def _arm(event):
+    """
+    Carga un evento persistido en la rueda (si no estaba ya). Con workers en
+    shards, solo el dueño de la familia lo carga; los demás lo ignoran y el
+    dueño lo recoge en su rehidratación o en su sondeo.
+    """
+    if not owns_household(event.household_id):
+        return False
+    key = _event_key(event.id)
+    if key in _wheel:
+        return False
+    _wheel.schedule(key, event.scheduled_time.timestamp(), _job_data(event))
+    return True
+
+
+async def schedule_event(
+    household_id, event_type, when, payload, related_id="", profile_id=None
+):
+    """
+    Persiste un recordatorio en ScheduledEvent y lo programa en memoria.
+    Con related_id, reemplaza al pendiente del mismo (tipo, objeto): posponer
+    o registrar una dosis mueve la alarma en vez de sumar otra.
+
+    Args:
+        household_id: Familia dueña del evento (sus alertas no salen de ella).
+        event_type: ScheduledEvent.EventType.
+        when: datetime (aware) o timedelta relativo a ahora.
+        payload: Datos que recibirá el callback en context.job.data
+            (junto con event_id, event_type, household_id y related_id).
+        related_id: ID del objeto relacionado (tratamiento, cita, perfil).
+        profile_id: Perfil al que pertenece (para listar sus pendientes).
+    """
+    if isinstance(when, timedelta):
+        when = timezone.now() + when
+    elif isinstance(when, datetime) and timezone.is_naive(when):
+        when = timezone.make_aware(when, timezone.get_current_timezone())
+
+    event, superseded = await db_sync_to_async(_save_event)(
+        household_id, profile_id, event_type, related_id, when, payload
+    )
+    for event_id in superseded:
+        _wheel.cancel(_event_key(event_id))
+    _arm(event)
+    return event
+
+
+async def cancel_reminders(household_id, event_type, related_id):
+    """Quita el recordatorio pendiente de un objeto (ej. tratamiento terminado)"""
+    event_ids = await db_sync_to_async(_drop_pending)(
+        household_id, event_type, related_id
+    )
+    for event_id in event_ids:
+        _wheel.cancel(_event_key(event_id))
+    return len(event_ids)
+
+
+async def _tick(context: ContextTypes.DEFAULT_TYPE):
+    """Job de PTB (cada TICK_SECONDS): saca de la rueda lo vencido y lo despacha"""
+    now = timezone.now().timestamp()
+    due = _wheel.advance(now)
+    if not due:
+        return
+    for _, when, _ in due:
+        metrics.observe("lag:reminders", (now - when) * 1000)
+    # El envío corre aparte: un tick lento no retrasa el siguiente
+    context.application.create_task(_fire_due(context.application, due))
+
+
+async def _fire_due(application, due):
+    """
+    Un lote por tick: un solo UPDATE reclama todos los eventos y los avisos
+    salen en paralelo. Varios eventos del mismo objeto (ej. dos alarmas del
+    mismo tratamiento) se avisan una sola vez.
+    """
+    claimed = await db_sync_to_async(_claim_events)([d["event_id"] for _, _, d in due])
+    batch = {}
+    for _, _, data in due:
+        if data["event_id"] in claimed:
+            # El más reciente de cada objeto gana
+            key = (data["household_id"], data["event_type"], data["related_id"])
+            batch[key] = data
+    await asyncio.gather(*(_run_event(application, data) for data in batch.values()))
+
+
+async def _run_event(application, data):
+    """Delega al callback registrado con un contexto de job de PTB"""
+    callback = _EVENT_CALLBACKS.get(data["event_type"])
+    if not callback:
+        logger.error(f"Evento {data['event_id']} sin callback registrado ({data})")
+        return
+
+    job = Job(callback, data=data, name=_event_key(data["event_id"]))
+    context = application.context_types.context.from_job(job, application)
+    try:
+        async with metrics.track(f"job:{metrics.callback_name(callback)}"):
+            await callback(context)
+    except Exception as e:
+        logger.error(f"Error ejecutando evento {data['event_id']}: {e}")
+
+
+async def rehydrate_events(context: ContextTypes.DEFAULT_TYPE):
+    """Al arrancar: recupera TODOS los pendientes en una sola consulta"""
+    events = await db_sync_to_async(_pending_events)()
+    loaded = sum(1 for e in events if _arm(e))
+    logger.info(f"Scheduler: {loaded} eventos pendientes restaurados.")
+
+
+async def poll_due_events(context: ContextTypes.DEFAULT_TYPE):
+    """Revisión periódica: eventos próximos creados fuera de este proceso"""
+    until = timezone.now() + POLL_LOOKAHEAD
+    events = await db_sync_to_async(_pending_events)(until)
+    for event in events:
+        _arm(event)
+
+
+def start_scheduler(job_queue):
+    """Programa la rehidratación inicial, el tick de la rueda y el sondeo periódico"""
+    job_queue.run_once(rehydrate_events, when=0, name="scheduler_rehydrate")
+    job_queue.run_repeating(
+        _tick, interval=TICK_SECONDS, first=TICK_SECONDS, name="scheduler_tick"
+    )
+    job_queue.run_repeating(
+        poll_due_events,
+        interval=POLL_INTERVAL_SECONDS,
+        first=POLL_INTERVAL_SECONDS,
+        name="scheduler_poll",
+    )
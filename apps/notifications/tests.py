@@ -1,3 +1,260 @@
-from django.test import TestCase
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from telegram.error import Forbidden, NetworkError, RetryAfter
 
-# Create your tests here.
+from apps.households.models import Household
+from apps.notifications import fanout, scheduler
+from apps.notifications.models import (
+    OutboxMessage,
+    ScheduledEvent,
+    UserAlertPreference,
+)
+from apps.notifications.outbox import _claim_batch, _record_results, enqueue_alert
+from apps.notifications.repository import list_pending_reminders
+from apps.notifications.scheduler import _claim_events
+from apps.notifications.timer_wheel import TimerWheel
+from apps.profiles.models import Profile
+from apps.users.models import TelegramUser
+
+
+class TimerWheelTests(SimpleTestCase):
+    """Cada temporizador vence una sola vez, nunca antes de su hora"""
+
+    def test_fires_in_order_across_levels(self):
+        wheel = TimerWheel(tick_seconds=1, slots=8, levels=3, now=0)
+        # Nivel 0, nivel 1, nivel 2 y overflow (8³ = 512 ticks)
+        for when in (5, 70, 300, 2000):
+            wheel.schedule(f"t{when}", when + 0.5)
+
+        fired = []
+        for now in range(0, 2100):
+            for key, when, _ in wheel.advance(now):
+                self.assertGreaterEqual(now, when)
+                self.assertLessEqual(now - when, 1)
+                fired.append(key)
+        self.assertEqual(fired, ["t5", "t70", "t300", "t2000"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_reschedule_replaces_and_cancel_removes(self):
+        wheel = TimerWheel(tick_seconds=1, now=0)
+        wheel.schedule("med_alarm_1", 10, "primera")
+        wheel.schedule("med_alarm_1", 20, "pospuesta")
+        wheel.schedule("lactation_alert_2", 15)
+        self.assertTrue(wheel.cancel("lactation_alert_2"))
+        self.assertFalse(wheel.cancel("lactation_alert_2"))
+
+        self.assertEqual(wheel.advance(19), [])
+        self.assertEqual(wheel.advance(20), [("med_alarm_1", 20, "pospuesta")])
+
+    def test_overdue_is_returned_on_next_advance(self):
+        wheel = TimerWheel(tick_seconds=1, now=100)
+        wheel.schedule("late", 50)
+        self.assertEqual([key for key, _, _ in wheel.advance(100)], ["late"])
+
+
+class ClaimEventsTests(TestCase):
+    def test_batch_claim_wins_each_event_once(self):
+        home = Household.objects.create(name="Casa")
+        ids = [
+            ScheduledEvent.objects.create(
+                household=home,
+                event_type=ScheduledEvent.EventType.MEDICATION_REMINDER,
+                scheduled_time=timezone.now(),
+            ).id
+            for _ in range(3)
+        ]
+        self.assertEqual(_claim_events(ids[:2]), set(ids[:2]))
+        self.assertEqual(_claim_events(ids), {ids[2]})
+        self.assertFalse(ScheduledEvent.objects.filter(is_sent=False).exists())
+
+
+class ReminderRegistryTests(TestCase):
+    """Un solo recordatorio pendiente por objeto, en BD y en la rueda"""
+
+    MED = ScheduledEvent.EventType.MEDICATION_REMINDER
+
+    def setUp(self):
+        self.home = Household.objects.create(name="Casa")
+        self.baby = Profile.objects.create(
+            household=self.home, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+
+    async def schedule(self, minutes, related_id=7):
+        return await scheduler.schedule_event(
+            self.home.id,
+            self.MED,
+            timedelta(minutes=minutes),
+            {"treatment_id": related_id},
+            related_id=related_id,
+            profile_id=self.baby.id,
+        )
+
+    async def test_snooze_replaces_pending_alarm(self):
+        first = await self.schedule(60)
+        snoozed = await self.schedule(15)
+        other = await self.schedule(30, related_id=8)
+
+        pending = await list_pending_reminders(self.home.id, self.baby.id)
+        self.assertEqual([e.id for e in pending], [snoozed.id, other.id])
+        self.assertNotIn(scheduler._event_key(first.id), scheduler._wheel)
+        self.assertIn(scheduler._event_key(snoozed.id), scheduler._wheel)
+
+        self.assertEqual(await scheduler.cancel_reminders(self.home.id, self.MED, 7), 1)
+        self.assertNotIn(scheduler._event_key(snoozed.id), scheduler._wheel)
+        pending = await list_pending_reminders(self.home.id, self.baby.id)
+        self.assertEqual([e.id for e in pending], [other.id])
+        scheduler._wheel.cancel(scheduler._event_key(other.id))
+
+
+class RehydrationTests(TestCase):
+    """Tras reiniciar, los pendientes de la BD vuelven a la rueda y salen una vez"""
+
+    MED = ScheduledEvent.EventType.MEDICATION_REMINDER
+
+    def setUp(self):
+        self.home = Household.objects.create(name="Casa")
+        now = timezone.now()
+        self.overdue, self.later, self.sent = (
+            ScheduledEvent.objects.create(
+                household=self.home,
+                event_type=self.MED,
+                scheduled_time=now + offset,
+                payload={"treatment_id": related},
+                related_id=str(related),
+                is_sent=is_sent,
+            )
+            for offset, related, is_sent in (
+                (timedelta(minutes=-5), 1, False),
+                (timedelta(hours=2), 2, False),
+                (timedelta(minutes=-10), 3, True),
+            )
+        )
+
+    async def test_restart_restores_and_fires_pending_once(self):
+        fired = []
+
+        async def callback(context):
+            fired.append(context.job.data)
+
+        application = SimpleNamespace(
+            context_types=SimpleNamespace(
+                context=SimpleNamespace(
+                    from_job=lambda job, app: SimpleNamespace(job=job)
+                )
+            )
+        )
+        # Un proceso nuevo: rueda vacía
+        wheel = TimerWheel(
+            tick_seconds=scheduler.TICK_SECONDS, now=timezone.now().timestamp()
+        )
+        with mock.patch.object(scheduler, "_wheel", wheel), mock.patch.dict(
+            scheduler._EVENT_CALLBACKS, {self.MED: callback}
+        ):
+            await scheduler.rehydrate_events(None)
+            keys = {scheduler._event_key(e.id) for e in (self.overdue, self.later)}
+            self.assertEqual({key for key in keys if key in wheel}, keys)
+            self.assertNotIn(scheduler._event_key(self.sent.id), wheel)
+
+            await scheduler._fire_due(
+                application, wheel.advance(timezone.now().timestamp())
+            )
+            # Otro arranque no vuelve a cargar lo ya enviado
+            await scheduler.rehydrate_events(None)
+            await scheduler._fire_due(
+                application, wheel.advance(timezone.now().timestamp())
+            )
+
+        self.assertEqual([data["event_id"] for data in fired], [self.overdue.id])
+        self.assertEqual(fired[0]["treatment_id"], 1)
+        self.assertEqual(fired[0]["household_id"], self.home.id)
+
+
+class OutboxTests(TestCase):
+    """Encolar dos veces no duplica; cada fila se reclama una sola vez"""
+
+    def setUp(self):
+        self.home = Household.objects.create(name="Casa")
+        for telegram_id in (101, 102):
+            user = TelegramUser.objects.create(
+                telegram_id=telegram_id, household=self.home
+            )
+            UserAlertPreference.objects.create(user=user)
+
+    def test_enqueue_is_idempotent(self):
+        self.assertEqual(enqueue_alert(self.home.id, "alert_diapers", "a", "log:1"), 2)
+        enqueue_alert(self.home.id, "alert_diapers", "a", "log:1")
+        enqueue_alert(self.home.id, "alert_diapers", "b", "log:2", exclude_user_id=101)
+        self.assertEqual(OutboxMessage.objects.count(), 3)
+
+    def test_claim_leases_each_row_once(self):
+        enqueue_alert(self.home.id, "alert_diapers", "a", "log:1")
+        claimed = _claim_batch()
+        self.assertEqual(len(claimed), 2)
+        self.assertTrue(all(m.attempts == 1 for m in claimed))
+        # Arrendadas: nadie más las toma hasta que venza el arriendo
+        self.assertEqual(_claim_batch(), [])
+
+        _record_results([claimed[0].id], [(claimed[1].id, 0, "RetryAfter")], [])
+        retried = _claim_batch()
+        self.assertEqual([m.id for m in retried], [claimed[1].id])
+        self.assertEqual(retried[0].attempts, 2)
+
+
+class FakeBot:
+    """Bot que responde a cada chat con la secuencia de errores indicada"""
+
+    def __init__(self, script=None):
+        self.script = {chat: list(errors) for chat, errors in (script or {}).items()}
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        errors = self.script.get(chat_id)
+        if errors:
+            raise errors.pop(0)
+        self.sent.append(chat_id)
+
+
+@mock.patch.object(fanout, "BASE_BACKOFF_SECONDS", 0)
+class FanoutTests(SimpleTestCase):
+    """Reparto con límite de tasa, reintentos y reporte de fallos"""
+
+    def setUp(self):
+        fanout._chat_buckets.clear()
+
+    async def test_bucket_paces_after_burst(self):
+        bucket = fanout.TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire()
+        # 2 de ráfaga + 4 a 20/s
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    async def test_retries_retry_after_and_network_errors(self):
+        bot = FakeBot({1: [RetryAfter(0), NetworkError("timeout")]})
+        report = await fanout.deliver(bot, [1, 2], "hola")
+
+        self.assertEqual(bot.sent.count(1), 1)
+        self.assertEqual(report["sent"], 2)
+        self.assertEqual(report["retries"], 2)
+        self.assertEqual(report["failed"], [])
+
+    async def test_failures_are_reported(self):
+        bot = FakeBot(
+            {
+                1: [Forbidden("bot was blocked by the user")],
+                2: [NetworkError("down")] * fanout.MAX_ATTEMPTS,
+            }
+        )
+        report = await fanout.deliver(bot, [1, 2, 3], "hola")
+
+        self.assertEqual(bot.sent, [3])
+        self.assertEqual(report["sent"], 1)
+        # Forbidden no se reintenta; la red sí, hasta agotar intentos
+        self.assertEqual(report["retries"], fanout.MAX_ATTEMPTS - 1)
+        self.assertCountEqual(
+            report["failed"], [(1, "bot was blocked by the user"), (2, "down")]
+        )
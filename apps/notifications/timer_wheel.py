@@ -0,0 +1,105 @@
+import math
+
+# --- RUEDA DE TEMPORIZADORES JERÁRQUICA ---
+# Varias ruedas de `slots` casillas: el nivel 0 avanza de a un tick, el nivel 1
+# de a `slots` ticks, el nivel 2 de a `slots`² ... Cada temporizador vive en una
+# casilla (un dict) según lo lejos que vence, así programar y cancelar por
+# clave son O(1). Cuando un nivel da la vuelta, su casilla siguiente se
+# redistribuye en los niveles de abajo. Lo que vence más allá del último
+# nivel espera en `overflow` y se reubica en cada vuelta del nivel superior.
+
+
+class TimerWheel:
+    """
+    Temporizadores por clave (una clave = un temporizador: programar de nuevo
+    la misma clave reemplaza el anterior).
+
+    Con 1 s por tick, 64 casillas y 4 niveles cubre ~194 días sin overflow.
+    """
+
+    def __init__(self, tick_seconds=1.0, slots=64, levels=4, now=0.0):
+        self.tick_seconds = tick_seconds
+        self.slots = slots
+        self.levels = levels
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._overflow = {}
+        # Vencidos al programarlos: salen en el próximo avance
+        self._ready = {}
+        # clave -> casilla (dict) donde está el temporizador
+        self._where = {}
+        # Último tick ya procesado
+        self._current = math.floor(now / tick_seconds)
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key, when, data=None):
+        """Programa (o reprograma) `key` para el instante `when` (timestamp)"""
+        self.cancel(key)
+        # Redondeo hacia arriba: un temporizador nunca vence antes de tiempo
+        self._place(key, (math.ceil(when / self.tick_seconds), when, data))
+
+    def cancel(self, key):
+        """Quita el temporizador; retorna False si no existía"""
+        slot = self._where.pop(key, None)
+        if slot is None:
+            return False
+        del slot[key]
+        return True
+
+    def advance(self, now):
+        """
+        Avanza hasta `now` (timestamp).
+        Retorna los vencidos como [(key, when, data)], ordenados por `when`.
+        """
+        target = math.floor(now / self.tick_seconds)
+        due = self._take(self._ready)
+        while self._current < target:
+            if not self._where:
+                # Rueda vacía: no hay nada que recorrer
+                self._current = target
+                break
+            self._current += 1
+            tick = self._current
+            # De arriba hacia abajo: lo que baja de un nivel puede seguir bajando
+            for level in range(self.levels - 1, 0, -1):
+                span = self.slots**level
+                if tick % span:
+                    continue
+                if level == self.levels - 1:
+                    self._cascade(self._overflow)
+                self._cascade(self._wheels[level][(tick // span) % self.slots])
+            due.extend(self._take(self._wheels[0][tick % self.slots]))
+            due.extend(self._take(self._ready))
+        due.sort(key=lambda item: item[1])
+        return due
+
+    def _place(self, key, entry):
+        delta = entry[0] - self._current
+        slot = self._overflow
+        if delta <= 0:
+            slot = self._ready
+        else:
+            for level in range(self.levels):
+                span = self.slots**level
+                if delta < span * self.slots:
+                    slot = self._wheels[level][(entry[0] // span) % self.slots]
+                    break
+        slot[key] = entry
+        self._where[key] = slot
+
+    def _cascade(self, slot):
+        entries = list(slot.items())
+        slot.clear()
+        for key, entry in entries:
+            self._place(key, entry)
+
+    def _take(self, slot):
+        due = [(key, entry[1], entry[2]) for key, entry in slot.items()]
+        for key, _, _ in due:
+            del self._where[key]
+        slot.clear()
+        return due
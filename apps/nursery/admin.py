@@ -1,10 +1,52 @@
 from django.contrib import admin
-from .models import DiaperInventory, DiaperLog, LactationLog, FeedingLog
+from .ledger import set_quantity
+from .models import (
+    DiaperInventory,
+    DiaperLog,
+    LactationLog,
+    FeedingLog,
+    InventoryMovement,
+    InventorySnapshot,
+)
 
 
 @admin.register(DiaperInventory)
 class DiaperInventoryAdmin(admin.ModelAdmin):
     list_display = ("size", "quantity", "last_restock")
+    list_filter = ("size__household",)
+
+    def save_model(self, request, obj, form, change):
+        # Las ediciones de cantidad pasan por el libro como corrección
+        quantity = obj.quantity
+        if change:
+            obj.quantity = form.initial["quantity"]
+        else:
+            obj.quantity = 0
+        super().save_model(request, obj, form, change)
+        set_quantity(obj.size, quantity, note=f"Admin: {request.user}")
+        obj.refresh_from_db(fields=["quantity"])
+
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    """Solo lectura: el libro es de solo anexado"""
+
+    list_display = ("created_at", "size", "kind", "delta", "user", "note")
+    list_filter = ("kind", "size")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "size", "balance", "last_movement")
 
 
 @admin.register(DiaperLog)
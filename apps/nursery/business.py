@@ -1,94 +1,217 @@
 from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import F
 from django.utils import timezone
-from asgiref.sync import sync_to_async
-from apps.nursery.models import DiaperLog, DiaperInventory
+from apps.core_config.db import db_sync_to_async, supports_update_returning
+from apps.nursery import forecast, ledger
+from apps.nursery.models import (
+    DiaperLog,
+    DiaperInventory,
+    FeedingLog,
+    InventoryMovement,
+)
 from apps.core_config.models import DiaperSize
 from apps.core_config.utils import (
-    get_setting,
+    read_float_setting,
+    read_int_setting,
     KEY_DIAPER_THRESHOLD,
     DEFAULT_DIAPER_THRESHOLD,
-)
-from apps.profiles.models import Profile
-from apps.nursery.models import FeedingLog
-from apps.core_config.utils import (
-    get_setting,
+    KEY_DIAPER_LEAD_DAYS,
+    DEFAULT_DIAPER_LEAD_DAYS,
     KEY_LACTATION_INTERVAL,
     DEFAULT_LACTATION_INTERVAL,
 )
+from apps.profiles.models import Profile
+
+# Columnas del inventario que devuelve el descuento (stock + estado del pronóstico)
+INVENTORY_ROW_FIELDS = (
+    "id",
+    "size_id",
+    "quantity",
+    "daily_rate",
+    "rate_day",
+    "rate_day_count",
+)
+
+
+def _descontar_inventario(household_id, size_label):
+    """
+    Descuenta 1 pañal de forma atómica en la propia BD (sin leer-modificar-escribir).
+    Retorna la fila resultante (stock + estado del pronóstico) o None si no había
+    nada que descontar.
+    """
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        sql = (
+            f"UPDATE {qn(DiaperInventory._meta.db_table)} "
+            f"SET {qn('quantity')} = {qn('quantity')} - 1 "
+            f"WHERE {qn('quantity')} > 0 AND {qn('size_id')} = ("
+            f"SELECT {qn('id')} FROM {qn(DiaperSize._meta.db_table)} "
+            f"WHERE {qn('household_id')} = %s AND {qn('label')} = %s) "
+            f"RETURNING {', '.join(qn(f) for f in INVENTORY_ROW_FIELDS)}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [household_id, size_label])
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        # SQL crudo: en SQLite la fecha llega como texto
+        row = dict(zip(INVENTORY_ROW_FIELDS, row))
+        row["rate_day"] = DiaperInventory._meta.get_field("rate_day").to_python(
+            row["rate_day"]
+        )
+        return row
+
+    # Fallback (otros motores): UPDATE condicional con F() + lectura en la misma transacción
+    inventory = DiaperInventory.objects.for_household(household_id).filter(
+        size__label=size_label
+    )
+    updated = inventory.filter(quantity__gt=0).update(quantity=F("quantity") - 1)
+    if not updated:
+        return None
+    return inventory.values(*INVENTORY_ROW_FIELDS).get()
+
+
+def _registrar_consumo(row, event_day):
+    """Avanza el pronóstico de la talla (O(1); la fila ya está bloqueada por el UPDATE)"""
+    rate, day, count = forecast.advance(
+        row["daily_rate"], row["rate_day"], row["rate_day_count"], event_day
+    )
+    DiaperInventory.objects.filter(pk=row["id"]).update(
+        daily_rate=rate, rate_day=day, rate_day_count=count
+    )
+    return rate, day, count
+
+
+def stock_alert_due(quantity, threshold, lead_days, days_left):
+    """Pocas unidades o se acaban antes de que llegue un pedido nuevo"""
+    return quantity <= threshold or (days_left is not None and days_left < lead_days)
+
+
+def _registrar_uso_panal_sync(
+    profile_id, size_label, waste_type, reporter_user, timestamp, notify=None
+):
+    """
+    Camino rápido: todo el registro ocurre en un solo salto de hilo y una transacción.
+    notify(log, stock, days_left), si se pasa, corre dentro de la transacción
+    cuando toca alerta de stock (para encolar avisos en la bandeja de salida).
+    """
+    with transaction.atomic():
+        # Solo perfiles de la familia de quien registra
+        profile = Profile.objects.for_household(reporter_user.household_id).get(
+            id=profile_id
+        )
+
+        # 1. Crear Log
+        log = DiaperLog.objects.create(
+            profile=profile,
+            reporter=reporter_user,
+            time=timestamp,
+            waste_type=waste_type,
+            size_label=size_label,
+        )
+
+        # 2. Descontar Inventario (UPDATE condicional, seguro ante taps simultáneos)
+        row = _descontar_inventario(profile.household_id, size_label)
+        if row is not None:
+            ledger.record(
+                row["size_id"],
+                InventoryMovement.Kind.USAGE,
+                -1,
+                user=reporter_user,
+                diaper_log=log,
+            )
+        else:
+            # Sin stock o sin fila de inventario: la creamos en 0 (caso poco frecuente)
+            size_obj = DiaperSize.objects.get(
+                household_id=profile.household_id, label=size_label
+            )
+            inventory, _ = DiaperInventory.objects.get_or_create(
+                size=size_obj, defaults={"quantity": 0}
+            )
+            row = {f: getattr(inventory, f) for f in INVENTORY_ROW_FIELDS}
+
+        # 3. Pronóstico: el pañal se usó aunque el inventario dijera 0
+        state = _registrar_consumo(row, timezone.localtime(timestamp).date())
+
+        # 4. Umbrales de alerta de la familia (caché en memoria; solo consulta si está fría)
+        threshold = read_int_setting(
+            profile.household_id, KEY_DIAPER_THRESHOLD, DEFAULT_DIAPER_THRESHOLD
+        )
+        lead_days = read_int_setting(
+            profile.household_id, KEY_DIAPER_LEAD_DAYS, DEFAULT_DIAPER_LEAD_DAYS
+        )
+
+        days_left = forecast.days_until_empty(
+            row["quantity"], forecast.current_rate(*state, timezone.localdate())
+        )
+        if notify and stock_alert_due(row["quantity"], threshold, lead_days, days_left):
+            notify(log, row["quantity"], days_left)
+    return log, row["quantity"], threshold, lead_days, days_left
 
 
 async def registrar_uso_panal(
-    profile_id, size_label, waste_type, reporter_user, timestamp=None
+    profile_id, size_label, waste_type, reporter_user, timestamp=None, notify=None
 ):
     """
     1. Crea el Log.
-    2. Descuenta Inventario.
-    3. Retorna (Log, Alerta_Stock_Bajo?)
+    2. Descuenta Inventario y actualiza el pronóstico de consumo.
+    3. Retorna (Log, Stock, Alerta_Stock_Bajo?, Días_Restantes o None)
     """
     if not timestamp:
         timestamp = timezone.now()
 
-    # 1. Obtener Perfil y Talla
-    profile = await sync_to_async(Profile.objects.get)(id=profile_id)
-    # Buscamos la talla por etiqueta (ej "RN")
-    size_obj = await sync_to_async(DiaperSize.objects.get)(label=size_label)
-
-    # 2. Crear Log
-    log = await sync_to_async(DiaperLog.objects.create)(
-        profile=profile,
-        reporter=reporter_user,
-        time=timestamp,
-        waste_type=waste_type,
-        size_label=size_label,
-    )
-
-    # 3. Descontar Inventario
-    # Buscamos o creamos el inventario para esa talla
-    inventory, created = await sync_to_async(DiaperInventory.objects.get_or_create)(
-        size=size_obj, defaults={"quantity": 0}
-    )
-
-    if inventory.quantity > 0:
-        inventory.quantity -= 1
-        await sync_to_async(inventory.save)()
+    log, current_stock, threshold, lead_days, days_left = await db_sync_to_async(
+        _registrar_uso_panal_sync
+    )(profile_id, size_label, waste_type, reporter_user, timestamp, notify)
 
-    current_stock = inventory.quantity
+    trigger_alert = stock_alert_due(current_stock, threshold, lead_days, days_left)
+    return log, current_stock, trigger_alert, days_left
 
-    # 4. Verificar Umbral
-    threshold_str = await get_setting(KEY_DIAPER_THRESHOLD, DEFAULT_DIAPER_THRESHOLD)
-    threshold = int(threshold_str)
 
-    trigger_alert = False
-    if current_stock <= threshold:
-        trigger_alert = True
-
-    return log, current_stock, trigger_alert
+def _registrar_lactancia_sync(
+    profile_id, start_time, end_time, reporter_user, observation, notify=None
+):
+    """
+    Un solo salto de hilo y una transacción. notify(log, next_feeding_time),
+    si se pasa, corre dentro de ella (avisos a la bandeja de salida).
+    """
+    with transaction.atomic():
+        # Solo perfiles de la familia de quien registra
+        profile = Profile.objects.for_household(reporter_user.household_id).get(
+            id=profile_id
+        )
+
+        # 1. Guardar Log
+        log = FeedingLog.objects.create(
+            profile=profile,
+            reporter=reporter_user,
+            start_time=start_time,
+            end_time=end_time,
+            observation=observation,
+        )
+
+        # 2. Calcular Próxima Toma
+        # Obtenemos el intervalo ya convertido a Float (caché en memoria)
+        interval_hours = read_float_setting(
+            profile.household_id, KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL
+        )
+
+        # La próxima toma se calcula desde que TERMINÓ de comer
+        next_feeding_time = end_time + timedelta(hours=interval_hours)
+
+        if notify:
+            notify(log, next_feeding_time)
+    return log, next_feeding_time
 
 
 async def registrar_lactancia(
-    profile_id, start_time, end_time, reporter_user, observation=""
+    profile_id, start_time, end_time, reporter_user, observation="", notify=None
 ):
     """
     1. Guarda el registro.
-    2. Calcula la próxima toma sumando el intervalo global a la hora de FIN.
+    2. Calcula la próxima toma sumando el intervalo de la familia a la hora de FIN.
     """
-    profile = await sync_to_async(Profile.objects.get)(id=profile_id)
-
-    # 1. Guardar Log
-    log = await sync_to_async(FeedingLog.objects.create)(
-        profile=profile,
-        reporter=reporter_user,
-        start_time=start_time,
-        end_time=end_time,
-        observation=observation,
+    return await db_sync_to_async(_registrar_lactancia_sync)(
+        profile_id, start_time, end_time, reporter_user, observation, notify
     )
-
-    # 2. Calcular Próxima Toma
-    # Obtenemos el intervalo (String "3.0" -> Float 3.0)
-    interval_str = await get_setting(KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL)
-    interval_hours = float(interval_str)
-
-    # La próxima toma se calcula desde que TERMINÓ de comer
-    next_feeding_time = end_time + timedelta(hours=interval_hours)
-
-    return log, next_feeding_time
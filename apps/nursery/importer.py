@@ -0,0 +1,189 @@
+import csv
+import io
+import logging
+from datetime import datetime
+from apps.core_config.db import db_sync_to_async
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from apps.profiles.models import Profile
+from apps.core_config.models import DiaperSize
+from apps.nursery.models import DiaperLog
+from apps.reports import rollups
+
+logger = logging.getLogger("apps.nursery")
+
+# Filas validadas por bloque (cada bloque = una transacción + un aviso de progreso)
+IMPORT_CHUNK_SIZE = 2000
+# Filas por INSERT dentro de cada bloque
+BULK_BATCH_SIZE = 500
+# Cuántos errores detallados guardamos para el reporte
+MAX_ERROR_DETAILS = 20
+
+WASTE_MAP = {
+    "PEE": "PEE",
+    "POO": "POO",
+    "BOTH": "BOTH",
+    "PIPI": "PEE",
+    "PUPU": "POO",
+    "AMBOS": "BOTH",
+}
+
+
+# --- CONSULTAS (Síncronas) ---
+
+
+def _load_lookup_maps(household_id):
+    """Perfiles y tallas de la familia precargados: 2 consultas para todo el archivo"""
+    profiles = {
+        name.lower(): profile_id
+        for profile_id, name in Profile.objects.for_household(household_id).values_list(
+            "id", "name"
+        )
+    }
+    sizes = {
+        label.upper(): label
+        for label in DiaperSize.objects.for_household(household_id).values_list(
+            "label", flat=True
+        )
+    }
+    return profiles, sizes
+
+
+def _save_chunk(logs):
+    """Inserta un bloque completo o nada"""
+    with transaction.atomic():
+        DiaperLog.objects.bulk_create(logs, batch_size=BULK_BATCH_SIZE)
+
+
+# --- VALIDACIÓN (Sin BD) ---
+
+
+# Errores de una fila mal formada (columnas de más o de menos, valores raros)
+ROW_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+
+def _parse_row(row, profiles, sizes, reporter_id, tz):
+    """Convierte una fila del CSV en un DiaperLog sin guardar (o lanza ROW_ERRORS)"""
+    # 1. Perfil
+    profile_name = (row.get("perfil") or "").strip()
+    profile_id = profiles.get(profile_name.lower())
+    if not profile_id:
+        raise ValueError(f"Perfil '{profile_name}' no encontrado.")
+
+    # 2. Fecha y Hora
+    date_str = (row.get("fecha") or "").strip()
+    time_str = (row.get("hora") or "").strip()
+    dt_naive = datetime.strptime(f"{date_str} {time_str}", "%d/%m/%Y %H:%M")
+
+    # 3. Talla y Tipo
+    size_input = (row.get("talla") or "").strip().upper()
+    size_label = sizes.get(size_input)
+    if not size_label:
+        raise ValueError(f"Talla '{size_input}' no registrada.")
+
+    waste_type = WASTE_MAP.get((row.get("tipo") or "").strip().upper(), "PEE")
+    notes = (row.get("notas") or "").strip()
+
+    return DiaperLog(
+        profile_id=profile_id,
+        reporter_id=reporter_id,  # El Owner queda como responsable del histórico
+        time=timezone.make_aware(dt_naive, tz),
+        waste_type=waste_type,
+        size_label=size_label,
+        notes=f"{notes} [Importado]".strip(),
+    )
+
+
+# --- MOTOR DE IMPORTACIÓN ---
+
+
+async def import_diaper_csv(raw_bytes, household_id, reporter_id, on_progress=None):
+    """
+    Importa un historial de pañales leyendo el CSV de forma incremental.
+
+    Args:
+        raw_bytes: Contenido del archivo (bytes / bytearray).
+        household_id: Familia del archivo (solo se aceptan sus perfiles y tallas).
+        reporter_id: ID del TelegramUser que queda como responsable.
+        on_progress: Corrutina opcional on_progress(processed, success, errors)
+            llamada al terminar cada bloque.
+
+    Cada bloque se confirma en su propia transacción. Si uno falla (BD o
+    archivo ilegible) la importación se detiene: lo anterior queda guardado.
+
+    Returns:
+        dict con processed, success, errors, error_details (primeros errores),
+        saved_through (última fila del CSV ya guardada, 0 si ninguna) y
+        aborted (motivo de la detención, o None si terminó).
+    """
+    profiles, sizes = await db_sync_to_async(_load_lookup_maps)(household_id)
+    tz = timezone.get_current_timezone()
+
+    stream = io.TextIOWrapper(io.BytesIO(raw_bytes), encoding="utf-8-sig", newline="")
+    reader = csv.DictReader(stream)
+
+    report = {
+        "processed": 0,
+        "success": 0,
+        "errors": 0,
+        "error_details": [],
+        "saved_through": 0,
+        "aborted": None,
+    }
+    touched_days = set()
+    chunk = []
+    line_no = 0
+
+    async def flush(notify):
+        if chunk:
+            await db_sync_to_async(_save_chunk)(chunk)
+            report["success"] += len(chunk)
+            touched_days.update(
+                (log.profile_id, rollups.local_date(log.time)) for log in chunk
+            )
+            chunk.clear()
+        # Todo hasta esta fila (válida o no) ya está resuelto
+        report["saved_through"] = line_no
+        if notify and on_progress:
+            try:
+                await on_progress(
+                    report["processed"], report["success"], report["errors"]
+                )
+            except Exception as e:
+                # Un aviso fallido (p.ej. límite de Telegram) no detiene la importación
+                logger.warning(
+                    f"No se pudo informar el progreso de la importación: {e}"
+                )
+
+    try:
+        for line_no, row in enumerate(reader, start=1):
+            report["processed"] += 1
+            try:
+                chunk.append(_parse_row(row, profiles, sizes, reporter_id, tz))
+            except ROW_ERRORS as e:
+                report["errors"] += 1
+                if len(report["error_details"]) < MAX_ERROR_DETAILS:
+                    report["error_details"].append(f"Fila {line_no}: {e}")
+
+            if report["processed"] % IMPORT_CHUNK_SIZE == 0:
+                await flush(notify=True)
+
+        # El último bloque no avisa: el llamador muestra el reporte final
+        await flush(notify=False)
+    except (DatabaseError, csv.Error, UnicodeDecodeError) as e:
+        # El bloque en curso no se guardó (su transacción se revirtió)
+        logger.error(
+            f"Importación CSV detenida tras la fila {report['saved_through']}: {e}"
+        )
+        report["aborted"] = str(e)
+    finally:
+        # bulk_create no dispara señales: recalculamos los resúmenes de los
+        # bloques ya guardados, pase lo que pase con el resto
+        if touched_days:
+            await db_sync_to_async(rollups.rebuild_days)(touched_days)
+
+    logger.info(
+        f"Importación CSV: {report['success']} registros, {report['errors']} errores."
+    )
+    return report
@@ -0,0 +1,182 @@
+import logging
+from django.db import transaction
+from django.db.models import Max, Sum
+
+from apps.core_config.db import db_sync_to_async
+from apps.nursery.models import DiaperInventory, InventoryMovement, InventorySnapshot
+
+logger = logging.getLogger("apps.nursery")
+
+# --- LIBRO DE MOVIMIENTOS DE INVENTARIO ---
+# Cada cambio de stock deja un InventoryMovement en la misma transacción que
+# actualiza DiaperInventory.quantity (el saldo materializado que usa el camino
+# rápido). El saldo real es la última foto + los movimientos posteriores; las
+# fotos se toman a diario y al conciliar, así el tramo a sumar se mantiene corto.
+
+# Movimientos leídos por vuelta al conciliar (lectura en streaming)
+RECONCILE_CHUNK_SIZE = 2000
+
+
+def record(size_id, kind, delta, user=None, diaper_log=None, note=""):
+    """Anexa un movimiento (llamar dentro de la transacción que cambia el stock)"""
+    return InventoryMovement.objects.create(
+        size_id=size_id,
+        kind=kind,
+        delta=delta,
+        user=user,
+        diaper_log=diaper_log,
+        note=note,
+    )
+
+
+def _latest_snapshot(size_id):
+    return (
+        InventorySnapshot.objects.filter(size_id=size_id)
+        .order_by("-last_movement_id")
+        .first()
+    )
+
+
+def _movements_after(size_id, movement_id):
+    """(suma, último id) de los movimientos de la talla posteriores a `movement_id`"""
+    totals = InventoryMovement.objects.filter(
+        size_id=size_id, id__gt=movement_id or 0
+    ).aggregate(delta=Sum("delta"), last=Max("id"))
+    return totals["delta"] or 0, totals["last"]
+
+
+def ledger_balance(size_id):
+    """Stock según el libro: última foto + movimientos posteriores (2 consultas)"""
+    snapshot = _latest_snapshot(size_id)
+    base = snapshot.balance if snapshot else 0
+    delta, _ = _movements_after(size_id, snapshot.last_movement_id if snapshot else 0)
+    return base + delta
+
+
+def set_quantity(size, quantity, kind=InventoryMovement.Kind.CORRECTION, **fields):
+    """
+    Lleva el stock de la talla a `quantity` anotando la diferencia en el libro.
+    Retorna el movimiento creado (None si no había nada que corregir).
+    """
+    with transaction.atomic():
+        inventory, _ = DiaperInventory.objects.select_for_update().get_or_create(
+            size=size, defaults={"quantity": 0}
+        )
+        delta = quantity - inventory.quantity
+        if not delta:
+            return None
+        DiaperInventory.objects.filter(pk=inventory.pk).update(quantity=quantity)
+        return record(size.id, kind, delta, **fields)
+
+
+# --- FOTOS DE SALDO ---
+
+
+def _snapshot_size(size_id):
+    """
+    Foto del saldo de una talla si hubo movimientos desde la última.
+    Bloquea la fila del inventario: todo movimiento actualiza esa fila en su
+    transacción, así que ninguno queda a medio confirmar detrás de la foto.
+    """
+    with transaction.atomic():
+        DiaperInventory.objects.select_for_update().filter(size_id=size_id).first()
+        snapshot = _latest_snapshot(size_id)
+        after = snapshot.last_movement_id if snapshot else 0
+        delta, last_id = _movements_after(size_id, after)
+        if last_id is None:
+            return None
+        return InventorySnapshot.objects.create(
+            size_id=size_id,
+            balance=(snapshot.balance if snapshot else 0) + delta,
+            last_movement_id=last_id,
+        )
+
+
+def take_snapshots():
+    """Una foto por talla con movimientos nuevos; retorna cuántas se tomaron"""
+    size_ids = DiaperInventory.objects.values_list("size_id", flat=True)
+    return sum(1 for size_id in size_ids if _snapshot_size(size_id) is not None)
+
+
+async def snapshot_job(context):
+    """Tarea diaria del JobQueue"""
+    taken = await db_sync_to_async(take_snapshots)()
+    logger.info(f"Inventario: {taken} fotos de saldo tomadas.")
+
+
+# --- CONCILIACIÓN ---
+
+
+def _stream_balances():
+    """
+    Una sola pasada ordenada por (talla, id) sobre todo el libro, sin cargarlo
+    en memoria. Retorna ({size_id: (saldo, último id)}, movimientos leídos).
+    """
+    balances = {}
+    count = 0
+    rows = (
+        InventoryMovement.objects.order_by("size_id", "id")
+        .values_list("size_id", "id", "delta")
+        .iterator(chunk_size=RECONCILE_CHUNK_SIZE)
+    )
+    for size_id, movement_id, delta in rows:
+        balance, _ = balances.get(size_id, (0, None))
+        balances[size_id] = (balance + delta, movement_id)
+        count += 1
+    return balances, count
+
+
+def reconcile(fix=True):
+    """
+    Reconstruye el saldo de cada talla desde el libro, lo compara con
+    DiaperInventory.quantity y (si `fix`) corrige la diferencia y deja una foto
+    nueva. Los movimientos que lleguen durante la pasada se suman al final,
+    con la fila bloqueada.
+
+    Returns:
+        dict con sizes, movements y drift (lista de {label, quantity, ledger}).
+    """
+    balances, count = _stream_balances()
+    report = {"sizes": 0, "movements": count, "drift": []}
+
+    for inventory in DiaperInventory.objects.select_related("size"):
+        size_id = inventory.size_id
+        balance, last_id = balances.get(size_id, (0, None))
+        with transaction.atomic():
+            quantity = (
+                DiaperInventory.objects.select_for_update()
+                .values_list("quantity", flat=True)
+                .get(pk=inventory.pk)
+            )
+            late_delta, late_last = _movements_after(size_id, last_id)
+            balance += late_delta
+            last_id = late_last or last_id
+            report["sizes"] += 1
+
+            if balance != quantity:
+                report["drift"].append(
+                    {
+                        "label": inventory.size.label,
+                        "quantity": quantity,
+                        "ledger": balance,
+                    }
+                )
+                logger.warning(
+                    f"Inventario {inventory.size.label}: stock {quantity} "
+                    f"vs libro {balance}."
+                )
+
+            if not fix:
+                continue
+            if balance != quantity:
+                # quantity no admite negativos: el libro manda, recortado a 0
+                DiaperInventory.objects.filter(pk=inventory.pk).update(
+                    quantity=max(balance, 0)
+                )
+            snapshot = _latest_snapshot(size_id)
+            fresh = snapshot is None or snapshot.last_movement_id != last_id
+            if last_id is not None and fresh:
+                InventorySnapshot.objects.create(
+                    size_id=size_id, balance=balance, last_movement_id=last_id
+                )
+    return report
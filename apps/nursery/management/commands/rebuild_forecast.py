@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.nursery.forecast import rebuild_forecasts
+
+
+class Command(BaseCommand):
+    help = "Recalcula el pronóstico de consumo de pañales desde los registros"
+
+    def handle(self, *args, **options):
+        sizes = rebuild_forecasts()
+        self.stdout.write(self.style.SUCCESS(f"✅ {sizes} tallas recalculadas."))
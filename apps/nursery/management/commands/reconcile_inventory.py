@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.nursery.ledger import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye el stock de pañales desde el libro de movimientos "
+        "(una pasada) y corrige las diferencias"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reportar diferencias, sin corregir ni tomar fotos",
+        )
+
+    def handle(self, *args, **options):
+        report = reconcile(fix=not options["dry_run"])
+        for row in report["drift"]:
+            self.stdout.write(
+                f"⚠️ Talla {row['label']}: stock {row['quantity']} → libro {row['ledger']}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✅ {report['sizes']} tallas, {report['movements']} movimientos, "
+                f"{len(report['drift'])} diferencias."
+            )
+        )
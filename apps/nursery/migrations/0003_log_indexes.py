@@ -0,0 +1,25 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nursery', '0002_feedinglog'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diaperlog',
+            index=models.Index(fields=['profile', 'time'], name='nursery_diaper_prof_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedinglog',
+            index=models.Index(fields=['profile', 'start_time'], name='nursery_feed_prof_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedinglog',
+            index=models.Index(fields=['profile', '-end_time'], name='nursery_feed_prof_end_idx'),
+        ),
+    ]
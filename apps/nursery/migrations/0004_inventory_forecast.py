@@ -0,0 +1,28 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nursery', '0003_log_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diaperinventory',
+            name='daily_rate',
+            field=models.FloatField(blank=True, null=True, verbose_name='Consumo Diario (promedio)'),
+        ),
+        migrations.AddField(
+            model_name='diaperinventory',
+            name='rate_day',
+            field=models.DateField(blank=True, null=True, verbose_name='Día en curso'),
+        ),
+        migrations.AddField(
+            model_name='diaperinventory',
+            name='rate_day_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Cambios del día en curso'),
+        ),
+    ]
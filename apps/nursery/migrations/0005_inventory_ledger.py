@@ -0,0 +1,53 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('core_config', '0001_initial'),
+        ('nursery', '0004_inventory_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RESTOCK', 'Recarga 📦'), ('USAGE', 'Uso 👶'), ('CORRECTION', 'Corrección ✏️'), ('IMPORT', 'Importación 📥')], max_length=12, verbose_name='Tipo')),
+                ('delta', models.IntegerField(verbose_name='Variación')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='Nota')),
+                ('diaper_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='movements', to='nursery.diaperlog', verbose_name='Cambio de pañal')),
+                ('size', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='core_config.diapersize', verbose_name='Talla')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='users.telegramuser', verbose_name='Quién')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Inventario',
+                'verbose_name_plural': 'Movimientos de Inventario',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('balance', models.IntegerField(verbose_name='Saldo')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_movement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='nursery.inventorymovement', verbose_name='Hasta el movimiento')),
+                ('size', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='core_config.diapersize', verbose_name='Talla')),
+            ],
+            options={
+                'verbose_name': 'Foto de Inventario',
+                'verbose_name_plural': 'Fotos de Inventario',
+                'indexes': [models.Index(fields=['size', '-last_movement'], name='nursery_snap_size_last_idx')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventorymovement',
+            index=models.Index(fields=['size', 'id'], name='nursery_mov_size_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.28 on 2026-10-17 23:05
+
+from django.db import migrations
+
+
+def opening_balance(apps, schema_editor):
+    """El stock actual entra al libro como saldo inicial (movimiento + foto)"""
+    DiaperInventory = apps.get_model('nursery', 'DiaperInventory')
+    InventoryMovement = apps.get_model('nursery', 'InventoryMovement')
+    InventorySnapshot = apps.get_model('nursery', 'InventorySnapshot')
+
+    for inventory in DiaperInventory.objects.filter(quantity__gt=0):
+        movement = InventoryMovement.objects.create(
+            size_id=inventory.size_id,
+            kind='CORRECTION',
+            delta=inventory.quantity,
+            note='Saldo inicial',
+        )
+        InventorySnapshot.objects.create(
+            size_id=inventory.size_id,
+            balance=inventory.quantity,
+            last_movement=movement,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nursery', '0005_inventory_ledger'),
+    ]
+
+    operations = [
+        migrations.RunPython(opening_balance, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.28 on 2026-10-17 23:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def opening_balance_as_correction(apps, schema_editor):
+    """El saldo inicial de 0006 pasa a ser una corrección (ya no hay tipo IMPORT)"""
+    InventoryMovement = apps.get_model('nursery', 'InventoryMovement')
+    InventoryMovement.objects.filter(kind='IMPORT').update(kind='CORRECTION')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nursery', '0006_opening_balance'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventorymovement',
+            name='kind',
+            field=models.CharField(choices=[('RESTOCK', 'Recarga 📦'), ('USAGE', 'Uso 👶'), ('CORRECTION', 'Corrección ✏️')], max_length=12, verbose_name='Tipo'),
+        ),
+        migrations.AlterField(
+            model_name='inventorysnapshot',
+            name='last_movement',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='nursery.inventorymovement', verbose_name='Hasta el movimiento'),
+        ),
+        migrations.RunPython(opening_balance_as_correction, migrations.RunPython.noop),
+    ]
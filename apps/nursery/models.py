@@ -1,4 +1,6 @@
 from django.db import models
+from django.utils import timezone
+from apps.households.managers import TenantManager
 from apps.profiles.models import Profile
 from apps.users.models import TelegramUser
 from apps.core_config.models import DiaperSize
@@ -15,10 +17,114 @@ class DiaperInventory(models.Model):
     )
     last_restock = models.DateTimeField(auto_now=True, verbose_name="Última Recarga")
 
+    # Pronóstico de consumo (apps.nursery.forecast): EWMA de días cerrados + día abierto
+    daily_rate = models.FloatField(
+        null=True, blank=True, verbose_name="Consumo Diario (promedio)"
+    )
+    rate_day = models.DateField(null=True, blank=True, verbose_name="Día en curso")
+    rate_day_count = models.PositiveIntegerField(
+        default=0, verbose_name="Cambios del día en curso"
+    )
+
+    household_lookup = "size__household"
+    objects = TenantManager()
+
     def __str__(self):
         return f"Talla {self.size.label}: {self.quantity} pañales"
 
 
+class InventoryMovement(models.Model):
+    """
+    Libro de movimientos de inventario (solo anexado). El stock de una talla es
+    la última foto (InventorySnapshot) + la suma de los movimientos posteriores.
+    """
+
+    class Kind(models.TextChoices):
+        RESTOCK = "RESTOCK", "Recarga 📦"
+        USAGE = "USAGE", "Uso 👶"
+        CORRECTION = "CORRECTION", "Corrección ✏️"
+
+    size = models.ForeignKey(
+        DiaperSize,
+        on_delete=models.CASCADE,
+        related_name="movements",
+        verbose_name="Talla",
+    )
+    kind = models.CharField(max_length=12, choices=Kind.choices, verbose_name="Tipo")
+    delta = models.IntegerField(verbose_name="Variación")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+    user = models.ForeignKey(
+        TelegramUser,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="Quién",
+    )
+    diaper_log = models.ForeignKey(
+        "DiaperLog",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="movements",
+        verbose_name="Cambio de pañal",
+    )
+    note = models.CharField(max_length=255, blank=True, verbose_name="Nota")
+
+    class Meta:
+        verbose_name = "Movimiento de Inventario"
+        verbose_name_plural = "Movimientos de Inventario"
+        indexes = [
+            # Saldo: WHERE size_id = ? AND id > <última foto>
+            models.Index(fields=["size", "id"], name="nursery_mov_size_id_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Los movimientos de inventario no se modifican.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Los movimientos de inventario no se borran.")
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.delta:+d} ({self.size.label})"
+
+
+class InventorySnapshot(models.Model):
+    """Saldo de una talla acumulado hasta `last_movement` (inclusive)"""
+
+    size = models.ForeignKey(
+        DiaperSize,
+        on_delete=models.CASCADE,
+        related_name="snapshots",
+        verbose_name="Talla",
+    )
+    balance = models.IntegerField(verbose_name="Saldo")
+    last_movement = models.ForeignKey(
+        InventoryMovement,
+        # Al borrar una talla sus movimientos se van en cascada: la foto también
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Hasta el movimiento",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Foto de Inventario"
+        verbose_name_plural = "Fotos de Inventario"
+        indexes = [
+            # Última foto: WHERE size_id = ? ORDER BY last_movement_id DESC
+            models.Index(
+                fields=["size", "-last_movement"], name="nursery_snap_size_last_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Talla {self.size.label}: {self.balance} @ {self.last_movement_id}"
+
+
 class DiaperLog(models.Model):
     """Bitácora histórica de cambios de pañal"""
 
@@ -40,6 +146,14 @@ class DiaperLog(models.Model):
     )  # Guardamos texto por si borran la talla en el futuro
     notes = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Resumen del día: WHERE profile_id = ? AND time >= ? AND time < ?
+            models.Index(
+                fields=["profile", "time"], name="nursery_diaper_prof_time_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.profile.name} - {self.get_waste_type_display()} ({self.time.strftime('%H:%M')})"
 
@@ -79,6 +193,16 @@ class FeedingLog(models.Model):
     class Meta:
         ordering = ["-end_time"]
         verbose_name = "Registro de Lactancia"
+        indexes = [
+            # Resumen del día: WHERE profile_id = ? AND start_time >= ? AND start_time < ?
+            models.Index(
+                fields=["profile", "start_time"], name="nursery_feed_prof_start_idx"
+            ),
+            # Última toma ("¿Qué Sigue?"): WHERE profile_id = ? ORDER BY end_time DESC
+            models.Index(
+                fields=["profile", "-end_time"], name="nursery_feed_prof_end_idx"
+            ),
+        ]
 
     @property
     def duration_minutes(self):
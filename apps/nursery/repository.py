@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.core_config.db import db_sync_to_async
+from apps.core_config.models import DiaperSize
+from apps.nursery import ledger
+from apps.nursery.forecast import forecast_for
+from apps.nursery.models import DiaperInventory, InventoryMovement
+
+# Acceso a datos de pañales/tallas: cada función async = un solo salto al pool de BD
+
+
+def _add_stock(household_id, size_label, quantity, user=None):
+    """Suma atómica al inventario de la talla (y al libro); retorna el total resultante"""
+    with transaction.atomic():
+        size = DiaperSize.objects.get(household_id=household_id, label=size_label)
+        inventory, _ = DiaperInventory.objects.get_or_create(
+            size=size, defaults={"quantity": 0}
+        )
+        DiaperInventory.objects.filter(pk=inventory.pk).update(
+            quantity=F("quantity") + quantity
+        )
+        ledger.record(size.id, InventoryMovement.Kind.RESTOCK, quantity, user=user)
+        inventory.refresh_from_db(fields=["quantity"])
+    return inventory.quantity
+
+
+def _toggle_size(household_id, size_id):
+    with transaction.atomic():
+        size = (
+            DiaperSize.objects.for_household(household_id)
+            .select_for_update()
+            .get(id=size_id)
+        )
+        # Invertir estado
+        size.is_active = not size.is_active
+        size.save(update_fields=["is_active"])
+    return size
+
+
+def _create_size_if_missing(household_id, label, **fields):
+    """Retorna (size, created); no duplica etiquetas existentes en la familia"""
+    return DiaperSize.objects.get_or_create(
+        household_id=household_id, label=label, defaults=fields
+    )
+
+
+def _list_forecasts(household_id):
+    today = timezone.localdate()
+    inventories = (
+        DiaperInventory.objects.for_household(household_id)
+        .filter(size__is_active=True)
+        .select_related("size")
+        .order_by("size__order")
+    )
+    return [forecast_for(inventory, today) for inventory in inventories]
+
+
+async def list_sizes(household_id, active_only=False):
+    qs = DiaperSize.objects.for_household(household_id)
+    if active_only:
+        qs = qs.filter(is_active=True)
+    return await db_sync_to_async(list)(qs.order_by("order"))
+
+
+async def add_stock(household_id, size_label, quantity, user=None):
+    return await db_sync_to_async(_add_stock)(household_id, size_label, quantity, user)
+
+
+async def list_forecasts(household_id):
+    """Pronóstico (stock, consumo diario, agotamiento) de las tallas activas"""
+    return await db_sync_to_async(_list_forecasts)(household_id)
+
+
+async def toggle_size(household_id, size_id):
+    """Lanza DiaperSize.DoesNotExist si no existe (o es de otra familia)"""
+    return await db_sync_to_async(_toggle_size)(household_id, size_id)
+
+
+async def create_size_if_missing(household_id, label, **fields):
+    return await db_sync_to_async(_create_size_if_missing)(
+        household_id, label, **fields
+    )
@@ -1,3 +1,245 @@
-from django.test import TestCase
+import threading
+from datetime import date, timedelta
+from unittest import mock
+from django.db import OperationalError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from telegram.error import NetworkError
 
-# Create your tests here.
+from apps.core_config.models import DiaperSize
+from apps.households.models import Household
+from apps.nursery import forecast, importer, ledger
+from apps.nursery.business import _descontar_inventario, _registrar_uso_panal_sync
+from apps.nursery.models import (
+    DiaperInventory,
+    DiaperLog,
+    InventoryMovement,
+    InventorySnapshot,
+)
+from apps.nursery.repository import _add_stock
+from apps.profiles.models import Profile
+from apps.reports.models import DailyRollup
+from apps.users.models import TelegramUser
+
+
+class ForecastTests(SimpleTestCase):
+    """El estado incremental debe coincidir con la EWMA de los días cerrados"""
+
+    def test_incremental_matches_daily_ewma(self):
+        start = date(2025, 1, 1)
+        daily_counts = [6, 8, 0, 7]  # el tercer día sin cambios
+        state = (None, None, 0)
+        for offset, count in enumerate(daily_counts):
+            for _ in range(count):
+                state = forecast.advance(*state, start + timedelta(days=offset))
+
+        expected = float(daily_counts[0])
+        for count in daily_counts[1:]:
+            expected = (
+                forecast.FORECAST_ALPHA * count
+                + (1 - forecast.FORECAST_ALPHA) * expected
+            )
+        today = start + timedelta(days=len(daily_counts))
+        self.assertAlmostEqual(forecast.current_rate(*state, today), expected)
+
+    def test_first_day_estimate_and_no_data(self):
+        day = date(2025, 1, 1)
+        self.assertIsNone(forecast.current_rate(None, None, 0, day))
+        self.assertEqual(forecast.current_rate(None, day, 4, day), 4.0)
+        self.assertIsNone(forecast.days_until_empty(20, None))
+        self.assertEqual(forecast.days_until_empty(20, 4.0), 5.0)
+
+    def test_backdated_event_counts_toward_open_day(self):
+        day = date(2025, 1, 2)
+        state = forecast.advance(5.0, day, 3, day - timedelta(days=1))
+        self.assertEqual(state, (5.0, day, 4))
+
+
+class InventoryLedgerTests(TestCase):
+    """El stock materializado y el libro (foto + movimientos) deben coincidir"""
+
+    def setUp(self):
+        self.household = Household.objects.create(name="Casa")
+        self.size = DiaperSize.objects.create(household=self.household, label="P")
+        self.profile = Profile.objects.create(
+            household=self.household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        self.user = TelegramUser.objects.create(
+            household=self.household, telegram_id=1000
+        )
+
+    def use(self, times):
+        for _ in range(times):
+            _registrar_uso_panal_sync(
+                self.profile.id, "P", "PEE", self.user, timezone.now()
+            )
+
+    def quantity(self):
+        return DiaperInventory.objects.get(size=self.size).quantity
+
+    def test_balance_is_snapshot_plus_delta(self):
+        _add_stock(self.household.id, "P", 10)
+        self.use(3)
+        self.assertEqual(ledger.take_snapshots(), 1)
+        self.use(2)
+        _add_stock(self.household.id, "P", 5)
+
+        self.assertEqual(self.quantity(), 10)
+        self.assertEqual(ledger.ledger_balance(self.size.id), 10)
+        # Sin movimientos nuevos no hay foto nueva
+        ledger.take_snapshots()
+        self.assertEqual(ledger.take_snapshots(), 0)
+
+    def test_usage_without_stock_is_not_a_movement(self):
+        _add_stock(self.household.id, "P", 1)
+        self.use(2)
+        self.assertEqual(self.quantity(), 0)
+        self.assertEqual(ledger.ledger_balance(self.size.id), 0)
+
+    def test_reconcile_fixes_drift(self):
+        _add_stock(self.household.id, "P", 8)
+        self.use(1)
+        DiaperInventory.objects.filter(size=self.size).update(quantity=50)
+
+        report = ledger.reconcile(fix=False)
+        self.assertEqual(report["drift"], [{"label": "P", "quantity": 50, "ledger": 7}])
+        self.assertEqual(self.quantity(), 50)
+
+        ledger.reconcile()
+        self.assertEqual(self.quantity(), 7)
+        self.assertEqual(ledger.reconcile()["drift"], [])
+        snapshot = InventorySnapshot.objects.get(size=self.size)
+        self.assertEqual(snapshot.balance, 7)
+
+    def test_stocked_size_and_household_can_be_deleted(self):
+        _add_stock(self.household.id, "P", 4)
+        self.use(1)
+        ledger.take_snapshots()
+
+        self.size.delete()
+        self.assertFalse(InventorySnapshot.objects.exists())
+        self.assertFalse(InventoryMovement.objects.exists())
+
+        size = DiaperSize.objects.create(household=self.household, label="M")
+        _add_stock(self.household.id, "M", 2)
+        ledger.take_snapshots()
+        self.household.delete()
+        self.assertFalse(DiaperSize.objects.filter(pk=size.pk).exists())
+        self.assertFalse(InventorySnapshot.objects.exists())
+
+
+class DiaperImportTests(TestCase):
+    """Filas malas se cuentan como error; un fallo de BD dice hasta dónde se guardó"""
+
+    def setUp(self):
+        self.household = Household.objects.create(name="Casa")
+        DiaperSize.objects.create(household=self.household, label="P")
+        Profile.objects.create(
+            household=self.household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        self.user = TelegramUser.objects.create(
+            household=self.household, telegram_id=1000
+        )
+
+    def csv(self, rows):
+        lines = ["perfil,fecha,hora,talla,tipo"] + rows
+        return "\n".join(lines).encode()
+
+    def run_import(self, raw):
+        return importer.import_diaper_csv(raw, self.household.id, self.user.pk)
+
+    async def test_malformed_rows_are_errors(self):
+        raw = self.csv(["Bebé,01/02/2025,08:00,P,pipi", "Bebé,01/02/2025", "x"])
+        result = await self.run_import(raw)
+
+        self.assertEqual((result["success"], result["errors"]), (1, 2))
+        self.assertIsNone(result["aborted"])
+        self.assertEqual(result["saved_through"], 3)
+
+    async def test_database_failure_reports_saved_rows(self):
+        raw = self.csv([f"Bebé,0{d}/02/2025,08:00,P,pipi" for d in range(1, 6)])
+        save = importer._save_chunk
+        calls = []
+
+        def failing_save(logs):
+            calls.append(len(logs))
+            if len(calls) == 2:
+                raise OperationalError("database is locked")
+            save(logs)
+
+        with mock.patch.object(importer, "IMPORT_CHUNK_SIZE", 2), mock.patch.object(
+            importer, "_save_chunk", failing_save
+        ):
+            result = await self.run_import(raw)
+
+        self.assertEqual(result["aborted"], "database is locked")
+        self.assertEqual((result["success"], result["saved_through"]), (2, 2))
+        self.assertEqual(await DiaperLog.objects.acount(), 2)
+
+    async def test_progress_failure_does_not_stop_the_import(self):
+        raw = self.csv([f"Bebé,0{d}/02/2025,08:00,P,pipi" for d in range(1, 6)])
+
+        async def failing_progress(processed, success, errors):
+            raise NetworkError("timed out")
+
+        with mock.patch.object(importer, "IMPORT_CHUNK_SIZE", 2):
+            result = await importer.import_diaper_csv(
+                raw, self.household.id, self.user.pk, on_progress=failing_progress
+            )
+
+        self.assertIsNone(result["aborted"])
+        self.assertEqual(result["success"], 5)
+        # Los resúmenes diarios incluyen todo lo importado
+        self.assertEqual(await DailyRollup.objects.acount(), 5)
+
+
+class ConcurrentUsageTests(TransactionTestCase):
+    """Taps simultáneos: ningún descuento se pierde y el stock no baja de 0"""
+
+    def setUp(self):
+        self.household = Household.objects.create(name="Casa")
+        self.size = DiaperSize.objects.create(household=self.household, label="P")
+        _add_stock(self.household.id, "P", 5)
+
+    def tap_concurrently(self, taps):
+        barrier = threading.Barrier(taps)
+        results = []
+
+        def tap():
+            try:
+                barrier.wait()
+                while True:
+                    try:
+                        with transaction.atomic():
+                            row = _descontar_inventario(self.household.id, "P")
+                        break
+                    except OperationalError as e:
+                        # La BD de pruebas de SQLite (memoria compartida) no espera
+                        # al lock como el archivo real: reintentamos como su busy timeout
+                        if "locked" not in str(e):
+                            raise
+                results.append(row)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=tap) for _ in range(taps)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_no_lost_updates(self):
+        results = self.tap_concurrently(4)
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(DiaperInventory.objects.get(size=self.size).quantity, 1)
+        # Cada tap ve un stock distinto: ninguno leyó un valor viejo
+        self.assertCountEqual([row["quantity"] for row in results], [4, 3, 2, 1])
+
+    def test_stock_never_goes_below_zero(self):
+        results = self.tap_concurrently(8)
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(DiaperInventory.objects.get(size=self.size).quantity, 0)
+        self.assertEqual(sum(row is not None for row in results), 5)
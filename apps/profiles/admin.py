@@ -4,4 +4,5 @@ from .models import Profile
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ("name", "profile_type", "birth_date", "created_at")
+    list_display = ("name", "household", "profile_type", "birth_date", "created_at")
+    list_filter = ("household", "profile_type")
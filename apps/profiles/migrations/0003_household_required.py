@@ -0,0 +1,24 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('households', '0002_default_household'),
+        ('profiles', '0002_household'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='household',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to='households.household', verbose_name='Familia'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['household', 'profile_type'], name='profiles_household_type_idx'),
+        ),
+    ]
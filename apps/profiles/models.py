@@ -1,4 +1,6 @@
 from django.db import models
+from apps.households.managers import TenantManager
+from apps.households.models import Household
 
 
 class Profile(models.Model):
@@ -6,6 +8,12 @@ class Profile(models.Model):
         BABY = "BABY", "Bebé"
         ADULT = "ADULT", "Adulto"
 
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        related_name="profiles",
+        verbose_name="Familia",
+    )
     name = models.CharField(max_length=100, verbose_name="Nombre del Perfil")
     profile_type = models.CharField(
         max_length=10,
@@ -24,6 +32,14 @@ class Profile(models.Model):
     def __str__(self):
         return f"{self.name} ({self.get_profile_type_display()})"
 
+    objects = TenantManager()
+
     class Meta:
         verbose_name = "Perfil (Paciente)"
         verbose_name_plural = "Perfiles"
+        indexes = [
+            # Menús: WHERE household_id = ? [AND profile_type = 'BABY']
+            models.Index(
+                fields=["household", "profile_type"], name="profiles_household_type_idx"
+            ),
+        ]
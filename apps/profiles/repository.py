@@ -0,0 +1,33 @@
+from apps.core_config.db import db_sync_to_async
+from apps.profiles.models import Profile
+
+# Acceso a datos de perfiles: cada función async = un solo salto al pool de BD
+
+
+async def list_profiles(household_id):
+    return await db_sync_to_async(list)(Profile.objects.for_household(household_id))
+
+
+async def list_babies(household_id):
+    return await db_sync_to_async(list)(
+        Profile.objects.for_household(household_id).filter(
+            profile_type=Profile.ProfileType.BABY
+        )
+    )
+
+
+async def get_profile(household_id, profile_id):
+    """Lanza Profile.DoesNotExist si no existe o es de otra familia"""
+    return await db_sync_to_async(Profile.objects.for_household(household_id).get)(
+        id=profile_id
+    )
+
+
+async def count_profiles(household_id):
+    return await db_sync_to_async(Profile.objects.for_household(household_id).count)()
+
+
+async def create_profile(household_id, **fields):
+    return await db_sync_to_async(Profile.objects.create)(
+        household_id=household_id, **fields
+    )
@@ -1,3 +1,16 @@
 from django.contrib import admin
+from .models import DailyRollup
 
-# Register your models here.
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "profile",
+        "date",
+        "diapers_total",
+        "pee",
+        "poo",
+        "feedings",
+        "feeding_seconds",
+        "meds_count",
+    )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReportsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.reports"
+
+    def ready(self):
+        # Mantenimiento incremental de DailyRollup
+        from apps.reports import signals  # noqa: F401
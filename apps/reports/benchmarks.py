@@ -0,0 +1,266 @@
+import asyncio
+import contextlib
+import io
+import json
+from datetime import date, timedelta
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core_config.models import DiaperSize
+from apps.health.models import Appointment, MedicationLog, Treatment
+from apps.health.utils import calculate_next_dose_time, check_daily_alerts
+from apps.households.models import Household
+from apps.nursery.business import registrar_lactancia, registrar_uso_panal
+from apps.nursery.models import DiaperInventory, DiaperLog, FeedingLog
+from apps.profiles.models import Profile
+from apps.reports import rollups
+from apps.reports.business import get_day_summary, get_what_is_next
+from apps.telegram_bot import metrics
+from apps.users.models import TelegramUser
+
+# --- MICRO-BENCHMARKS ---
+# Historias sintéticas de tamaño configurable sobre una BD desechable; cada
+# función se mide `repeat` veces (tiempo y consultas ORM) y se compara contra
+# una línea base guardada en JSON.
+
+DEFAULT_PARAMS = {"days": 30, "events_per_day": 12, "treatments": 3, "profiles": 2}
+DEFAULT_REPEAT = 50
+# Se marca regresión si el p50 empeora más de este porcentaje...
+DEFAULT_TOLERANCE = 0.5
+# ...y además por más de estos ms (evita ruido en funciones de microsegundos)
+MIN_REGRESSION_MS = 1.0
+
+BENCH_USER_ID = 6_999_999_999
+BENCH_HOUSEHOLD_NAME = "Benchmark"
+BENCH_SIZE_LABEL = "P"
+BENCH_STOCK = 1_000_000
+
+
+def seed_history(days, events_per_day, treatments, profiles):
+    """
+    Crea `profiles` bebés con `days` días de historia: `events_per_day` cambios
+    de pañal y tomas por día, `treatments` tratamientos con todas sus dosis y
+    citas en las ventanas que revisa check_daily_alerts (hoy, mañana, 7 días).
+    """
+    now = timezone.now()
+    step = timedelta(days=1) / events_per_day
+    waste_types = ["PEE", "POO", "BOTH"]
+
+    with transaction.atomic():
+        household = Household.objects.create(name=BENCH_HOUSEHOLD_NAME)
+        user, _ = TelegramUser.objects.get_or_create(
+            telegram_id=BENCH_USER_ID,
+            defaults={
+                "household": household,
+                "first_name": "Benchmark",
+                "role": TelegramUser.Role.OWNER,
+            },
+        )
+        size, _ = DiaperSize.objects.get_or_create(
+            household=household, label=BENCH_SIZE_LABEL
+        )
+        DiaperInventory.objects.update_or_create(
+            size=size, defaults={"quantity": BENCH_STOCK}
+        )
+
+        babies = []
+        for p in range(profiles):
+            baby = Profile.objects.create(
+                household=household,
+                name=f"Bebé {p + 1}",
+                profile_type=Profile.ProfileType.BABY,
+                birth_date=date.today() - timedelta(days=days + 30),
+            )
+            babies.append(baby)
+
+            moments = [now - step * j for j in range(1, days * events_per_day + 1)]
+            DiaperLog.objects.bulk_create(
+                DiaperLog(
+                    profile=baby,
+                    reporter=user,
+                    time=moment,
+                    waste_type=waste_types[j % 3],
+                    size_label=BENCH_SIZE_LABEL,
+                )
+                for j, moment in enumerate(moments)
+            )
+            FeedingLog.objects.bulk_create(
+                FeedingLog(
+                    profile=baby,
+                    reporter=user,
+                    start_time=moment - step / 2,
+                    end_time=moment - step / 2 + timedelta(minutes=20),
+                )
+                for moment in moments
+            )
+
+            for t in range(treatments):
+                start = now - timedelta(days=days)
+                treatment = Treatment.objects.create(
+                    profile=baby,
+                    medicine_name=f"Medicina {t + 1}",
+                    dose="5ml",
+                    frequency_hours=8,
+                    start_date=start,
+                    duration_days=days + 10,
+                    created_by=user,
+                )
+                doses = int((now - start) / timedelta(hours=8))
+                MedicationLog.objects.bulk_create(
+                    MedicationLog(
+                        treatment=treatment,
+                        administered_at=start + timedelta(hours=8 * k),
+                        administered_by=user,
+                    )
+                    for k in range(1, doses + 1)
+                )
+
+            for offset in (0, 1, 7):
+                Appointment.objects.create(
+                    profile=baby,
+                    date=now + timedelta(days=offset, minutes=5),
+                    specialist="Pediatra",
+                )
+
+    # bulk_create no dispara las señales: los resúmenes diarios se rehacen aquí
+    rollups.rebuild_all()
+
+    treatment = Treatment.objects.filter(profile=babies[0]).first()
+    last_dose = (
+        MedicationLog.objects.filter(treatment=treatment)
+        .order_by("-administered_at")
+        .values_list("administered_at", flat=True)
+        .first()
+        if treatment
+        else None
+    )
+    return {
+        "user": user,
+        "baby": babies[0],
+        "treatment": treatment,
+        "last_dose": last_dose,
+    }
+
+
+def _benchmarks(ctx):
+    """Nombre -> fábrica de corrutinas (una llamada por iteración)"""
+    baby, user = ctx["baby"], ctx["user"]
+
+    async def next_dose():
+        return calculate_next_dose_time(ctx["treatment"], ctx["last_dose"])
+
+    async def lactation():
+        end = timezone.now()
+        return await registrar_lactancia(
+            baby.id, end - timedelta(minutes=20), end, user
+        )
+
+    benches = {
+        "registrar_uso_panal": lambda: registrar_uso_panal(
+            baby.id, BENCH_SIZE_LABEL, "PEE", user
+        ),
+        "registrar_lactancia": lactation,
+        "get_day_summary": lambda: get_day_summary(baby),
+        "get_what_is_next": lambda: get_what_is_next(baby),
+        "check_daily_alerts": check_daily_alerts,
+    }
+    if ctx["treatment"] is not None:
+        benches["calculate_next_dose_time"] = next_dose
+    return benches
+
+
+async def _run_benchmarks(ctx, repeat):
+    benches = _benchmarks(ctx)
+    # check_daily_alerts imprime líneas de depuración en cada llamada
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Calentamiento: cachés de configuración/usuarios y conexiones abiertas
+        for factory in benches.values():
+            await factory()
+        metrics.reset()
+        for name, factory in benches.items():
+            for _ in range(repeat):
+                async with metrics.track(name):
+                    await factory()
+
+    results = {}
+    for row in metrics.snapshot():
+        if row["name"] not in benches:
+            continue
+        wall, queries = row["wall_ms"], row["queries"]
+        results[row["name"]] = {
+            "p50_ms": round(wall[0.5], 3),
+            "p95_ms": round(wall[0.95], 3),
+            "queries": queries[0.95],
+        }
+    metrics.reset()
+    return results
+
+
+def run_benchmarks(params, repeat=DEFAULT_REPEAT):
+    """Siembra la BD actual y mide. Usar SOLO sobre una BD desechable."""
+    ctx = seed_history(**params)
+    results = asyncio.run(_run_benchmarks(ctx, repeat))
+    return {"params": params, "repeat": repeat, "results": results}
+
+
+# --- LÍNEA BASE ---
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Lista de regresiones (textos). Más consultas que la base siempre cuenta;
+    el tiempo solo si el p50 empeora más que `tolerance` y MIN_REGRESSION_MS.
+    """
+    regressions = []
+    for name, row in report["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        if row["queries"] > base["queries"]:
+            regressions.append(
+                f"{name}: consultas {base['queries']:.0f} → {row['queries']:.0f}"
+            )
+        slower = row["p50_ms"] - base["p50_ms"]
+        if (
+            row["p50_ms"] > base["p50_ms"] * (1 + tolerance)
+            and slower > MIN_REGRESSION_MS
+        ):
+            regressions.append(
+                f"{name}: p50 {base['p50_ms']:.2f} ms → {row['p50_ms']:.2f} ms"
+            )
+    return regressions
+
+
+def format_report(report, baseline=None):
+    """Tabla de texto; con línea base agrega la variación del p50"""
+    lines = [
+        "Parámetros: "
+        + ", ".join(f"{k}={v}" for k, v in report["params"].items())
+        + f", repeat={report['repeat']}",
+        "",
+        f"{'función':<26} {'p50 ms':>9} {'p95 ms':>9} {'consultas':>9} {'Δp50':>7}",
+    ]
+    base_results = baseline["results"] if baseline else {}
+    for name, row in report["results"].items():
+        delta = ""
+        base = base_results.get(name)
+        if base and base["p50_ms"]:
+            delta = f"{(row['p50_ms'] / base['p50_ms'] - 1) * 100:+.0f}%"
+        lines.append(
+            f"{name:<26} {row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} "
+            f"{row['queries']:>9.0f} {delta:>7}"
+        )
+    return "\n".join(lines)
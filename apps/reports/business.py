@@ -1,38 +1,78 @@
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Max, Q, Sum
 from django.utils import timezone
-from asgiref.sync import sync_to_async
+from apps.core_config.db import db_sync_to_async
+from apps.core_config.dates import local_day_range
 
 from apps.profiles.models import Profile
 from apps.nursery.models import DiaperLog, FeedingLog
 from apps.health.models import MedicationLog, Treatment, Appointment
-from apps.health.utils import calculate_next_dose_time
+from apps.health.schedule import DoseSchedule
+from apps.reports.models import DailyRollup
 from apps.core_config.utils import (
-    get_setting,
+    get_float_setting,
     KEY_LACTATION_INTERVAL,
     DEFAULT_LACTATION_INTERVAL,
 )
 
 
+def _day_summary_aggregates(profile, date_obj, is_baby):
+    """Una consulta agregada por modelo: la BD devuelve totales, no filas."""
+    # Rango semiabierto del día local: los índices (perfil, hora) siguen sirviendo
+    start, end = local_day_range(date_obj)
+
+    # Medicinas: una fila por medicamento distinto (nombre + número de dosis)
+    meds_rows = (
+        MedicationLog.objects.filter(
+            treatment__profile=profile,
+            administered_at__gte=start,
+            administered_at__lt=end,
+        )
+        .values("treatment__medicine_name")
+        .annotate(doses=Count("id"))
+        .order_by("treatment__medicine_name")
+    )
+    meds = {row["treatment__medicine_name"]: row["doses"] for row in meds_rows}
+
+    diapers = feedings = None
+    if is_baby:
+        diapers = DiaperLog.objects.filter(
+            profile=profile, time__gte=start, time__lt=end
+        ).aggregate(
+            total=Count("id"),
+            pee=Count("id", filter=Q(waste_type__in=["PEE", "BOTH"])),
+            poo=Count("id", filter=Q(waste_type__in=["POO", "BOTH"])),
+        )
+        feedings = FeedingLog.objects.filter(
+            profile=profile, start_time__gte=start, start_time__lt=end
+        ).aggregate(
+            count=Count("id"),
+            duration=Sum(
+                ExpressionWrapper(
+                    F("end_time") - F("start_time"), output_field=DurationField()
+                )
+            ),
+        )
+
+    return meds, diapers, feedings
+
+
 async def get_day_summary(profile, date_obj=None):
     """Genera el resumen filtrando por tipo de perfil (Adulto vs Bebé)"""
     if not date_obj:
         date_obj = timezone.localtime().date()
 
-    # Datos base (Medicinas aplican a todos)
-    meds = await sync_to_async(list)(
-        MedicationLog.objects.filter(
-            treatment__profile=profile, administered_at__date=date_obj
-        ).select_related("treatment")
+    is_baby = profile.profile_type == Profile.ProfileType.BABY
+    meds, diapers, feedings = await db_sync_to_async(_day_summary_aggregates)(
+        profile, date_obj, is_baby
     )
-    meds_count = len(meds)
-    meds_names = ", ".join(set([m.treatment.medicine_name for m in meds])) or "Ninguna"
 
-    # Estructura base
+    # Estructura base (Medicinas aplican a todos)
     data = {
         "date": date_obj.strftime("%d/%m/%Y"),
-        "is_baby": profile.profile_type == Profile.ProfileType.BABY,
-        "meds_count": meds_count,
-        "meds_names": meds_names,
+        "is_baby": is_baby,
+        "meds_count": sum(meds.values()),
+        "meds_names": ", ".join(meds) or "Ninguna",
         # Valores por defecto para adultos
         "diapers_total": 0,
         "pee": 0,
@@ -41,24 +81,86 @@ async def get_day_summary(profile, date_obj=None):
         "feeding_mins": 0,
     }
 
-    # Si es BEBÉ, calculamos Nursery
-    if data["is_baby"]:
-        # Pañales
-        diapers = await sync_to_async(list)(
-            DiaperLog.objects.filter(profile=profile, time__date=date_obj)
+    # Si es BEBÉ, agregamos Nursery
+    if is_baby:
+        data["diapers_total"] = diapers["total"]
+        data["pee"] = diapers["pee"]
+        data["poo"] = diapers["poo"]
+
+        duration = feedings["duration"]
+        data["feedings"] = feedings["count"]
+        data["feeding_mins"] = int(duration.total_seconds() / 60) if duration else 0
+
+    return data
+
+
+def _range_rollups(profile, start_date, end_date):
+    return DailyRollup.objects.filter(
+        profile=profile, date__gte=start_date, date__lte=end_date
+    ).aggregate(
+        days_with_data=Count("id"),
+        diapers_total=Sum("diapers_total"),
+        pee=Sum("pee"),
+        poo=Sum("poo"),
+        feedings=Sum("feedings"),
+        feeding_seconds=Sum("feeding_seconds"),
+        meds_count=Sum("meds_count"),
+    )
+
+
+async def get_range_summary(profile, start_date, end_date):
+    """
+    Resumen de un rango de días (ambos inclusive) leyendo DailyRollup.
+    El costo depende del número de días, no del volumen de registros.
+    """
+    totals = await db_sync_to_async(_range_rollups)(profile, start_date, end_date)
+    days = (end_date - start_date).days + 1
+
+    data = {
+        "start": start_date.strftime("%d/%m/%Y"),
+        "end": end_date.strftime("%d/%m/%Y"),
+        "days": days,
+        "days_with_data": totals.pop("days_with_data"),
+        "is_baby": profile.profile_type == Profile.ProfileType.BABY,
+    }
+    for key, value in totals.items():
+        data[key] = value or 0
+
+    data["feeding_mins"] = data.pop("feeding_seconds") // 60
+    data["avg_diapers"] = round(data["diapers_total"] / days, 1)
+    data["avg_feedings"] = round(data["feedings"] / days, 1)
+    data["avg_feeding_mins"] = round(data["feeding_mins"] / days, 1)
+    return data
+
+
+def _what_is_next_data(profile, now, is_baby):
+    """
+    Consultas de "¿Qué Sigue?" con costo fijo (no crece con los tratamientos):
+    última toma, tratamientos activos con su última dosis anotada y próximas citas.
+    """
+    last_feed_end = None
+    if is_baby:
+        last_feed_end = (
+            FeedingLog.objects.filter(profile=profile)
+            .order_by("-end_time")
+            .values_list("end_time", flat=True)
+            .first()
         )
-        data["diapers_total"] = len(diapers)
-        data["pee"] = sum(1 for d in diapers if d.waste_type in ["PEE", "BOTH"])
-        data["poo"] = sum(1 for d in diapers if d.waste_type in ["POO", "BOTH"])
 
-        # Lactancia
-        feedings = await sync_to_async(list)(
-            FeedingLog.objects.filter(profile=profile, start_time__date=date_obj)
+    # MAX(administered_at) por tratamiento en la misma consulta (sin N+1)
+    treatments = list(
+        Treatment.objects.filter(profile=profile, is_active=True).annotate(
+            last_administered=Max("logs__administered_at")
         )
-        data["feedings"] = len(feedings)
-        data["feeding_mins"] = sum(f.duration_minutes for f in feedings)
+    )
 
-    return data
+    # Limitamos a las próximas 5 para no saturar
+    appointments = list(
+        Appointment.objects.filter(
+            profile=profile, date__gte=now, is_completed=False
+        ).order_by("date")[:5]
+    )
+    return last_feed_end, treatments, appointments
 
 
 async def get_what_is_next(profile):
@@ -67,20 +169,20 @@ async def get_what_is_next(profile):
     today = now.date()
     events = []
 
-    # 1. LACTANCIA (Solo Bebés)
-    if profile.profile_type == Profile.ProfileType.BABY:
-        last_feed = await sync_to_async(
-            lambda: FeedingLog.objects.filter(profile=profile)
-            .order_by("-end_time")
-            .first()
-        )()
+    is_baby = profile.profile_type == Profile.ProfileType.BABY
 
-        if last_feed:
-            interval_str = await get_setting(
-                KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL
+    # Todo lo que necesita la pantalla en un solo salto al hilo de BD
+    last_feed_end, active_treatments, future_appts = await db_sync_to_async(
+        _what_is_next_data
+    )(profile, now, is_baby)
+
+    # 1. LACTANCIA (Solo Bebés)
+    if is_baby:
+        if last_feed_end:
+            interval_hours = await get_float_setting(
+                profile.household_id, KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL
             )
-            interval_hours = float(interval_str)
-            next_feed_time = last_feed.end_time + timedelta(hours=interval_hours)
+            next_feed_time = last_feed_end + timedelta(hours=interval_hours)
 
             time_str = timezone.localtime(next_feed_time).strftime("%I:%M %p")
             status = "🔴 Atrasada desde:" if next_feed_time < now else "🟢 Toca a las:"
@@ -89,41 +191,27 @@ async def get_what_is_next(profile):
             events.append("🍼 **Lactancia:** Sin registros previos.")
 
     # 2. PRÓXIMAS MEDICINAS (Iterar dosis restantes del día)
-    active_treatments = await sync_to_async(list)(
-        Treatment.objects.filter(profile=profile, is_active=True)
+    end_of_day = timezone.make_aware(
+        datetime.combine(today, time.max), timezone.get_current_timezone()
     )
-
     for t in active_treatments:
-        last_log = await sync_to_async(
-            lambda: t.logs.order_by("-administered_at").first()
-        )()
-        last_time = last_log.administered_at if last_log else None
+        dose_schedule = DoseSchedule.for_treatment(t, t.last_administered)
 
         # Calculamos la siguiente dosis inmediata
-        next_dose = calculate_next_dose_time(t, last_time)
+        next_dose = dose_schedule.next_after(now)
 
         doses_today_str = []
 
         # Proyección de dosis para lo que queda del día
-        temp_dose = next_dose
-        while temp_dose:
-            # Si ya pasó de hoy (mañana), paramos la proyección del día
-            if timezone.localtime(temp_dose).date() > today:
-                break
-
-            time_str = timezone.localtime(temp_dose).strftime("%I:%M %p")
-
-            # Marcador visual
-            if temp_dose < now:
-                doses_today_str.append(f"🔴 {time_str} (Atrasada)")
-            else:
-                doses_today_str.append(f"🟢 {time_str}")
-
-            # Calculamos la siguiente teórica para el loop
-            temp_dose = temp_dose + timedelta(hours=t.frequency_hours)
-            # Validar fin de tratamiento
-            if t.end_date and temp_dose > t.end_date:
-                break
+        if next_dose:
+            for dose_time in dose_schedule.slots_between(next_dose, end_of_day):
+                time_str = timezone.localtime(dose_time).strftime("%I:%M %p")
+
+                # Marcador visual
+                if dose_time < now:
+                    doses_today_str.append(f"🔴 {time_str} (Atrasada)")
+                else:
+                    doses_today_str.append(f"🟢 {time_str}")
 
         if doses_today_str:
             schedule = "\n".join(doses_today_str)
@@ -134,14 +222,6 @@ async def get_what_is_next(profile):
             events.append(f"💊 **{t.medicine_name}:**\nSiguiente: {next_str}")
 
     # 3. PRÓXIMAS CITAS (Lista de pendientes)
-    future_appts = await sync_to_async(list)(
-        Appointment.objects.filter(
-            profile=profile, date__gte=now, is_completed=False
-        ).order_by("date")[
-            :5
-        ]  # Limitamos a las próximas 5 para no saturar
-    )
-
     if future_appts:
         appt_list = []
         for appt in future_appts:
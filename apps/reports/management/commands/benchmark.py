@@ -0,0 +1,100 @@
+import json
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.reports.benchmarks import (
+    DEFAULT_PARAMS,
+    DEFAULT_REPEAT,
+    DEFAULT_TOLERANCE,
+    compare_to_baseline,
+    format_report,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmarks de pañales, lactancia, dosis, resúmenes y alertas "
+        "sobre una BD de prueba con historia sintética (no toca la BD real)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=DEFAULT_PARAMS["days"])
+        parser.add_argument(
+            "--events-per-day", type=int, default=DEFAULT_PARAMS["events_per_day"]
+        )
+        parser.add_argument(
+            "--treatments",
+            type=int,
+            default=DEFAULT_PARAMS["treatments"],
+            help="Tratamientos por perfil",
+        )
+        parser.add_argument("--profiles", type=int, default=DEFAULT_PARAMS["profiles"])
+        parser.add_argument(
+            "--repeat", type=int, default=DEFAULT_REPEAT, help="Llamadas por función"
+        )
+        parser.add_argument(
+            "--baseline",
+            default=str(settings.BASE_DIR / "benchmark_baseline.json"),
+            help="Archivo JSON con la línea base",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Guarda esta corrida como nueva línea base",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=DEFAULT_TOLERANCE,
+            help="Empeoramiento del p50 tolerado (0.5 = 50%%)",
+        )
+        parser.add_argument("--json", action="store_true", help="Reporte en JSON")
+
+    def handle(self, *args, **options):
+        params = {
+            "days": options["days"],
+            "events_per_day": options["events_per_day"],
+            "treatments": options["treatments"],
+            "profiles": options["profiles"],
+        }
+
+        if params["profiles"] < 1 or params["events_per_day"] < 1:
+            raise CommandError("Se necesita al menos un perfil y un evento por día.")
+
+        # BD desechable (la misma que usa `manage.py test`)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            report = run_benchmarks(params, options["repeat"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        baseline = load_baseline(options["baseline"])
+        if baseline and baseline["params"] != params:
+            self.stderr.write("⚠️ La línea base usa otros parámetros; no se compara.")
+            baseline = None
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report, baseline))
+
+        if options["save_baseline"]:
+            save_baseline(report, options["baseline"])
+            self.stdout.write(
+                self.style.SUCCESS(f"💾 Línea base guardada en {options['baseline']}")
+            )
+            return
+
+        if baseline:
+            regressions = compare_to_baseline(report, baseline, options["tolerance"])
+            if regressions:
+                for line in regressions:
+                    self.stderr.write(f"🔺 {line}")
+                raise CommandError(f"{len(regressions)} regresión(es) de rendimiento.")
+            self.stdout.write(self.style.SUCCESS("✅ Sin regresiones."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.reports.rollups import rebuild_all
+
+
+class Command(BaseCommand):
+    help = "Reconstruye los resúmenes diarios (DailyRollup) desde los registros"
+
+    def handle(self, *args, **options):
+        days = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"✅ {days} días reconstruidos."))
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.28 on 2026-10-17 21:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Día')),
+                ('diapers_total', models.PositiveIntegerField(default=0, verbose_name='Pañales')),
+                ('pee', models.PositiveIntegerField(default=0, verbose_name='Pipí')),
+                ('poo', models.PositiveIntegerField(default=0, verbose_name='Popó')),
+                ('feedings', models.PositiveIntegerField(default=0, verbose_name='Tomas')),
+                ('feeding_seconds', models.PositiveIntegerField(default=0, verbose_name='Tiempo de lactancia (s)')),
+                ('meds_count', models.PositiveIntegerField(default=0, verbose_name='Dosis')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='profiles.profile')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario',
+                'verbose_name_plural': 'Resúmenes Diarios',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('profile', 'date'), name='reports_rollup_profile_date_uniq'),
+        ),
+    ]
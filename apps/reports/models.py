@@ -1,3 +1,35 @@
 from django.db import models
+from apps.profiles.models import Profile
 
-# Create your models here.
+
+class DailyRollup(models.Model):
+    """Totales precalculados por perfil y día (base de los reportes por rango)"""
+
+    profile = models.ForeignKey(
+        Profile, on_delete=models.CASCADE, related_name="daily_rollups"
+    )
+    date = models.DateField(verbose_name="Día")
+
+    diapers_total = models.PositiveIntegerField(default=0, verbose_name="Pañales")
+    pee = models.PositiveIntegerField(default=0, verbose_name="Pipí")
+    poo = models.PositiveIntegerField(default=0, verbose_name="Popó")
+    feedings = models.PositiveIntegerField(default=0, verbose_name="Tomas")
+    feeding_seconds = models.PositiveIntegerField(
+        default=0, verbose_name="Tiempo de lactancia (s)"
+    )
+    meds_count = models.PositiveIntegerField(default=0, verbose_name="Dosis")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.profile.name} - {self.date.strftime('%d/%m/%Y')}"
+
+    class Meta:
+        ordering = ["date"]
+        verbose_name = "Resumen Diario"
+        verbose_name_plural = "Resúmenes Diarios"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "date"], name="reports_rollup_profile_date_uniq"
+            ),
+        ]
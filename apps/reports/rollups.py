@@ -0,0 +1,244 @@
+from django.db import transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core_config.dates import local_day_range
+from apps.nursery.models import DiaperLog, FeedingLog
+from apps.health.models import MedicationLog
+from apps.reports.models import DailyRollup
+
+# Campos de conteo que mantiene cada tipo de registro
+ROLLUP_FIELDS = (
+    "diapers_total",
+    "pee",
+    "poo",
+    "feedings",
+    "feeding_seconds",
+    "meds_count",
+)
+
+
+def local_date(dt):
+    return timezone.localtime(dt).date()
+
+
+def _increment(profile_id, date_obj, **deltas):
+    """Suma atómica (F) sobre la fila del día; la crea si no existe"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    rollup, _ = DailyRollup.objects.get_or_create(profile_id=profile_id, date=date_obj)
+    DailyRollup.objects.filter(pk=rollup.pk).update(
+        **{field: F(field) + value for field, value in deltas.items()}
+    )
+
+
+# --- ACTUALIZACIÓN INCREMENTAL (Se llama al crear cada registro) ---
+
+
+def add_diaper(log):
+    _increment(
+        log.profile_id,
+        local_date(log.time),
+        diapers_total=1,
+        pee=1 if log.waste_type in ["PEE", "BOTH"] else 0,
+        poo=1 if log.waste_type in ["POO", "BOTH"] else 0,
+    )
+
+
+def add_feeding(log):
+    seconds = max(int((log.end_time - log.start_time).total_seconds()), 0)
+    _increment(
+        log.profile_id,
+        local_date(log.start_time),
+        feedings=1,
+        feeding_seconds=seconds,
+    )
+
+
+def add_medication(log):
+    _increment(log.treatment.profile_id, local_date(log.administered_at), meds_count=1)
+
+
+# --- RECÁLCULO (Ediciones, borrados, cargas masivas) ---
+
+
+def _seconds(duration):
+    return int(duration.total_seconds()) if duration else 0
+
+
+def _feeding_duration():
+    return Sum(
+        ExpressionWrapper(F("end_time") - F("start_time"), output_field=DurationField())
+    )
+
+
+def _day_totals(profile_id, date_obj):
+    start, end = local_day_range(date_obj)
+    diapers = DiaperLog.objects.filter(
+        profile_id=profile_id, time__gte=start, time__lt=end
+    ).aggregate(
+        diapers_total=Count("id"),
+        pee=Count("id", filter=Q(waste_type__in=["PEE", "BOTH"])),
+        poo=Count("id", filter=Q(waste_type__in=["POO", "BOTH"])),
+    )
+    feedings = FeedingLog.objects.filter(
+        profile_id=profile_id, start_time__gte=start, start_time__lt=end
+    ).aggregate(feedings=Count("id"), duration=_feeding_duration())
+    meds_count = MedicationLog.objects.filter(
+        treatment__profile_id=profile_id,
+        administered_at__gte=start,
+        administered_at__lt=end,
+    ).count()
+
+    return {
+        **diapers,
+        "feedings": feedings["feedings"],
+        "feeding_seconds": _seconds(feedings["duration"]),
+        "meds_count": meds_count,
+    }
+
+
+def rebuild_day(profile_id, date_obj, create=True):
+    """
+    Recalcula un día completo desde los registros crudos.
+    Con create=False solo corrige filas existentes (borrados en cascada del perfil).
+    """
+    with transaction.atomic():
+        # Bloquear antes de leer: un _increment concurrente no se pierde
+        if create:
+            _lock_days(profile_id, {date_obj})
+        elif not (
+            DailyRollup.objects.select_for_update()
+            .filter(profile_id=profile_id, date=date_obj)
+            .exists()
+        ):
+            return
+        DailyRollup.objects.filter(profile_id=profile_id, date=date_obj).update(
+            **_day_totals(profile_id, date_obj)
+        )
+
+
+def _grouped_totals(diapers, feedings, meds):
+    """
+    Totales por (perfil, día) con consultas agrupadas sobre los querysets dados.
+    Retorna {(profile_id, date): {campo: valor}}.
+    """
+    totals = {}
+
+    def merge(rows, **fields):
+        for row in rows:
+            entry = totals.setdefault(
+                (row["profile_id"], row["day"]), dict.fromkeys(ROLLUP_FIELDS, 0)
+            )
+            for field, source in fields.items():
+                entry[field] = source(row) if callable(source) else row[source] or 0
+
+    merge(
+        diapers.annotate(day=TruncDate("time"))
+        .values("profile_id", "day")
+        .annotate(
+            total=Count("id"),
+            pee=Count("id", filter=Q(waste_type__in=["PEE", "BOTH"])),
+            poo=Count("id", filter=Q(waste_type__in=["POO", "BOTH"])),
+        )
+        .order_by(),
+        diapers_total="total",
+        pee="pee",
+        poo="poo",
+    )
+    merge(
+        feedings.annotate(day=TruncDate("start_time"))
+        .values("profile_id", "day")
+        .annotate(count=Count("id"), duration=_feeding_duration())
+        .order_by(),
+        feedings="count",
+        feeding_seconds=lambda row: _seconds(row["duration"]),
+    )
+    merge(
+        meds.annotate(day=TruncDate("administered_at"))
+        .values("day", profile_id=F("treatment__profile_id"))
+        .annotate(count=Count("id"))
+        .order_by(),
+        meds_count="count",
+    )
+    return totals
+
+
+def _lock_days(profile_id, dates):
+    """
+    Filas de los días (creadas en 0 si faltan) bloqueadas para reescribir.
+    Llamar dentro de una transacción: un _increment concurrente espera al
+    bloqueo y suma sobre el valor reescrito, en vez de perderse.
+    """
+    DailyRollup.objects.bulk_create(
+        [DailyRollup(profile_id=profile_id, date=date_obj) for date_obj in dates],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+    # Rango y no date__in: una importación puede tocar miles de días
+    rows = DailyRollup.objects.select_for_update().filter(
+        profile_id=profile_id, date__gte=min(dates), date__lte=max(dates)
+    )
+    return [row for row in rows if row.date in dates]
+
+
+def rebuild_days(days):
+    """
+    Recalcula un conjunto de (profile_id, date) (ej. tras una importación).
+    Una pasada agrupada por perfil sobre el rango de fechas tocado, leída con
+    los días ya bloqueados; las filas se reescriben en su lugar (mismo pk).
+    """
+    by_profile = {}
+    for profile_id, date_obj in set(days):
+        by_profile.setdefault(profile_id, set()).add(date_obj)
+
+    for profile_id, dates in by_profile.items():
+        start, _ = local_day_range(min(dates))
+        _, end = local_day_range(max(dates))
+
+        with transaction.atomic():
+            rows = _lock_days(profile_id, dates)
+            totals = _grouped_totals(
+                DiaperLog.objects.filter(
+                    profile_id=profile_id, time__gte=start, time__lt=end
+                ),
+                FeedingLog.objects.filter(
+                    profile_id=profile_id, start_time__gte=start, start_time__lt=end
+                ),
+                MedicationLog.objects.filter(
+                    treatment__profile_id=profile_id,
+                    administered_at__gte=start,
+                    administered_at__lt=end,
+                ),
+            )
+
+            now = timezone.now()
+            for row in rows:
+                fields = totals.get((profile_id, row.date), {})
+                for field in ROLLUP_FIELDS:
+                    setattr(row, field, fields.get(field, 0))
+                row.updated_at = now
+            DailyRollup.objects.bulk_update(
+                rows, [*ROLLUP_FIELDS, "updated_at"], batch_size=500
+            )
+
+
+def rebuild_all():
+    """
+    Reconstruye todos los resúmenes (días con registros y días ya resumidos).
+    Es un relleno puntual: se corre a mano con `manage.py rebuild_rollups`.
+    Retorna la cantidad de días reescritos.
+    """
+    # Solo para saber qué días tocar; los totales se leen de nuevo con bloqueo
+    days = set(
+        _grouped_totals(
+            DiaperLog.objects.all(),
+            FeedingLog.objects.all(),
+            MedicationLog.objects.all(),
+        )
+    )
+    days.update(DailyRollup.objects.values_list("profile_id", "date"))
+    rebuild_days(days)
+    return len(days)
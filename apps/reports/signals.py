@@ -0,0 +1,92 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.nursery.models import DiaperLog, FeedingLog
+from apps.health.models import MedicationLog
+from apps.reports import rollups
+
+# Altas: suma incremental O(1). Ediciones/borrados: recálculo del día afectado
+# (en una edición, también el día anterior si el registro cambió de día/perfil).
+# (bulk_create no dispara señales: quien lo use debe llamar a rollups.rebuild_days)
+
+# Modelo -> (ruta al perfil, campo de fecha)
+_DAY_FIELDS = {
+    DiaperLog: ("profile_id", "time"),
+    FeedingLog: ("profile_id", "start_time"),
+    MedicationLog: ("treatment__profile_id", "administered_at"),
+}
+
+
+@receiver(pre_save, sender=DiaperLog)
+@receiver(pre_save, sender=FeedingLog)
+@receiver(pre_save, sender=MedicationLog)
+def remember_previous_day(sender, instance, **kwargs):
+    """Antes de una edición: (perfil, día) que tenía el registro en BD"""
+    instance._rollup_previous = None
+    if instance.pk is None:
+        return
+    profile_field, time_field = _DAY_FIELDS[sender]
+    row = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list(profile_field, time_field)
+        .first()
+    )
+    if row:
+        instance._rollup_previous = (row[0], rollups.local_date(row[1]))
+
+
+def _rebuild_edited(instance, profile_id, time):
+    day = (profile_id, rollups.local_date(time))
+    rollups.rebuild_day(*day)
+    previous = getattr(instance, "_rollup_previous", None)
+    if previous and previous != day:
+        rollups.rebuild_day(*previous, create=False)
+
+
+@receiver(post_save, sender=DiaperLog)
+def diaper_saved(sender, instance, created, **kwargs):
+    if created:
+        rollups.add_diaper(instance)
+    else:
+        _rebuild_edited(instance, instance.profile_id, instance.time)
+
+
+@receiver(post_save, sender=FeedingLog)
+def feeding_saved(sender, instance, created, **kwargs):
+    if created:
+        rollups.add_feeding(instance)
+    else:
+        _rebuild_edited(instance, instance.profile_id, instance.start_time)
+
+
+@receiver(post_save, sender=MedicationLog)
+def medication_saved(sender, instance, created, **kwargs):
+    if created:
+        rollups.add_medication(instance)
+    else:
+        _rebuild_edited(
+            instance, instance.treatment.profile_id, instance.administered_at
+        )
+
+
+@receiver(post_delete, sender=DiaperLog)
+def diaper_deleted(sender, instance, **kwargs):
+    rollups.rebuild_day(
+        instance.profile_id, rollups.local_date(instance.time), create=False
+    )
+
+
+@receiver(post_delete, sender=FeedingLog)
+def feeding_deleted(sender, instance, **kwargs):
+    rollups.rebuild_day(
+        instance.profile_id, rollups.local_date(instance.start_time), create=False
+    )
+
+
+@receiver(post_delete, sender=MedicationLog)
+def medication_deleted(sender, instance, **kwargs):
+    rollups.rebuild_day(
+        instance.treatment.profile_id,
+        rollups.local_date(instance.administered_at),
+        create=False,
+    )
@@ -1,3 +1,352 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
 
-# Create your tests here.
+from apps.core_config.dates import local_day_range
+from apps.core_config.utils import (
+    read_float_setting,
+    KEY_LACTATION_INTERVAL,
+    DEFAULT_LACTATION_INTERVAL,
+)
+from apps.health.models import Appointment, MedicationLog, Treatment
+from apps.households.models import Household
+from apps.nursery.models import DiaperLog, FeedingLog
+from apps.profiles.models import Profile
+from apps.reports.benchmarks import compare_to_baseline
+from apps.reports.business import get_day_summary, get_what_is_next
+from apps.reports import rollups
+from apps.reports.models import DailyRollup
+
+
+class WhatIsNextQueryCountTests(TestCase):
+    """La pantalla "¿Qué Sigue?" debe costar lo mismo con 1 o con N tratamientos"""
+
+    # Última toma + tratamientos anotados + próximas citas
+    EXPECTED_QUERIES = 3
+
+    def setUp(self):
+        self.now = timezone.now()
+        household = Household.objects.create(name="Casa")
+        self.profile = Profile.objects.create(
+            household=household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        FeedingLog.objects.create(
+            profile=self.profile,
+            start_time=self.now - timedelta(minutes=30),
+            end_time=self.now - timedelta(minutes=10),
+        )
+        Appointment.objects.create(
+            profile=self.profile,
+            date=self.now + timedelta(days=2),
+            specialist="Pediatra",
+        )
+        # La configuración vive en caché; la precargamos para no contarla
+        read_float_setting(
+            household.id, KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL
+        )
+
+    def _add_treatments(self, count):
+        for i in range(count):
+            treatment = Treatment.objects.create(
+                profile=self.profile,
+                medicine_name=f"Medicina {i}",
+                dose="2ml",
+                frequency_hours=8,
+                start_date=self.now - timedelta(days=1),
+                duration_days=5,
+            )
+            MedicationLog.objects.create(
+                treatment=treatment, administered_at=self.now - timedelta(hours=2)
+            )
+
+    def test_query_count_with_one_treatment(self):
+        self._add_treatments(1)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            events = async_to_sync(get_what_is_next)(self.profile)
+        self.assertEqual(len(events), 3)
+
+    def test_query_count_does_not_grow_with_treatments(self):
+        self._add_treatments(10)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            events = async_to_sync(get_what_is_next)(self.profile)
+        self.assertEqual(sum("💊" in e for e in events), 10)
+
+    def test_last_dose_is_annotated(self):
+        self._add_treatments(1)
+        events = async_to_sync(get_what_is_next)(self.profile)
+        # Última dosis hace 2h y frecuencia 8h: la siguiente es en ~6h
+        expected = timezone.localtime(self.now + timedelta(hours=6))
+        medicine = next(e for e in events if "💊" in e)
+        self.assertIn(expected.strftime("%I:%M %p"), medicine)
+
+
+class RollupEditTests(TestCase):
+    """Mover un registro de día corrige los dos días"""
+
+    def setUp(self):
+        household = Household.objects.create(name="Casa")
+        self.profile = Profile.objects.create(
+            household=household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+
+    def totals(self):
+        return dict(
+            DailyRollup.objects.filter(profile=self.profile).values_list(
+                "date", "diapers_total"
+            )
+        )
+
+    def test_moving_a_log_rebuilds_old_and_new_day(self):
+        now = timezone.localtime()
+        log = DiaperLog.objects.create(
+            profile=self.profile, time=now - timedelta(days=2), waste_type="PEE"
+        )
+        before, after = (now - timedelta(days=2)).date(), (
+            now - timedelta(days=1)
+        ).date()
+        self.assertEqual(self.totals(), {before: 1})
+
+        log.time = now - timedelta(days=1)
+        log.save()
+        self.assertEqual(self.totals(), {before: 0, after: 1})
+
+
+class RollupRebuildTests(TestCase):
+    """El recálculo reescribe las filas en su lugar: un incremento posterior no se pierde"""
+
+    def setUp(self):
+        household = Household.objects.create(name="Casa")
+        self.profile = Profile.objects.create(
+            household=household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        self.day = timezone.localtime() - timedelta(days=1)
+        # bulk_create no dispara señales: el resumen queda desfasado
+        DiaperLog.objects.bulk_create(
+            DiaperLog(profile=self.profile, time=self.day, waste_type="POO")
+            for _ in range(3)
+        )
+
+    def test_rebuild_keeps_row_and_counts_later_increments(self):
+        stale = DailyRollup.objects.create(
+            profile=self.profile, date=self.day.date(), diapers_total=9
+        )
+        rollups.rebuild_days({(self.profile.id, self.day.date())})
+        DiaperLog.objects.create(profile=self.profile, time=self.day, waste_type="PEE")
+
+        rollup = DailyRollup.objects.get(profile=self.profile)
+        self.assertEqual(rollup.pk, stale.pk)
+        self.assertEqual((rollup.diapers_total, rollup.poo, rollup.pee), (4, 3, 1))
+
+    def test_rebuild_all_zeroes_days_without_logs(self):
+        empty_day = self.day.date() - timedelta(days=5)
+        DailyRollup.objects.create(
+            profile=self.profile, date=empty_day, diapers_total=2
+        )
+
+        self.assertEqual(rollups.rebuild_all(), 2)
+        self.assertEqual(
+            dict(
+                DailyRollup.objects.filter(profile=self.profile).values_list(
+                    "date", "diapers_total"
+                )
+            ),
+            {empty_day: 0, self.day.date(): 3},
+        )
+
+
+class DaySummaryBoundaryTests(TestCase):
+    """El día es [00:00, 00:00 del siguiente): la medianoche siguiente no cuenta"""
+
+    def setUp(self):
+        household = Household.objects.create(name="Casa")
+        self.profile = Profile.objects.create(
+            household=household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        self.treatment = Treatment.objects.create(
+            profile=self.profile,
+            medicine_name="Jarabe",
+            dose="2ml",
+            frequency_hours=8,
+            start_date=timezone.now(),
+            duration_days=5,
+        )
+        self.day = date(2025, 5, 1)
+        self.start, self.end = local_day_range(self.day)
+        last = self.end - timedelta(microseconds=1)
+        for moment in (self.start, last, self.end):
+            DiaperLog.objects.create(profile=self.profile, time=moment)
+            FeedingLog.objects.create(
+                profile=self.profile,
+                start_time=moment,
+                end_time=moment + timedelta(minutes=10),
+            )
+            MedicationLog.objects.create(
+                treatment=self.treatment, administered_at=moment
+            )
+
+    def test_next_midnight_is_excluded(self):
+        with self.assertNumQueries(3):
+            summary = async_to_sync(get_day_summary)(self.profile, self.day)
+        self.assertEqual(summary["diapers_total"], 2)
+        self.assertEqual(summary["feedings"], 2)
+        self.assertEqual(summary["feeding_mins"], 20)
+        self.assertEqual(summary["meds_count"], 2)
+
+        # El día siguiente empieza justo en esa medianoche
+        summary = async_to_sync(get_day_summary)(self.profile, self.day + timedelta(1))
+        self.assertEqual(
+            (summary["diapers_total"], summary["feedings"], summary["meds_count"]),
+            (1, 1, 1),
+        )
+
+    def test_day_filters_use_log_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("El plan se revisa con EXPLAIN QUERY PLAN de SQLite")
+        plans = {
+            "nursery_diaper_prof_time_idx": DiaperLog.objects.filter(
+                profile=self.profile, time__gte=self.start, time__lt=self.end
+            ),
+            "nursery_feed_prof_start_idx": FeedingLog.objects.filter(
+                profile=self.profile,
+                start_time__gte=self.start,
+                start_time__lt=self.end,
+            ),
+        }
+        for index, queryset in plans.items():
+            self.assertIn(index, queryset.explain())
+
+
+class DaySummaryAggregateTests(TestCase):
+    """Los agregados en BD dan lo mismo que el cálculo anterior fila por fila"""
+
+    def setUp(self):
+        household = Household.objects.create(name="Casa")
+        self.baby, other = (
+            Profile.objects.create(
+                household=household, name=name, birth_date=date(2025, 1, 1)
+            )
+            for name in ("Bebé", "Otro")
+        )
+        self.adult = Profile.objects.create(
+            household=household,
+            name="Mamá",
+            birth_date=date(1990, 1, 1),
+            profile_type=Profile.ProfileType.ADULT,
+        )
+        self.day = date(2025, 5, 1)
+        start, _ = local_day_range(self.day)
+
+        for profile in (self.baby, other, self.adult):
+            treatments = [
+                Treatment.objects.create(
+                    profile=profile,
+                    medicine_name=name,
+                    dose="2ml",
+                    frequency_hours=8,
+                    start_date=start,
+                    duration_days=5,
+                )
+                for name in ("Jarabe", "Vitamina", "Jarabe")
+            ]
+            for i in range(9):
+                moment = start + timedelta(hours=i * 3, minutes=i)
+                DiaperLog.objects.create(
+                    profile=profile,
+                    time=moment,
+                    waste_type=("PEE", "POO", "BOTH")[i % 3],
+                )
+                FeedingLog.objects.create(
+                    profile=profile,
+                    start_time=moment,
+                    end_time=moment + timedelta(minutes=5 + i),
+                )
+                MedicationLog.objects.create(
+                    treatment=treatments[i % 3], administered_at=moment
+                )
+
+    def python_summary(self, profile):
+        """El resumen como se calculaba antes: cargando las filas del día"""
+        start, end = local_day_range(self.day)
+        meds = MedicationLog.objects.filter(
+            treatment__profile=profile,
+            administered_at__gte=start,
+            administered_at__lt=end,
+        ).select_related("treatment")
+        diapers = DiaperLog.objects.filter(
+            profile=profile, time__gte=start, time__lt=end
+        )
+        feedings = FeedingLog.objects.filter(
+            profile=profile, start_time__gte=start, start_time__lt=end
+        )
+        is_baby = profile.profile_type == Profile.ProfileType.BABY
+        return {
+            "date": self.day.strftime("%d/%m/%Y"),
+            "is_baby": is_baby,
+            "meds_count": len(meds),
+            "meds_names": sorted({m.treatment.medicine_name for m in meds}),
+            "diapers_total": len(diapers) if is_baby else 0,
+            "pee": (
+                sum(d.waste_type in ["PEE", "BOTH"] for d in diapers) if is_baby else 0
+            ),
+            "poo": (
+                sum(d.waste_type in ["POO", "BOTH"] for d in diapers) if is_baby else 0
+            ),
+            "feedings": len(feedings) if is_baby else 0,
+            "feeding_mins": (
+                sum(f.duration_minutes for f in feedings) if is_baby else 0
+            ),
+        }
+
+    def test_matches_row_by_row_totals(self):
+        for profile in (self.baby, self.adult):
+            summary = async_to_sync(get_day_summary)(profile, self.day)
+            summary["meds_names"] = sorted(summary["meds_names"].split(", "))
+            self.assertEqual(summary, self.python_summary(profile))
+
+    def test_feeding_minutes_add_seconds_before_rounding(self):
+        # Antes cada toma perdía sus segundos; ahora se suman y se redondea al final
+        other_day = self.day + timedelta(days=3)
+        start, _ = local_day_range(other_day)
+        for i in range(2):
+            moment = start + timedelta(hours=i)
+            FeedingLog.objects.create(
+                profile=self.baby,
+                start_time=moment,
+                end_time=moment + timedelta(seconds=90),
+            )
+        summary = async_to_sync(get_day_summary)(self.baby, other_day)
+        self.assertEqual(summary["feeding_mins"], 3)
+
+
+class BaselineComparisonTests(SimpleTestCase):
+    """El benchmark marca más consultas siempre, y tiempo solo si supera el margen"""
+
+    BASELINE = {
+        "results": {"get_day_summary": {"p50_ms": 10.0, "p95_ms": 12.0, "queries": 3}}
+    }
+
+    def _report(self, p50_ms, queries):
+        return {
+            "results": {
+                "get_day_summary": {
+                    "p50_ms": p50_ms,
+                    "p95_ms": p50_ms,
+                    "queries": queries,
+                }
+            }
+        }
+
+    def test_extra_query_is_a_regression(self):
+        regressions = compare_to_baseline(self._report(10.0, 4), self.BASELINE)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("consultas", regressions[0])
+
+    def test_noise_within_tolerance_is_ignored(self):
+        self.assertEqual(compare_to_baseline(self._report(12.0, 3), self.BASELINE), [])
+
+    def test_slowdown_beyond_tolerance_is_a_regression(self):
+        regressions = compare_to_baseline(self._report(20.0, 3), self.BASELINE)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("p50", regressions[0])
@@ -1,3 +1,14 @@
 from django.contrib import admin
+from .models import BotData, ConversationState
 
-# Register your models here.
+
+@admin.register(BotData)
+class BotDataAdmin(admin.ModelAdmin):
+    list_display = ("kind", "object_id", "updated_at")
+    list_filter = ("kind",)
+
+
+@admin.register(ConversationState)
+class ConversationStateAdmin(admin.ModelAdmin):
+    list_display = ("name", "key", "state", "updated_at")
+    list_filter = ("name",)
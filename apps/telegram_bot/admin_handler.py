@@ -7,8 +7,9 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
+from apps.telegram_bot.auth import has_owner_role, with_user
 from apps.users.models import TelegramUser
+from apps.users.repository import approve_user, delete_user
 
 logger = logging.getLogger("apps.telegram_bot")
 
@@ -16,13 +17,18 @@ logger = logging.getLogger("apps.telegram_bot")
 SELECT_ROLE, TYPE_NICKNAME = range(2)
 
 
-async def start_approval(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_user
+async def start_approval(update: Update, context: ContextTypes.DEFAULT_TYPE, owner):
     """
     Paso 1: Owner pulsa 'Aprobar'. Preguntamos el Rol.
     """
     query = update.callback_query
     await query.answer()
 
+    if not has_owner_role(owner):
+        await query.edit_message_text("⛔ Solo el dueño de la familia puede aprobar.")
+        return ConversationHandler.END
+
     # Extraemos el ID del usuario a aprobar desde el callback (auth_approve_12345)
     target_user_id = int(query.data.split("_")[2])
     context.user_data["target_user_id"] = target_user_id
@@ -42,18 +48,26 @@ async def start_approval(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_ROLE
 
 
-async def reject_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_user
+async def reject_user(update: Update, context: ContextTypes.DEFAULT_TYPE, owner):
     """
     Opción: Owner pulsa 'Rechazar'.
     """
     query = update.callback_query
     await query.answer()
 
+    if not has_owner_role(owner):
+        await query.edit_message_text("⛔ Solo el dueño de la familia puede rechazar.")
+        return
+
     target_user_id = int(query.data.split("_")[2])
 
-    # Borramos al usuario de la BD (o lo marcamos bloqueado)
-    user = await sync_to_async(TelegramUser.objects.get)(telegram_id=target_user_id)
-    await sync_to_async(user.delete)()  # O user.is_active = False
+    # Borramos al usuario de la BD (solo solicitudes de la propia familia)
+    try:
+        user = await delete_user(owner.household_id, target_user_id)
+    except TelegramUser.DoesNotExist:
+        await query.edit_message_text("⚠️ Esa solicitud ya no existe.")
+        return
 
     await query.edit_message_text(
         f"🚫 Solicitud del usuario {user.first_name} rechazada y eliminada."
@@ -92,7 +106,10 @@ async def save_role_ask_nickname(update: Update, context: ContextTypes.DEFAULT_T
     return TYPE_NICKNAME
 
 
-async def save_nickname_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_user
+async def save_nickname_finish(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, owner
+):
     """
     Paso 3: Guardamos todo, activamos usuario y notificamos.
     """
@@ -102,11 +119,7 @@ async def save_nickname_finish(update: Update, context: ContextTypes.DEFAULT_TYP
 
     try:
         # 1. Actualizar Usuario en BD
-        user = await sync_to_async(TelegramUser.objects.get)(telegram_id=target_user_id)
-        user.nickname = nickname
-        user.role = role
-        user.is_active = True  # ¡ACCESO CONCEDIDO!
-        await sync_to_async(user.save)()
+        user = await approve_user(owner.household_id, target_user_id, nickname, role)
 
         # 2. Feedback al Owner
         await update.message.reply_text(
@@ -136,6 +149,8 @@ async def save_nickname_finish(update: Update, context: ContextTypes.DEFAULT_TYP
 
 # --- DEFINICIÓN DEL HANDLER DE CONVERSACIÓN ---
 admin_approval_handler = ConversationHandler(
+    name="admin_approval_handler",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_approval, pattern=r"^auth_approve_")],
     states={
         SELECT_ROLE: [CallbackQueryHandler(save_role_ask_nickname, pattern=r"^ROLE_")],
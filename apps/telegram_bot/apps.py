@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TelegramBotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.telegram_bot"
+
+    def ready(self):
+        # Contador de consultas ORM por handler (señal connection_created)
+        from apps.telegram_bot import metrics  # noqa: F401
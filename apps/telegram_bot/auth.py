@@ -0,0 +1,81 @@
+import functools
+from telegram.ext import ConversationHandler
+
+from apps.users.cache import USER_AUTH_MAX_AGE, get_cached_user, refresh_cached_user
+from apps.users.models import TelegramUser
+
+
+def with_user(func):
+    """
+    Inyecta el TelegramUser del remitente (desde la caché en memoria) como
+    tercer argumento: handler(update, context, user).
+    user es None si quien escribe no está registrado.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(update, context, *args, **kwargs):
+        sender = update.effective_user if update else None
+        user = await get_cached_user(sender.id, USER_AUTH_MAX_AGE) if sender else None
+        return await func(update, context, user, *args, **kwargs)
+
+    return wrapper
+
+
+async def _active_user(update):
+    """TelegramUser activo del remitente, o None (ya respondido) si no lo es"""
+    sender = update.effective_user if update else None
+    user = await get_cached_user(sender.id, USER_AUTH_MAX_AGE) if sender else None
+    if sender and (user is None or not user.is_active):
+        # Pudo ser aprobado en otro proceso: confirmamos antes de negar
+        user = await refresh_cached_user(sender.id)
+    if user is None or not user.is_active:
+        await _deny(update)
+        return None
+    return user
+
+
+def with_active_user(func):
+    """
+    Como with_user, pero solo para miembros activos de una familia:
+    handler(update, context, user). Usar en todo handler que escriba datos
+    de la familia (una solicitud pendiente ya está ligada a ella, inactiva).
+    """
+
+    @functools.wraps(func)
+    async def wrapper(update, context, *args, **kwargs):
+        user = await _active_user(update)
+        if user is None:
+            return ConversationHandler.END
+        return await func(update, context, user, *args, **kwargs)
+
+    return wrapper
+
+
+def with_household(func):
+    """
+    Inyecta el household_id del remitente como tercer argumento:
+    handler(update, context, household_id).
+    Si no pertenece (aún) a una familia activa, responde y corta el flujo.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(update, context, *args, **kwargs):
+        user = await _active_user(update)
+        if user is None:
+            return ConversationHandler.END
+        return await func(update, context, user.household_id, *args, **kwargs)
+
+    return wrapper
+
+
+async def _deny(update):
+    text = "⛔ No perteneces a ninguna familia activa. Usa /start para unirte."
+    if update.callback_query:
+        await update.callback_query.answer()
+        await update.callback_query.edit_message_text(text)
+    elif update.message:
+        await update.message.reply_text(text)
+
+
+def has_owner_role(user):
+    return user is not None and user.is_active and user.role == TelegramUser.Role.OWNER
@@ -0,0 +1,304 @@
+import os
+import hmac
+import logging
+from datetime import time
+from django.conf import settings
+from telegram import Update
+from telegram.ext import (
+    ApplicationBuilder,
+    CallbackQueryHandler,
+    CommandHandler,
+    TypeHandler,
+)
+from telegram.request import HTTPXRequest
+
+from apps.core_config.sharding import is_leader
+from apps.telegram_bot import metrics
+from apps.telegram_bot.concurrency import PerChatUpdateProcessor
+from apps.telegram_bot.persistence import DjangoPersistence, restore_conversations
+
+# Importamos el handler que acabamos de crear
+from apps.telegram_bot.onboarding import onboarding_handler
+from apps.telegram_bot.admin_handler import admin_approval_handler, rejection_handler
+from apps.telegram_bot.profile_handler import (
+    profile_conv_handler,
+    show_config_menu,
+    show_profiles_menu,
+    show_main_menu,  # Importante para el comando /menu
+)
+from apps.telegram_bot.config_handler import (
+    show_global_config,
+    show_invite,
+    config_conv_handler,
+)
+from apps.telegram_bot.sizes_handler import (
+    show_sizes_menu,
+    toggle_size_status,
+    sizes_conv_handler,
+)
+from apps.telegram_bot.notifications_handler import (
+    show_users_for_notifications,
+    show_user_preferences,
+    toggle_notification_setting,
+)
+from apps.telegram_bot.nursery_handler import (
+    diaper_conv_handler,
+    restock_conv_handler,
+    show_diaper_forecast,
+)
+from apps.telegram_bot.lactation_handler import (
+    lactation_conv_handler,
+    alarm_lactation_callback,
+)
+from apps.telegram_bot.health_handler import (
+    show_health_menu,
+    show_pending_reminders,
+    treatment_conv,
+    appointment_conv,
+    daily_appointment_check,
+    handle_dose_action,
+    results_conv,
+    alarm_meds_callback,
+    ask_results_alert_callback,
+)
+from apps.notifications.models import ScheduledEvent
+from apps.notifications.outbox import OUTBOX_POLL_SECONDS, drain_outbox, purge_outbox
+from apps.nursery.ledger import snapshot_job
+from apps.notifications.scheduler import register_event_callback, start_scheduler
+from apps.users.cache import warm_user_cache
+
+from apps.telegram_bot.reports_handler import reports_conv_handler
+from apps.telegram_bot.import_handler import import_conv_handler
+from apps.telegram_bot.web_panel_handler import panel_handler
+from apps.telegram_bot.stats_handler import stats_handler
+
+logger = logging.getLogger("apps.telegram_bot")
+
+# Ruta (relativa) donde Telegram entrega las actualizaciones en modo webhook
+WEBHOOK_PATH = "telegram/webhook/"
+
+# Espera (segundos) de las llamadas HTTP a Telegram
+HTTP_TIMEOUT = 30
+
+# Aplicación activa en este proceso (solo en modo webhook)
+_application = None
+
+
+async def _warm_caches(context):
+    await warm_user_cache()
+
+
+async def error_handler(update, context):
+    """Captura errores silenciosos y los manda al log"""
+    logger.error(msg="Excepción en el bot:", exc_info=context.error)
+    print(f"🔴 Error capturado: {context.error}")
+    # Los errores de handlers ya los cuenta su wrapper; los de jobs no pasan por él
+    if context.job is not None:
+        metrics.record_error(f"job:{metrics.callback_name(context.job.callback)}")
+
+
+def build_application(token):
+    """Construye la Application con todos los handlers y tareas programadas"""
+    #   --- CORRECCIÓN TÉCNICA PARA VENEZUELA/LATENCIA ---
+    # Aumentamos los tiempos de espera a 30 segundos para evitar el ReadTimeout
+    timeouts = {
+        "read_timeout": HTTP_TIMEOUT,
+        "write_timeout": HTTP_TIMEOUT,
+        "connect_timeout": HTTP_TIMEOUT,
+        "pool_timeout": HTTP_TIMEOUT,
+    }
+    builder = ApplicationBuilder().token(token)
+    api_base = settings.TELEGRAM_API_BASE_URL
+    if api_base:
+        # Bot API alternativa (servidor falso de las pruebas de carga)
+        builder.base_url(f"{api_base}/bot").base_file_url(f"{api_base}/file/bot")
+    application = (
+        builder
+        # Llamadas a la Bot API medidas (latencia por método y por handler)
+        .request(metrics.InstrumentedRequest(connection_pool_size=256, **timeouts))
+        # El long polling no se mide: su espera no es latencia real
+        .get_updates_request(HTTPXRequest(**timeouts))
+        .job_queue(metrics.InstrumentedJobQueue())
+        # Estado de conversaciones y user_data sobrevive a reinicios/redeploys
+        .persistence(DjangoPersistence())
+        # Chats distintos en paralelo; cada chat en orden
+        .concurrent_updates(PerChatUpdateProcessor())
+        .build()
+    )
+
+    # 0. Estados de conversación del chat (carga perezosa, antes que todo)
+    application.add_handler(TypeHandler(Update, restore_conversations), group=-1)
+
+    # 1. Admin Approval (Prioridad Alta)
+    application.add_handler(admin_approval_handler)
+    application.add_handler(rejection_handler)
+    application.add_handler(diaper_conv_handler)
+    application.add_handler(restock_conv_handler)
+    application.add_handler(lactation_conv_handler)
+    application.add_handler(profile_conv_handler)
+    application.add_handler(config_conv_handler)
+    application.add_handler(sizes_conv_handler)
+    application.add_handler(treatment_conv)
+    application.add_handler(appointment_conv)
+    application.add_handler(results_conv)
+    application.add_handler(reports_conv_handler)
+    application.add_handler(admin_approval_handler)
+    application.add_handler(import_conv_handler)
+    # 🆕 Comando Web Panel (Aislado)
+    application.add_handler(panel_handler)
+    application.add_handler(stats_handler)
+
+    # 3. Onboarding
+    application.add_handler(onboarding_handler)
+
+    # 4. Navegación General (Prioridad Baja)
+    application.add_handler(CommandHandler("menu", show_main_menu))
+    application.add_handler(CallbackQueryHandler(show_main_menu, pattern="^main_menu$"))
+    application.add_handler(
+        CallbackQueryHandler(show_config_menu, pattern="^menu_config$")
+    )
+    application.add_handler(
+        CallbackQueryHandler(show_profiles_menu, pattern="^config_profiles$")
+    )
+    application.add_handler(
+        CallbackQueryHandler(show_global_config, pattern="^config_globals$")
+    )
+    application.add_handler(
+        CallbackQueryHandler(show_invite, pattern="^household_invite")
+    )
+    # Pronóstico de consumo de pañales
+    application.add_handler(
+        CallbackQueryHandler(show_diaper_forecast, pattern="^diaper_forecast$")
+    )
+    # Entrar al menú tallas
+    application.add_handler(
+        CallbackQueryHandler(show_sizes_menu, pattern="^manage_sizes$")
+    )
+    # Activar/Desactivar
+    application.add_handler(
+        CallbackQueryHandler(toggle_size_status, pattern=r"^toggle_size_")
+    )
+    # Lista usuarios
+    application.add_handler(
+        CallbackQueryHandler(
+            show_users_for_notifications, pattern="^config_notifications$"
+        )
+    )
+    # Ver panel usuario
+    application.add_handler(
+        CallbackQueryHandler(show_user_preferences, pattern=r"^config_notif_user_")
+    )
+    # Switch ON/OFF
+    application.add_handler(
+        CallbackQueryHandler(toggle_notification_setting, pattern=r"^toggle_notif_")
+    )
+    application.add_handler(
+        CallbackQueryHandler(show_health_menu, pattern="^menu_health$")
+    )
+    application.add_handler(
+        CallbackQueryHandler(show_pending_reminders, pattern="^health_reminders$")
+    )
+    application.add_handler(CallbackQueryHandler(handle_dose_action, pattern=r"^DOSE_"))
+
+    # Programar revisión de citas todos los días a las 8:00 AM hora local
+    # time(8, 0) creará un objeto hora. El JobQueue usa la timezone del bot (definida en Defaults o system)
+    # Como definimos TIME_ZONE en settings pero no pasamos defaults al JobQueue,
+    # es mejor pasar la hora directa.
+
+    job_queue = application.job_queue
+    # Usuarios en memoria desde el arranque (autorización = búsqueda en dict)
+    job_queue.run_once(_warm_caches, when=0, name="users_cache_warm")
+    job_queue.run_daily(daily_appointment_check, time=time(hour=12, minute=0, second=0))
+    # Foto diaria del saldo de pañales (el stock = foto + movimientos del día)
+    # Es global (todas las familias): con workers en shards la toma solo el líder
+    if is_leader():
+        job_queue.run_daily(snapshot_job, time=time(hour=4), name="inventory_snapshot")
+        job_queue.run_daily(
+            purge_outbox, time=time(hour=4, minute=30), name="outbox_purge"
+        )
+
+    # Bandeja de salida: los handlers encolan avisos y la despiertan; este
+    # sondeo cubre reintentos y arriendos vencidos (varios workers: el UPDATE
+    # que reclama decide quién envía cada fila)
+    job_queue.run_repeating(
+        drain_outbox, interval=OUTBOX_POLL_SECONDS, first=1, name="outbox_drain"
+    )
+
+    # Recordatorios persistentes (ScheduledEvent): se restauran tras reinicios
+    register_event_callback(
+        ScheduledEvent.EventType.MEDICATION_REMINDER, alarm_meds_callback
+    )
+    register_event_callback(
+        ScheduledEvent.EventType.LACTATION_REMINDER, alarm_lactation_callback
+    )
+    register_event_callback(
+        ScheduledEvent.EventType.RESULTS_PROMPT, ask_results_alert_callback
+    )
+    start_scheduler(job_queue)
+
+    application.add_error_handler(error_handler)
+    # Tiempo, consultas y llamadas a Telegram de cada handler
+    metrics.instrument_handlers(application)
+
+    return application
+
+
+# --- MODO WEBHOOK (Servido por el proceso ASGI de Django) ---
+
+
+def webhook_enabled():
+    """Webhook si hay URL pública configurada y no se forzó el polling"""
+    return bool(settings.TELEGRAM_WEBHOOK_URL) and not settings.TELEGRAM_USE_POLLING
+
+
+def webhook_url():
+    return f"{settings.TELEGRAM_WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}"
+
+
+def get_application():
+    return _application
+
+
+def is_valid_secret(received):
+    """Compara el header X-Telegram-Bot-Api-Secret-Token en tiempo constante"""
+    expected = settings.TELEGRAM_WEBHOOK_SECRET
+    if not expected or not received:
+        return False
+    return hmac.compare_digest(received.encode(), expected.encode())
+
+
+async def start_webhook():
+    """Arranca la Application dentro del loop ASGI y registra el webhook"""
+    global _application
+    if not webhook_enabled():
+        return
+
+    token = os.environ.get("TELEGRAM_TOKEN")
+    if not token:
+        raise RuntimeError("TELEGRAM_TOKEN no encontrado en .env")
+    if not settings.TELEGRAM_WEBHOOK_SECRET:
+        raise RuntimeError("TELEGRAM_WEBHOOK_SECRET es obligatorio en modo webhook")
+
+    application = build_application(token)
+    await application.initialize()
+    await application.start()
+    await application.bot.set_webhook(
+        url=webhook_url(),
+        secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+        allowed_updates=Update.ALL_TYPES,
+    )
+    _application = application
+    logger.info(f"🤖 BabyBot escuchando por webhook en {webhook_url()}")
+
+
+async def stop_webhook():
+    """
+    Detiene la Application. El webhook NO se borra: Telegram encola las
+    actualizaciones mientras el servicio se redepliega.
+    """
+    global _application
+    if _application is None:
+        return
+    application, _application = _application, None
+    await application.stop()
+    await application.shutdown()
@@ -0,0 +1,66 @@
+import asyncio
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+# Actualizaciones procesadas a la vez (entre todos los chats)
+MAX_CONCURRENT_UPDATES = 32
+# Tope del semáforo de PTB (solo acota tareas en espera, no trabajo en curso)
+UNBOUNDED_UPDATES = 4096
+
+
+def serialization_key(update):
+    """Chat (o usuario) cuyas actualizaciones deben atenderse en orden"""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """
+    Procesa actualizaciones en paralelo, pero en orden dentro de cada chat.
+
+    Un import CSV o una difusión lenta en un chat ya no frena los botones de
+    los demás cuidadores, y los pasos de una conversación no se adelantan.
+    """
+
+    __slots__ = ("_chat_locks", "_slots")
+
+    def __init__(self, max_concurrent_updates=MAX_CONCURRENT_UPDATES):
+        # El semáforo global de PTB se toma ANTES de do_process_update: si
+        # limitara él, las actualizaciones en cola de un chat ocupado
+        # retendrían cupos mientras esperan su turno y frenarían a los demás.
+        # Lo dejamos holgado y el límite real se toma dentro del turno del chat.
+        super().__init__(UNBOUNDED_UPDATES)
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        # chat_id -> [lock, actualizaciones esperando o en curso]
+        self._chat_locks = {}
+
+    async def do_process_update(self, update, coroutine):
+        key = serialization_key(update)
+        if key is None:
+            async with self._slots:
+                await coroutine
+            return
+
+        entry = self._chat_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            # 1. Turno del chat: asyncio.Lock despierta en orden FIFO (orden de llegada)
+            async with entry[0]:
+                # 2. Cupo global: solo lo ocupa quien ya puede ejecutarse
+                async with self._slots:
+                    await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[key]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
@@ -7,32 +7,44 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
+from apps.households.repository import get_household, rotate_invite_code
+from apps.telegram_bot.auth import has_owner_role, with_household, with_user
 from apps.telegram_bot.keyboards import get_config_menu
 from apps.core_config.utils import (
     get_setting,
     set_setting,
     KEY_LACTATION_INTERVAL,
     KEY_DIAPER_THRESHOLD,
+    KEY_DIAPER_LEAD_DAYS,
     DEFAULT_LACTATION_INTERVAL,
     DEFAULT_DIAPER_THRESHOLD,
+    DEFAULT_DIAPER_LEAD_DAYS,
 )
 
 # 1. Configuración del Logger
 logger = logging.getLogger("apps.telegram_bot")
 
 # Estados
-EDIT_LACTATION, EDIT_THRESHOLD = range(2)
+EDIT_LACTATION, EDIT_THRESHOLD, EDIT_LEAD_DAYS = range(3)
 
 
-async def show_global_config(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Muestra el menú de Globales"""
+@with_household
+async def show_global_config(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
+    """Muestra el menú de Globales (de la familia)"""
     query = update.callback_query
     await query.answer()
 
     lactation_val = await get_setting(
-        KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL
+        household_id, KEY_LACTATION_INTERVAL, DEFAULT_LACTATION_INTERVAL
+    )
+    threshold_val = await get_setting(
+        household_id, KEY_DIAPER_THRESHOLD, DEFAULT_DIAPER_THRESHOLD
+    )
+    lead_days_val = await get_setting(
+        household_id, KEY_DIAPER_LEAD_DAYS, DEFAULT_DIAPER_LEAD_DAYS
     )
-    threshold_val = await get_setting(KEY_DIAPER_THRESHOLD, DEFAULT_DIAPER_THRESHOLD)
 
     keyboard = [
         [
@@ -45,6 +57,11 @@ async def show_global_config(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 f"📉 Umbral Pañales: {threshold_val}", callback_data="edit_threshold"
             )
         ],
+        [
+            InlineKeyboardButton(
+                f"🚚 Anticipación: {lead_days_val} días", callback_data="edit_lead_days"
+            )
+        ],
         [InlineKeyboardButton("🏷️ Gestionar Tallas", callback_data="manage_sizes")],
         [InlineKeyboardButton("🔙 Volver", callback_data="menu_config")],
     ]
@@ -72,13 +89,18 @@ async def ask_lactation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return EDIT_LACTATION
 
 
-async def save_lactation(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_lactation(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     user = update.effective_user
     value = update.message.text.replace(",", ".")
 
     try:
         float(value)
-        await set_setting(KEY_LACTATION_INTERVAL, value, "Horas entre tomas")
+        await set_setting(
+            household_id, KEY_LACTATION_INTERVAL, value, "Horas entre tomas"
+        )
 
         logger.info(
             f"Config: Intervalo Lactancia -> {value} hrs (por {user.first_name})"
@@ -119,12 +141,17 @@ async def ask_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return EDIT_THRESHOLD
 
 
-async def save_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_threshold(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     user = update.effective_user
     value = update.message.text
 
     if value.isdigit():
-        await set_setting(KEY_DIAPER_THRESHOLD, value, "Mínimo de pañales")
+        await set_setting(
+            household_id, KEY_DIAPER_THRESHOLD, value, "Mínimo de pañales"
+        )
 
         logger.info(f"Config: Umbral Pañales -> {value} (por {user.first_name})")
 
@@ -148,11 +175,112 @@ async def save_threshold(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return EDIT_THRESHOLD
 
 
+# --- EDICIÓN DE ANTICIPACIÓN DE COMPRA ---
+
+
+async def ask_lead_days(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    await query.edit_message_text(
+        "🚚 **Editar Anticipación de Compra**\n\n"
+        "¿Con cuántos días de anticipación quieres la alerta antes de que se "
+        "acaben los pañales? (Ej: `5`):",
+        parse_mode="Markdown",
+    )
+    return EDIT_LEAD_DAYS
+
+
+@with_household
+async def save_lead_days(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
+    user = update.effective_user
+    value = update.message.text
+
+    if value.isdigit():
+        await set_setting(
+            household_id,
+            KEY_DIAPER_LEAD_DAYS,
+            value,
+            "Días de anticipación de compra",
+        )
+
+        logger.info(
+            f"Config: Anticipación Pañales -> {value} días (por {user.first_name})"
+        )
+
+        # 1. Mensaje Persistente
+        await update.message.reply_text(
+            f"✅ **CONFIGURACIÓN ACTUALIZADA**\n"
+            f"🚚 Alerta cuando queden menos de **{value} días** de pañales",
+            parse_mode="Markdown",
+        )
+
+        # 2. Navegación
+        await update.message.reply_text(
+            "Regresando al menú...",
+            reply_markup=get_config_menu(),
+        )
+        return ConversationHandler.END
+    else:
+        await update.message.reply_text(
+            "⚠️ Por favor ingresa un número entero de días (Ej: 5):"
+        )
+        return EDIT_LEAD_DAYS
+
+
+# --- INVITACIONES A LA FAMILIA ---
+
+
+@with_user
+async def show_invite(update: Update, context: ContextTypes.DEFAULT_TYPE, user):
+    """Código y enlace de invitación de la familia (solo el Owner)"""
+    query = update.callback_query
+    await query.answer()
+    back = InlineKeyboardMarkup(
+        [[InlineKeyboardButton("🔙 Volver", callback_data="menu_config")]]
+    )
+
+    if not has_owner_role(user):
+        await query.edit_message_text(
+            "⛔ Solo el dueño de la familia puede invitar.", reply_markup=back
+        )
+        return
+
+    # "household_invite_rotate": el código anterior deja de servir
+    if query.data == "household_invite_rotate":
+        code = await rotate_invite_code(user.household_id)
+        logger.info(f"Familia {user.household_id}: código de invitación renovado.")
+    else:
+        code = (await get_household(user.household_id)).invite_code
+
+    keyboard = [
+        [
+            InlineKeyboardButton(
+                "🔄 Nuevo Código", callback_data="household_invite_rotate"
+            )
+        ],
+        [InlineKeyboardButton("🔙 Volver", callback_data="menu_config")],
+    ]
+    await query.edit_message_text(
+        f"🔑 **Invitar a la Familia**\n\n"
+        f"Comparte este enlace con quien quieras sumar:\n"
+        f"`https://t.me/{context.bot.username}?start={code}`\n\n"
+        f"O que envíe `/start {code}` al bot.\n"
+        f"Tú aprobarás cada solicitud antes de que tenga acceso.",
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode="Markdown",
+    )
+
+
 # --- HANDLER ---
 config_conv_handler = ConversationHandler(
+    name="config_conv_handler",
+    persistent=True,
     entry_points=[
         CallbackQueryHandler(ask_lactation, pattern="^edit_lactation$"),
         CallbackQueryHandler(ask_threshold, pattern="^edit_threshold$"),
+        CallbackQueryHandler(ask_lead_days, pattern="^edit_lead_days$"),
     ],
     states={
         EDIT_LACTATION: [
@@ -161,6 +289,9 @@ config_conv_handler = ConversationHandler(
         EDIT_THRESHOLD: [
             MessageHandler(filters.TEXT & ~filters.COMMAND, save_threshold)
         ],
+        EDIT_LEAD_DAYS: [
+            MessageHandler(filters.TEXT & ~filters.COMMAND, save_lead_days)
+        ],
     },
     fallbacks=[CallbackQueryHandler(show_global_config, pattern="^menu_config$")],
     per_chat=True,
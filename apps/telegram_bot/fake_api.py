@@ -0,0 +1,277 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from email import policy
+from email.parser import BytesParser
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# Token con el que el bot se conecta al servidor falso (no es un token real)
+FAKE_TOKEN = "123456:LOADTEST"
+FAKE_BOT = {
+    "id": 123456,
+    "is_bot": True,
+    "first_name": "BabyBot",
+    "username": "babybot_loadtest_bot",
+}
+
+# Parámetros que PTB envía como texto plano (el resto va codificado en JSON)
+STRING_FIELDS = {
+    "text",
+    "caption",
+    "parse_mode",
+    "callback_query_id",
+    "file_id",
+    "url",
+    "secret_token",
+}
+
+
+def _decode_param(key, value):
+    if key in STRING_FIELDS:
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+class FakeBotAPI:
+    """
+    Sustituto local de la Bot API de Telegram (asyncio puro, sin dependencias).
+
+    El bot se conecta con base_url=http://host:port/bot y base_file_url=
+    http://host:port/file/bot. El driver de carga inyecta actualizaciones con
+    push_update() y lee lo que el bot envía a cada chat con inbox(chat_id).
+    """
+
+    def __init__(self, host="127.0.0.1", port=8081, token=FAKE_TOKEN):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.calls = Counter()
+        self.update_count = 0
+        # Se activa la primera vez que el bot pide actualizaciones
+        self.polling = asyncio.Event()
+
+        self._server = None
+        self._writers = set()
+        self._pending = []
+        self._has_updates = asyncio.Event()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._messages = {}
+        self._files = {}
+        self._inboxes = {}
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        # port=0: el sistema elige uno libre (pruebas)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        # Cortamos los long polls pendientes y las conexiones keep-alive
+        self._has_updates.set()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+
+    # --- API PARA EL DRIVER ---
+
+    def push_update(self, payload):
+        """Encola una actualización (dict sin update_id) para el próximo getUpdates"""
+        update = {"update_id": next(self._update_ids), **payload}
+        self._pending.append(update)
+        self.update_count += 1
+        self._has_updates.set()
+        return update["update_id"]
+
+    def inbox(self, chat_id):
+        """Cola con los mensajes (enviados o editados) que el bot manda a ese chat"""
+        return self._inboxes.setdefault(chat_id, asyncio.Queue())
+
+    def add_file(self, content, file_name):
+        """Registra un archivo como si el usuario lo hubiera subido"""
+        file_id = f"file{next(self._file_ids)}"
+        self._files[file_id] = (file_name, content)
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id,
+            "file_name": file_name,
+            "file_size": len(content),
+        }
+
+    # --- HTTP (HTTP/1.1 mínimo con keep-alive) ---
+
+    async def _handle_connection(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                verb, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, value = line.decode("latin-1").split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, content_type, payload = await self._dispatch(
+                    verb, target, headers, body
+                )
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, verb, target, headers, body):
+        # PTB escapa el ':' del token en las descargas (%3A)
+        path = unquote(urlsplit(target).path)
+        file_prefix = f"/file/bot{self.token}/"
+        if verb == "GET" and path.startswith(file_prefix):
+            file_id = path[len(file_prefix) :].rsplit("/", 1)[-1]
+            if file_id not in self._files:
+                return "404 Not Found", "text/plain", b""
+            return "200 OK", "application/octet-stream", self._files[file_id][1]
+
+        api_prefix = f"/bot{self.token}/"
+        if not path.startswith(api_prefix):
+            return self._json(404, {"ok": False, "error_code": 404})
+
+        method = path[len(api_prefix) :]
+        self.calls[method] += 1
+        params = self._parse_params(headers, body)
+        handler = getattr(self, f"_api_{method}", None)
+        result = await handler(params) if handler else True
+        return self._json(200, {"ok": True, "result": result})
+
+    @staticmethod
+    def _json(status, data):
+        reason = "OK" if status == 200 else "Not Found"
+        return f"{status} {reason}", "application/json", json.dumps(data).encode()
+
+    @staticmethod
+    def _parse_params(headers, body):
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=policy.default).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode() + body
+            )
+            params = {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                if part.get_filename():
+                    params[name] = (part.get_filename(), part.get_content())
+                else:
+                    params[name] = _decode_param(name, part.get_content())
+            return params
+        if content_type.startswith("application/json"):
+            return json.loads(body or b"{}")
+        return {
+            key: _decode_param(key, value)
+            for key, value in parse_qsl(body.decode(), keep_blank_values=True)
+        }
+
+    # --- MÉTODOS DE LA BOT API ---
+
+    def _new_message(self, chat_id, **fields):
+        message = {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": FAKE_BOT,
+            **fields,
+        }
+        self._messages[(chat_id, message["message_id"])] = message
+        return message
+
+    def _deliver(self, chat_id, message):
+        # Solo guardamos lo que algún usuario simulado está escuchando
+        if chat_id in self._inboxes:
+            self._inboxes[chat_id].put_nowait(message)
+
+    async def _api_getMe(self, params):
+        return FAKE_BOT
+
+    async def _api_getUpdates(self, params):
+        self.polling.set()
+        offset = params.get("offset") or 0
+        self._pending = [u for u in self._pending if u["update_id"] >= offset]
+        if not self._pending:
+            self._has_updates.clear()
+            try:
+                await asyncio.wait_for(
+                    self._has_updates.wait(), timeout=params.get("timeout") or 0
+                )
+            except asyncio.TimeoutError:
+                pass
+        return self._pending[: params.get("limit") or 100]
+
+    async def _api_sendMessage(self, params):
+        fields = {"text": params.get("text", "")}
+        if params.get("reply_markup"):
+            fields["reply_markup"] = params["reply_markup"]
+        message = self._new_message(params["chat_id"], **fields)
+        self._deliver(params["chat_id"], message)
+        return message
+
+    async def _api_editMessageText(self, params):
+        key = (params["chat_id"], params["message_id"])
+        message = self._messages.get(key) or self._new_message(params["chat_id"])
+        message = {
+            **message,
+            "text": params.get("text", ""),
+            "edit_date": int(time.time()),
+        }
+        message.pop("reply_markup", None)
+        if params.get("reply_markup"):
+            message["reply_markup"] = params["reply_markup"]
+        self._messages[key] = message
+        self._deliver(params["chat_id"], message)
+        return message
+
+    async def _api_sendDocument(self, params):
+        document = params.get("document")
+        if isinstance(document, tuple):
+            document = self.add_file(document[1], document[0])
+        else:
+            document = {"file_id": document, "file_unique_id": document}
+        fields = {"document": document}
+        if params.get("caption"):
+            fields["caption"] = params["caption"]
+        message = self._new_message(params["chat_id"], **fields)
+        self._deliver(params["chat_id"], message)
+        return message
+
+    async def _api_getFile(self, params):
+        file_id = params["file_id"]
+        file_name, content = self._files.get(file_id, ("", b""))
+        return {
+            "file_id": file_id,
+            "file_unique_id": file_id,
+            "file_size": len(content),
+            "file_path": f"documents/{file_id}",
+        }
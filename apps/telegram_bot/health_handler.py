@@ -8,15 +8,29 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
 from django.utils import timezone
 
+from apps.core_config.sharding import owns_household
+from apps.profiles.repository import get_profile, list_profiles
+from apps.health.models import Appointment
 from apps.profiles.models import Profile
-from apps.users.models import TelegramUser
-from apps.health.models import Treatment, Appointment, MedicationLog
+from apps.health.repository import (
+    complete_appointment,
+    create_appointment,
+    create_treatment,
+    deactivate_treatment,
+    get_appointment,
+    get_treatment,
+    record_dose,
+)
+from apps.notifications.outbox import enqueue_alert, wake_outbox
 from apps.notifications.services import send_alert
-from apps.notifications.models import UserAlertPreference
+from apps.notifications.models import ScheduledEvent
+from apps.notifications.repository import list_pending_reminders
+from apps.notifications.scheduler import cancel_reminders, schedule_event
 from apps.health.utils import check_daily_alerts, calculate_next_dose_time
+from apps.health.schedule import DoseSchedule
+from apps.telegram_bot.auth import with_active_user, with_household
 from apps.telegram_bot.keyboards import get_main_menu
 
 logger = logging.getLogger("apps.telegram_bot")
@@ -37,14 +51,6 @@ INPUT_WEIGHT, INPUT_HEIGHT, INPUT_HEAD, INPUT_NOTES = range(
 )  # Estados para resultados
 
 
-# --- HELPER DATABASE ---
-def get_treatment_full(t_id):
-    try:
-        return Treatment.objects.select_related("profile", "created_by").get(id=t_id)
-    except Treatment.DoesNotExist:
-        return None
-
-
 # --- MENÚ DE SALUD ---
 async def show_health_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -54,6 +60,7 @@ async def show_health_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
         [InlineKeyboardButton("➕ Nuevo Tratamiento", callback_data="new_treatment")],
         [InlineKeyboardButton("📅 Agendar Cita", callback_data="new_appointment")],
+        [InlineKeyboardButton("⏰ Recordatorios", callback_data="health_reminders")],
         [InlineKeyboardButton("🔙 Volver", callback_data="main_menu")],
     ]
     msg = query.edit_message_text if query else update.message.reply_text
@@ -64,6 +71,39 @@ async def show_health_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+@with_household
+async def show_pending_reminders(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
+    """Alarmas pendientes de la familia, agrupadas por perfil"""
+    query = update.callback_query
+    await query.answer()
+    reminders = await list_pending_reminders(household_id)
+
+    # Ya vienen por hora: cada perfil conserva ese orden
+    by_profile = {}
+    for event in reminders:
+        name = event.profile.name if event.profile else "General"
+        when = timezone.localtime(event.scheduled_time).strftime("%d/%m %I:%M %p")
+        by_profile.setdefault(name, []).append(
+            f"• {event.get_event_type_display()} — {when}"
+        )
+
+    lines = ["⏰ **Recordatorios pendientes**"]
+    for name, items in by_profile.items():
+        lines.append(f"\n👤 **{name}**")
+        lines.extend(items)
+    if not reminders:
+        lines.append("\nNo hay recordatorios programados.")
+
+    keyboard = [[InlineKeyboardButton("🔙 Volver", callback_data="menu_health")]]
+    await query.edit_message_text(
+        "\n".join(lines),
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode="Markdown",
+    )
+
+
 async def cancel_health(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     if query:
@@ -90,7 +130,7 @@ async def alarm_meds_callback(context: ContextTypes.DEFAULT_TYPE):
     job = context.job
     treatment_id = job.data.get("treatment_id")
     try:
-        treatment = await sync_to_async(get_treatment_full)(treatment_id)
+        treatment = await get_treatment(job.data["household_id"], treatment_id)
         if not treatment or not treatment.is_active:
             return
 
@@ -108,57 +148,58 @@ async def alarm_meds_callback(context: ContextTypes.DEFAULT_TYPE):
         ]
         msg = f"💊 **¡HORA DEL MEDICAMENTO!** 💊\n━━━━━━━━━━━━━━━━━━\n👤 **Paciente:** {treatment.profile.name}\n🧪 **Medicina:** {treatment.medicine_name}\n💉 **Dosis:** {treatment.dose}\n━━━━━━━━━━━━━━━━━━\n👇 *Cualquier padre puede registrarlo:*"
 
-        users_to_notify = await sync_to_async(list)(
-            UserAlertPreference.objects.filter(alert_meds=True).select_related("user")
+        await send_alert(
+            context.bot,
+            job.data["household_id"],
+            "alert_meds",
+            msg,
+            reply_markup=InlineKeyboardMarkup(keyboard),
         )
-        for pref in users_to_notify:
-            try:
-                await context.bot.send_message(
-                    chat_id=pref.user.telegram_id,
-                    text=msg,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
-                    parse_mode="Markdown",
-                )
-            except Exception as e:
-                logger.error(f"Fallo broadcast med: {e}")
     except Exception as e:
         logger.error(f"Error alarm_meds: {e}")
 
 
-async def handle_dose_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_active_user
+async def handle_dose_action(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, action_user
+):
     query = update.callback_query
     await query.answer()
     try:
         action, treatment_id = query.data.split("_")[1], int(query.data.split("_")[2])
-        treatment = await sync_to_async(get_treatment_full)(treatment_id)
+        # Solo la familia del paciente puede registrar o posponer sus dosis
+        treatment = await get_treatment(action_user.household_id, treatment_id)
         if not treatment:
             await query.edit_message_text("⚠️ Tratamiento no encontrado.")
             return
+        household_id = treatment.profile.household_id
 
-        action_user = await sync_to_async(TelegramUser.objects.get)(
-            telegram_id=update.effective_user.id
-        )
         action_name = action_user.nickname or action_user.first_name or "Usuario"
 
         if action == "TAKE":
             now = timezone.localtime()
-            await sync_to_async(MedicationLog.objects.create)(
-                treatment=treatment, administered_at=now, administered_by=action_user
-            )
+            await record_dose(treatment, action_user, now)
             next_time = calculate_next_dose_time(treatment, last_log_time=now)
 
             if next_time:
-                context.job_queue.run_once(
-                    alarm_meds_callback,
-                    when=next_time,
-                    data={"treatment_id": treatment.id},
-                    name=f"med_alarm_{treatment.id}",
+                await schedule_event(
+                    household_id,
+                    ScheduledEvent.EventType.MEDICATION_REMINDER,
+                    next_time,
+                    {"treatment_id": treatment.id},
+                    related_id=treatment.id,
+                    profile_id=treatment.profile_id,
                 )
                 next_str = timezone.localtime(next_time).strftime("%I:%M %p")
                 feedback = f"✅ **Dosis Registrada por {action_name}**\n👤 {treatment.profile.name} — {treatment.medicine_name}\n🕒 {now.strftime('%I:%M %p')}\n🔜 Siguiente: **{next_str}**"
             else:
-                treatment.is_active = False
-                await sync_to_async(treatment.save)()
+                await deactivate_treatment(treatment)
+                # Sin más dosis: fuera la alarma pendiente (ej. una pospuesta)
+                await cancel_reminders(
+                    household_id,
+                    ScheduledEvent.EventType.MEDICATION_REMINDER,
+                    treatment.id,
+                )
                 feedback = (
                     f"✅ **¡Tratamiento Completado!** 🎉\nEsta fue la última dosis."
                 )
@@ -166,22 +207,26 @@ async def handle_dose_action(update: Update, context: ContextTypes.DEFAULT_TYPE)
             await query.edit_message_text(feedback, parse_mode="Markdown")
             await send_alert(
                 context.bot,
+                household_id,
                 "alert_meds",
                 f"ℹ️ **AVISO DE DOSIS**\n\n**{action_name}** ya suministró el medicamento a **{treatment.profile.name}**.\n💊 {treatment.medicine_name}",
             )
 
         elif action == "SNOOZE":
-            context.job_queue.run_once(
-                alarm_meds_callback,
-                when=timedelta(minutes=15),
-                data={"treatment_id": treatment.id},
-                name=f"med_alarm_{treatment.id}",
+            await schedule_event(
+                household_id,
+                ScheduledEvent.EventType.MEDICATION_REMINDER,
+                timedelta(minutes=15),
+                {"treatment_id": treatment.id},
+                related_id=treatment.id,
+                profile_id=treatment.profile_id,
             )
             await query.edit_message_text(
                 f"💤 Alarma pospuesta por 15 min por {action_name}."
             )
             await send_alert(
                 context.bot,
+                household_id,
                 "alert_meds",
                 f"💤 **{action_name}** pospuso la medicina de **{treatment.profile.name}**.",
             )
@@ -202,9 +247,7 @@ async def ask_results_alert_callback(context: ContextTypes.DEFAULT_TYPE):
 
     try:
         # Buscamos la cita
-        appt = await sync_to_async(Appointment.objects.select_related("profile").get)(
-            id=appt_id
-        )
+        appt = await get_appointment(job.data["household_id"], appt_id)
         if appt.is_completed:
             return  # Ya se llenó, no molestar
 
@@ -222,21 +265,13 @@ async def ask_results_alert_callback(context: ContextTypes.DEFAULT_TYPE):
         )
 
         # Enviar a todos los interesados en citas
-        users = await sync_to_async(list)(
-            UserAlertPreference.objects.filter(alert_appointments=True).select_related(
-                "user"
-            )
+        await send_alert(
+            context.bot,
+            job.data["household_id"],
+            "alert_appointments",
+            msg,
+            reply_markup=InlineKeyboardMarkup(keyboard),
         )
-        for pref in users:
-            try:
-                await context.bot.send_message(
-                    chat_id=pref.user.telegram_id,
-                    text=msg,
-                    reply_markup=InlineKeyboardMarkup(keyboard),
-                    parse_mode="Markdown",
-                )
-            except:
-                pass
 
     except Appointment.DoesNotExist:
         pass
@@ -245,15 +280,22 @@ async def ask_results_alert_callback(context: ContextTypes.DEFAULT_TYPE):
 # --- FLUJO DE REGISTRO DE RESULTADOS (CON PROTECCIÓN DOBLE REGISTRO) ---
 
 
-async def start_results_flow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def start_results_flow(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
 
     try:
         appt_id = int(query.data.split("_")[2])
 
-        # 1. PORTERO DE SEGURIDAD: ¿Ya está completa?
-        appt = await sync_to_async(Appointment.objects.get)(id=appt_id)
+        # 1. PORTERO DE SEGURIDAD: ¿Es de esta familia y ya está completa?
+        try:
+            appt = await get_appointment(household_id, appt_id)
+        except Appointment.DoesNotExist:
+            await query.edit_message_text("⚠️ Cita no encontrada.")
+            return ConversationHandler.END
         if appt.is_completed:
             await query.edit_message_text(
                 "⚠️ **Acción Denegada**\n\nEstos resultados ya fueron registrados por otro usuario.",
@@ -308,33 +350,29 @@ async def save_head_res(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return INPUT_NOTES
 
 
-async def save_notes_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_active_user
+async def save_notes_finish(update: Update, context: ContextTypes.DEFAULT_TYPE, user):
     text = update.message.text.strip()
     notes = "" if text.lower() == "x" else text
 
     appt_id = context.user_data["res_appt_id"]
-    user = await sync_to_async(TelegramUser.objects.get)(
-        telegram_id=update.effective_user.id
-    )
     user_name = user.nickname or user.first_name
 
-    # Verificación final antes de guardar
-    appt = await sync_to_async(Appointment.objects.select_related("profile").get)(
-        id=appt_id
+    # Guardado condicional: solo si nadie la completó mientras escribíamos
+    appt = await complete_appointment(
+        user.household_id,
+        appt_id,
+        weight_kg=context.user_data.get("res_weight"),
+        height_cm=context.user_data.get("res_height"),
+        head_circumference_cm=context.user_data.get("res_head"),
+        notes=notes,
     )
-    if appt.is_completed:
+    if appt is None:
         await update.message.reply_text(
             "⚠️ Alguien más guardó los resultados mientras escribías."
         )
         return ConversationHandler.END
 
-    appt.weight_kg = context.user_data.get("res_weight")
-    appt.height_cm = context.user_data.get("res_height")
-    appt.head_circumference_cm = context.user_data.get("res_head")
-    appt.notes = notes
-    appt.is_completed = True  # Bloqueamos futuras ediciones
-    await sync_to_async(appt.save)()
-
     # Broadcast de Resultados
     w_str = f"{appt.weight_kg} kg" if appt.weight_kg else "-"
     h_str = f"{appt.height_cm} cm" if appt.height_cm else "-"
@@ -349,8 +387,8 @@ async def save_notes_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"━━━━━━━━━━━━━━━━━━"
     )
 
-    # Enviar a todos
-    await send_alert(context.bot, "alert_appointments", msg)
+    # Enviar a toda la familia
+    await send_alert(context.bot, appt.profile.household_id, "alert_appointments", msg)
     await update.message.reply_text(
         "Guardado. Volviendo al menú...", reply_markup=get_main_menu()
     )
@@ -363,10 +401,13 @@ async def save_notes_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # ... (start_treatment, save_profile_t, save_med, save_dose, save_freq, save_dur, handle_start_time_selection, show_treatment_summary, finish_treatment MANTENIDOS IGUAL) ...
-async def start_treatment(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def start_treatment(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
-    profiles = await sync_to_async(list)(Profile.objects.all())
+    profiles = await list_profiles(household_id)
     keyboard = [
         [InlineKeyboardButton(p.name, callback_data=f"ht_prof_{p.id}")]
         for p in profiles
@@ -379,11 +420,18 @@ async def start_treatment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_PROFILE_T
 
 
-async def save_profile_t(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_profile_t(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
     pid = int(query.data.split("_")[2])
-    profile = await sync_to_async(Profile.objects.get)(id=pid)
+    try:
+        profile = await get_profile(household_id, pid)
+    except Profile.DoesNotExist:
+        await query.edit_message_text("⚠️ Perfil no encontrado.")
+        return ConversationHandler.END
     context.user_data["ht_pid"] = pid
     context.user_data["ht_pname"] = profile.name
     await query.edit_message_text(
@@ -469,11 +517,14 @@ async def show_treatment_summary(
     context.user_data["ht_start"] = start_dt
     data = context.user_data
     freq = data["ht_freq"]
-    schedule = ""
-    curr = start_dt
-    for i in range(1, 4):
-        curr += timedelta(hours=freq)
-        schedule += f"• {curr.strftime('%I:%M %p')}\n"
+    # Mismo cálculo que usarán las alarmas (primeras 3 dosis tras el inicio)
+    dose_schedule = DoseSchedule(
+        start_dt, freq, start_dt + timedelta(days=data["ht_dur"])
+    )
+    schedule = "".join(
+        f"• {dose_time.strftime('%I:%M %p')}\n"
+        for dose_time in dose_schedule.next_slots(start_dt, 3)
+    )
 
     keyboard = [
         [
@@ -494,49 +545,44 @@ async def show_treatment_summary(
     return CONFIRM_T
 
 
-async def finish_treatment(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_active_user
+async def finish_treatment(update: Update, context: ContextTypes.DEFAULT_TYPE, user):
     query = update.callback_query
     await query.answer()
     data = context.user_data
-    user = await sync_to_async(TelegramUser.objects.get)(
-        telegram_id=update.effective_user.id
-    )
     creator_name = user.nickname or user.first_name or "Usuario"
-    profile = await sync_to_async(Profile.objects.get)(id=data["ht_pid"])
 
-    t = await sync_to_async(Treatment.objects.create)(
-        profile=profile,
+    def notify(t, profile):
+        # Encolado en la misma transacción que crea el tratamiento
+        persistent_msg = f"🆕 **NUEVO TRATAMIENTO**\n━━━━━━━━━━━━━━━━━━\n👤 **{profile.name}**\n💊 {data['ht_med']} ({data['ht_dose']})\n⏱️ Cada {data['ht_freq']}h por {data['ht_dur']} días\n✍️ **Registrado por:** {creator_name}\n━━━━━━━━━━━━━━━━━━\n🔔 *Alarmas activadas para todos.*"
+        enqueue_alert(
+            profile.household_id, "alert_meds", persistent_msg, key=f"treatment:{t.id}"
+        )
+
+    t, profile = await create_treatment(
+        user.household_id,
+        data["ht_pid"],
+        user,
+        notify=notify,
         medicine_name=data["ht_med"],
         dose=data["ht_dose"],
         frequency_hours=data["ht_freq"],
         duration_days=data["ht_dur"],
         start_date=data["ht_start"],
-        created_by=user,
     )
+    wake_outbox(context.application)
     next_alarm = calculate_next_dose_time(t, last_log_time=None)
     if next_alarm:
-        context.job_queue.run_once(
-            alarm_meds_callback,
-            when=next_alarm,
-            data={"treatment_id": t.id},
-            name=f"med_alarm_{t.id}",
+        await schedule_event(
+            profile.household_id,
+            ScheduledEvent.EventType.MEDICATION_REMINDER,
+            next_alarm,
+            {"treatment_id": t.id},
+            related_id=t.id,
+            profile_id=profile.id,
         )
 
     await query.edit_message_text(f"✅ **Tratamiento Creado**", parse_mode="Markdown")
-    persistent_msg = f"🆕 **NUEVO TRATAMIENTO**\n━━━━━━━━━━━━━━━━━━\n👤 **{profile.name}**\n💊 {data['ht_med']} ({data['ht_dose']})\n⏱️ Cada {data['ht_freq']}h por {data['ht_dur']} días\n✍️ **Registrado por:** {creator_name}\n━━━━━━━━━━━━━━━━━━\n🔔 *Alarmas activadas para todos.*"
-
-    users_to_notify = await sync_to_async(list)(
-        UserAlertPreference.objects.filter(alert_meds=True).select_related("user")
-    )
-    for pref in users_to_notify:
-        try:
-            await context.bot.send_message(
-                chat_id=pref.user.telegram_id,
-                text=persistent_msg,
-                parse_mode="Markdown",
-            )
-        except:
-            pass
 
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
@@ -547,10 +593,13 @@ async def finish_treatment(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # ... (start_appointment, save_profile_a, save_spec, save_date_a, save_loc MANTENIDOS IGUAL) ...
-async def start_appointment(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def start_appointment(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
-    profiles = await sync_to_async(list)(Profile.objects.all())
+    profiles = await list_profiles(household_id)
     keyboard = [
         [InlineKeyboardButton(p.name, callback_data=f"ha_prof_{p.id}")]
         for p in profiles
@@ -563,12 +612,19 @@ async def start_appointment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_PROFILE_A
 
 
-async def save_profile_a(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_profile_a(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
     pid = int(query.data.split("_")[2])
+    try:
+        p = await get_profile(household_id, pid)
+    except Profile.DoesNotExist:
+        await query.edit_message_text("⚠️ Perfil no encontrado.")
+        return ConversationHandler.END
     context.user_data["ha_pid"] = pid
-    p = await sync_to_async(Profile.objects.get)(id=pid)
     context.user_data["ha_pname"] = p.name
     await query.edit_message_text("👨‍⚕️ **Especialista**:", parse_mode="Markdown")
     return INPUT_SPEC
@@ -615,24 +671,33 @@ async def save_loc(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return CONFIRM_A
 
 
-async def finish_appointment(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def finish_appointment(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
     data = context.user_data
-    profile = await sync_to_async(Profile.objects.get)(id=data["ha_pid"])
     loc = data.get("ha_loc", "")
 
-    appt = await sync_to_async(Appointment.objects.create)(
-        profile=profile, specialist=data["ha_spec"], date=data["ha_date"], location=loc
+    appt = await create_appointment(
+        household_id,
+        data["ha_pid"],
+        specialist=data["ha_spec"],
+        date=data["ha_date"],
+        location=loc,
     )
+    profile = appt.profile
 
     # ALERTA POST-CITA (2 horas despues) para llenar resultados
     when_ask_results = data["ha_date"] + timedelta(minutes=15)  # hours=2
-    context.job_queue.run_once(
-        ask_results_alert_callback,
-        when=when_ask_results,
-        data={"appt_id": appt.id},
-        name=f"res_appt_{appt.id}",
+    await schedule_event(
+        profile.household_id,
+        ScheduledEvent.EventType.RESULTS_PROMPT,
+        when_ask_results,
+        {"appt_id": appt.id},
+        related_id=appt.id,
+        profile_id=profile.id,
     )
 
     await query.edit_message_text(f"✅ **Cita Agendada**", parse_mode="Markdown")
@@ -641,20 +706,9 @@ async def finish_appointment(update: Update, context: ContextTypes.DEFAULT_TYPE)
     date_str = data["ha_date"].strftime("%d/%m/%Y %I:%M %p")
     persistent_msg = f"📅 **NUEVA CITA REGISTRADA**\n━━━━━━━━━━━━━━━━━━\n👤 **{profile.name}**\n👨‍⚕️ **{data['ha_spec']}**\n🕒 **{date_str}**\n📍 {loc or 'No especificado'}\n━━━━━━━━━━━━━━━━━━\n🔔 *Todos los padres serán notificados.*"
 
-    users = await sync_to_async(list)(
-        UserAlertPreference.objects.filter(alert_appointments=True).select_related(
-            "user"
-        )
+    await send_alert(
+        context.bot, profile.household_id, "alert_appointments", persistent_msg
     )
-    for pref in users:
-        try:
-            await context.bot.send_message(
-                chat_id=pref.user.telegram_id,
-                text=persistent_msg,
-                parse_mode="Markdown",
-            )
-        except:
-            pass
 
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
@@ -666,13 +720,16 @@ async def finish_appointment(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def daily_appointment_check(context: ContextTypes.DEFAULT_TYPE):
     messages = await check_daily_alerts()
-    if messages:
-        for msg in messages:
-            await send_alert(context.bot, "alert_appointments", msg)
+    for household_id, msg in messages:
+        # Con workers en shards, cada familia la avisa solo su worker
+        if owns_household(household_id):
+            await send_alert(context.bot, household_id, "alert_appointments", msg)
 
 
 # HANDLERS
 treatment_conv = ConversationHandler(
+    name="treatment_conv",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_treatment, pattern="^new_treatment$")],
     states={
         SELECT_PROFILE_T: [CallbackQueryHandler(save_profile_t, pattern="^ht_prof_")],
@@ -694,6 +751,8 @@ treatment_conv = ConversationHandler(
 )
 
 appointment_conv = ConversationHandler(
+    name="appointment_conv",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_appointment, pattern="^new_appointment$")],
     states={
         SELECT_PROFILE_A: [CallbackQueryHandler(save_profile_a, pattern="^ha_prof_")],
@@ -710,6 +769,8 @@ appointment_conv = ConversationHandler(
 )
 
 results_conv = ConversationHandler(
+    name="results_conv",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_results_flow, pattern="^REG_RES_")],
     states={
         INPUT_WEIGHT: [MessageHandler(filters.TEXT, save_weight_res)],
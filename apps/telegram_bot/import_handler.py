@@ -1,7 +1,6 @@
 import logging
 import csv
 import io
-from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     ContextTypes,
@@ -11,35 +10,27 @@ from telegram.ext import (
     CallbackQueryHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
-from django.utils import timezone
 
-from apps.users.models import TelegramUser
-from apps.profiles.models import Profile
-from apps.nursery.models import DiaperLog
+from apps.nursery.importer import import_diaper_csv
+from apps.telegram_bot.auth import has_owner_role, with_user
 
 logger = logging.getLogger("apps.telegram_bot")
 
 # Estados
-WAITING_FOR_CSV = range(1)
+(WAITING_FOR_CSV,) = range(1)
 
 
 # --- COMANDO DE INICIO ---
-async def start_import_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_user
+async def start_import_command(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, user
+):
     """
     Punto de entrada: /carga_masiva_panales
     Solo permite acceso al OWNER.
     """
-    user = update.effective_user
-
     # 1. Verificación de Seguridad (Solo Owner)
-    is_owner = await sync_to_async(
-        TelegramUser.objects.filter(
-            telegram_id=user.id, role=TelegramUser.Role.OWNER
-        ).exists
-    )()
-
-    if not is_owner:
+    if not has_owner_role(user):
         await update.message.reply_text(
             "⛔ **Acceso Denegado:** Comando exclusivo para el Propietario."
         )
@@ -97,7 +88,8 @@ async def send_csv_template(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # --- PROCESAMIENTO DEL ARCHIVO ---
-async def process_csv_upload(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_user
+async def process_csv_upload(update: Update, context: ContextTypes.DEFAULT_TYPE, owner):
     """Recibe el archivo, lo lee y guarda en BD"""
     document = update.message.document
 
@@ -113,70 +105,19 @@ async def process_csv_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
         file = await document.get_file()
         byte_array = await file.download_as_bytearray()
 
-        # Decodificar
-        content = byte_array.decode("utf-8")
-        csv_file = io.StringIO(content)
-        reader = csv.DictReader(csv_file)
+        async def show_progress(processed, success, errors):
+            await context.bot.edit_message_text(
+                chat_id=update.effective_chat.id,
+                message_id=status_msg.message_id,
+                text=f"⏳ Procesando archivo... {processed} filas ({success} guardadas, {errors} errores)",
+            )
 
-        # Preparar datos auxiliares (Owner)
-        owner = await sync_to_async(TelegramUser.objects.get)(
-            telegram_id=update.effective_user.id
+        result = await import_diaper_csv(
+            byte_array, owner.household_id, owner.pk, on_progress=show_progress
         )
-
-        success_count = 0
-        error_count = 0
-        errors = []
-
-        # Iterar filas
-        for i, row in enumerate(reader, start=1):
-            try:
-                # 1. Buscar Perfil (Ignacio)
-                profile_name = row.get("perfil", "").strip()
-                profile = await sync_to_async(
-                    lambda: Profile.objects.filter(name__iexact=profile_name).first()
-                )()
-
-                if not profile:
-                    raise ValueError(f"Perfil '{profile_name}' no encontrado.")
-
-                # 2. Parsear Fecha y Hora
-                date_str = row.get("fecha", "").strip()
-                time_str = row.get("hora", "").strip()
-                dt_str = f"{date_str} {time_str}"
-
-                dt_naive = datetime.strptime(dt_str, "%d/%m/%Y %H:%M")
-                dt_aware = timezone.make_aware(
-                    dt_naive, timezone.get_current_timezone()
-                )
-
-                # 3. Validar Tipos
-                waste_map = {
-                    "PEE": "PEE",
-                    "POO": "POO",
-                    "BOTH": "BOTH",
-                    "PIPI": "PEE",
-                    "PUPU": "POO",
-                    "AMBOS": "BOTH",
-                }
-                waste_type = waste_map.get(row.get("tipo", "").upper(), "PEE")
-
-                size_label = row.get("talla", "").upper()
-                notes = row.get("notas", "")
-
-                # 4. Crear Registro
-                await sync_to_async(DiaperLog.objects.create)(
-                    profile=profile,
-                    reporter=owner,  # Se asigna al Owner como responsable del histórico
-                    time=dt_aware,
-                    waste_type=waste_type,
-                    size_label=size_label,
-                    notes=f"{notes} [Importado]",
-                )
-                success_count += 1
-
-            except Exception as e:
-                error_count += 1
-                errors.append(f"Fila {i}: {str(e)}")
+        success_count = result["success"]
+        error_count = result["errors"]
+        errors = result["error_details"]
 
         # Reporte Final
         report = (
@@ -186,6 +127,16 @@ async def process_csv_upload(update: Update, context: ContextTypes.DEFAULT_TYPE)
             f"⚠️ Errores: {error_count}\n"
         )
 
+        if result["aborted"]:
+            # Los bloques anteriores sí quedaron guardados: decimos hasta dónde
+            report = (
+                f"❌ **Importación Interrumpida**\n"
+                f"━━━━━━━━━━━━━━━━━━\n"
+                f"📥 Guardados: {success_count} (filas 1 a {result['saved_through']})\n"
+                f"⛔ Desde la fila {result['saved_through'] + 1} no se guardó nada.\n"
+                f"⚠️ Errores: {error_count}\n"
+            )
+
         if errors:
             # Mostrar primeros 3 errores si los hay
             report += "\n**Detalle de Errores (Primeros 3):**\n" + "\n".join(errors[:3])
@@ -215,6 +166,8 @@ async def cancel_import(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- DEFINICIÓN HANDLER ---
 import_conv_handler = ConversationHandler(
+    name="import_conv_handler",
+    persistent=True,
     entry_points=[CommandHandler("carga_masiva_panales", start_import_command)],
     states={
         WAITING_FOR_CSV: [
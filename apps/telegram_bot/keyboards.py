@@ -49,6 +49,11 @@ def get_config_menu():
         [
             InlineKeyboardButton("📦 Recargar Pañales", callback_data="restock_diapers")
         ],  # <--- NUEVO BOTÓN
+        [
+            InlineKeyboardButton(
+                "📈 Pronóstico Pañales", callback_data="diaper_forecast"
+            )
+        ],
         [InlineKeyboardButton("👥 Perfiles", callback_data="config_profiles")],
         [InlineKeyboardButton("🌐 Globales", callback_data="config_globals")],
         [
@@ -56,6 +61,7 @@ def get_config_menu():
                 "🔔 Notificaciones", callback_data="config_notifications"
             )
         ],
+        [InlineKeyboardButton("🔑 Invitar Familiar", callback_data="household_invite")],
         [InlineKeyboardButton("🔙 Volver", callback_data="main_menu")],
     ]
     return InlineKeyboardMarkup(keyboard)
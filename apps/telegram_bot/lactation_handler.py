@@ -8,13 +8,15 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
 from django.utils import timezone
 
-from apps.profiles.models import Profile
-from apps.users.models import TelegramUser
+from apps.profiles.repository import list_babies
 from apps.nursery.business import registrar_lactancia
+from apps.notifications.outbox import enqueue_alert, wake_outbox
 from apps.notifications.services import send_alert
+from apps.notifications.models import ScheduledEvent
+from apps.notifications.scheduler import schedule_event
+from apps.telegram_bot.auth import with_active_user, with_household
 from apps.telegram_bot.keyboards import get_main_menu
 
 logger = logging.getLogger("apps.telegram_bot")
@@ -42,7 +44,7 @@ async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- TAREA DE ALARMA (BROADCAST) ---
 async def alarm_lactation_callback(context: ContextTypes.DEFAULT_TYPE):
-    """Alerta global a todos los cuidadores"""
+    """Alerta a todos los cuidadores de la familia del bebé"""
     job = context.job
     profile_name = job.data.get("profile_name")
 
@@ -50,16 +52,17 @@ async def alarm_lactation_callback(context: ContextTypes.DEFAULT_TYPE):
 
     # Usamos send_alert con el tag 'alert_lactation' que configuramos en el Módulo 3.2
     # Esto enviará el mensaje a TODOS los usuarios que tengan activada esa preferencia.
-    await send_alert(context.bot, "alert_lactation", msg)
+    await send_alert(context.bot, job.data["household_id"], "alert_lactation", msg)
 
 
 # --- FLUJO ---
-async def start_lactation_flow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def start_lactation_flow(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
-    babies = await sync_to_async(list)(
-        Profile.objects.filter(profile_type=Profile.ProfileType.BABY)
-    )
+    babies = await list_babies(household_id)
 
     if len(babies) == 1:
         context.user_data["feed_profile_id"] = babies[0].id
@@ -152,16 +155,36 @@ async def save_manual_end(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 # --- FINALIZAR (PERSISTENCIA + BROADCAST) ---
-async def save_observation(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_active_user
+async def save_observation(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, reporter
+):
     obs = update.message.text
     if obs.lower() == "ninguna":
         obs = ""
 
     pid = context.user_data["feed_profile_id"]
     pname = context.user_data["feed_profile_name"]
-    reporter = await sync_to_async(TelegramUser.objects.get)(
-        telegram_id=update.effective_user.id
-    )
+
+    reporter_name = reporter.nickname or reporter.first_name
+
+    def notify(log, next_feed):
+        # 2. BROADCAST (Seguridad Global), encolado en la transacción del registro
+        # Avisar a los demás que el bebé ya comió
+        broadcast_msg = (
+            f"ℹ️ **AVISO DE LACTANCIA**\n\n"
+            f"**{reporter_name}** acaba de registrar una toma.\n"
+            f"👶 {pname} | ⏱️ {log.duration_minutes} min\n"
+            f"⏰ Próxima: {timezone.localtime(next_feed).strftime('%I:%M %p')}"
+        )
+        # A todos los que tengan alerta de lactancia (menos al que reportó, que ya ve el mensaje abajo)
+        enqueue_alert(
+            log.profile.household_id,
+            "alert_lactation",
+            broadcast_msg,
+            key=f"feeding_log:{log.id}",
+            exclude_user_id=reporter.telegram_id,
+        )
 
     log, next_feed = await registrar_lactancia(
         pid,
@@ -169,14 +192,18 @@ async def save_observation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.user_data["feed_end_time"],
         reporter,
         obs,
+        notify=notify,
     )
-
-    # Programar alarma
-    context.job_queue.run_once(
-        alarm_lactation_callback,
-        when=next_feed,
-        data={"profile_name": pname},
-        name=f"lactation_alert_{pid}",
+    wake_outbox(context.application)
+
+    # Programar alarma (persistida: sobrevive a reinicios; reemplaza la anterior)
+    await schedule_event(
+        log.profile.household_id,
+        ScheduledEvent.EventType.LACTATION_REMINDER,
+        next_feed,
+        {"profile_name": pname, "profile_id": pid},
+        related_id=pid,
+        profile_id=pid,
     )
 
     # 1. Mensaje Persistente al usuario actual
@@ -195,28 +222,13 @@ async def save_observation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(msg_history, parse_mode="Markdown")
     await update.message.reply_text("🏠 Menú Principal", reply_markup=get_main_menu())
 
-    # 2. BROADCAST (Seguridad Global)
-    # Avisar a los demás que el bebé ya comió
-    reporter_name = reporter.nickname or reporter.first_name
-    broadcast_msg = (
-        f"ℹ️ **AVISO DE LACTANCIA**\n\n"
-        f"**{reporter_name}** acaba de registrar una toma.\n"
-        f"👶 {pname} | ⏱️ {duration} min\n"
-        f"⏰ Próxima: {next_local}"
-    )
-    # Enviamos a todos los que tengan alerta de lactancia (menos al que reportó, que ya vio el mensaje arriba)
-    await send_alert(
-        context.bot,
-        "alert_lactation",
-        broadcast_msg,
-        exclude_user_id=reporter.telegram_id,
-    )
-
     return ConversationHandler.END
 
 
 # HANDLER
 lactation_conv_handler = ConversationHandler(
+    name="lactation_conv_handler",
+    persistent=True,
     entry_points=[
         CallbackQueryHandler(start_lactation_flow, pattern="^menu_lactation$")
     ],
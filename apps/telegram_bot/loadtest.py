@@ -0,0 +1,260 @@
+import asyncio
+import itertools
+import re
+import time
+
+from apps.telegram_bot.metrics import QUANTILES, percentile
+
+# --- PRUEBA DE CARGA (Driver) ---
+# Simula cuidadores que recorren los flujos reales del bot contra el servidor
+# falso de la Bot API (fake_api.FakeBotAPI). Cada cuidador es un chat privado;
+# cada paso espera la respuesta del bot antes de enviar el siguiente.
+
+# Rango reservado de telegram_id para los usuarios sintéticos
+LOADTEST_ID_BASE = 7_000_000_000
+# Espera máxima (segundos) por la respuesta a un paso
+STEP_TIMEOUT = 15
+
+
+def caregiver_id(household, index):
+    return LOADTEST_ID_BASE + household * 100 + index
+
+
+def send(text, expect=None, button=None):
+    """Paso: el usuario escribe `text`"""
+    return {"send": text, "tap": None, "expect": expect, "button": button}
+
+
+def tap(pattern, expect=None, button=None, optional=False):
+    """Paso: el usuario pulsa el botón cuyo callback_data cumple `pattern`"""
+    return {
+        "send": None,
+        "tap": pattern,
+        "expect": expect,
+        "button": button,
+        "optional": optional,
+    }
+
+
+# Cada paso termina cuando llega un mensaje con el texto `expect` y/o con un
+# botón que cumpla `button` (la pantalla siguiente)
+FLOWS = {
+    "diaper": [
+        send("/menu", button=r"^menu_diaper$"),
+        tap(r"^menu_diaper$", button=r"^(baby_|TIME_NOW$)"),
+        tap(r"^baby_", button=r"^TIME_NOW$", optional=True),
+        tap(r"^TIME_NOW$", button=r"^SIZE_"),
+        tap(r"^SIZE_", button=r"^PEE$"),
+        tap(r"^PEE$", expect=r"PAÑAL CAMBIADO"),
+    ],
+    "lactation": [
+        send("/menu", button=r"^menu_lactation$"),
+        tap(r"^menu_lactation$", button=r"^MODE_TIMER$"),
+        tap(r"^MODE_TIMER$", button=r"^STOP_TIMER$"),
+        tap(r"^STOP_TIMER$", expect=r"Observación"),
+        send("ninguna", expect=r"LACTANCIA REGISTRADA"),
+    ],
+    "treatment": [
+        send("/menu", button=r"^menu_health$"),
+        tap(r"^menu_health$", button=r"^new_treatment$"),
+        tap(r"^new_treatment$", button=r"^ht_prof_"),
+        tap(r"^ht_prof_", expect=r"Medicamento para"),
+        send("Paracetamol", expect=r"Dosis"),
+        send("5ml", expect=r"Frecuencia"),
+        send("8", expect=r"Duración"),
+        send("3", button=r"^START_NOW$"),
+        tap(r"^START_NOW$", button=r"^CONFIRM_T$"),
+        tap(r"^CONFIRM_T$", expect=r"Tratamiento Creado"),
+    ],
+    "report": [
+        send("/menu", button=r"^menu_status$"),
+        tap(r"^menu_status$", button=r"^(rep_prof_|REP_TODAY$)"),
+        tap(r"^rep_prof_", button=r"^REP_TODAY$", optional=True),
+        tap(r"^REP_TODAY$", button=r"^rep_prof_"),
+        tap(r"^rep_prof_", button=r"^REP_NEXT$"),
+        tap(r"^REP_NEXT$", button=r"^rep_prof_"),
+        tap(r"^rep_prof_", button=r"^REP_RANGE_7$"),
+        tap(r"^REP_RANGE_7$", button=r"^rep_prof_"),
+        # La conversación de reportes no termina sola: volvemos al menú
+        tap(r"^rep_prof_", button=r"^main_menu$"),
+        tap(r"^main_menu$", button=r"^menu_diaper$"),
+    ],
+}
+
+
+class FlowError(Exception):
+    """El bot no mostró lo que el flujo esperaba"""
+
+
+def _buttons(message):
+    markup = message.get("reply_markup") or {}
+    for row in markup.get("inline_keyboard", []):
+        for button in row:
+            if "callback_data" in button:
+                yield button["callback_data"]
+
+
+def _matches(message, step):
+    text = message.get("text") or message.get("caption") or ""
+    if step["expect"] and not re.search(step["expect"], text):
+        return False
+    if step["button"] and not any(
+        re.search(step["button"], data) for data in _buttons(message)
+    ):
+        return False
+    return True
+
+
+class Caregiver:
+    """Un usuario simulado con su chat privado"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, api, household, index):
+        self.api = api
+        self.user = {
+            "id": caregiver_id(household, index),
+            "is_bot": False,
+            "first_name": f"Cuidador {household}-{index}",
+        }
+        self.inbox = api.inbox(self.user["id"])
+        # Último mensaje del bot con botones (la "pantalla" actual)
+        self.screen = None
+
+    def _see(self, message):
+        if any(True for _ in _buttons(message)):
+            self.screen = message
+
+    def _drain(self):
+        while not self.inbox.empty():
+            self._see(self.inbox.get_nowait())
+
+    def _find_button(self, pattern):
+        if self.screen is None:
+            return None
+        for data in _buttons(self.screen):
+            if re.search(pattern, data):
+                return data
+        return None
+
+    def _message_update(self, text):
+        message = {
+            "message_id": next(self._ids),
+            "date": int(time.time()),
+            "chat": {"id": self.user["id"], "type": "private"},
+            "from": self.user,
+            "text": text,
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [
+                {"type": "bot_command", "offset": 0, "length": len(command)}
+            ]
+        return {"message": message}
+
+    def _callback_update(self, data):
+        return {
+            "callback_query": {
+                "id": str(next(self._ids)),
+                "from": self.user,
+                "chat_instance": str(self.user["id"]),
+                "data": data,
+                "message": self.screen,
+            }
+        }
+
+    async def _expect(self, step, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            message = await asyncio.wait_for(self.inbox.get(), max(remaining, 0))
+            self._see(message)
+            if _matches(message, step):
+                return
+
+    async def run_flow(self, steps, timeout=STEP_TIMEOUT):
+        for step in steps:
+            # Lo que llegó tarde del paso anterior solo actualiza la pantalla
+            self._drain()
+            if step["tap"]:
+                data = self._find_button(step["tap"])
+                if data is None:
+                    if step["optional"]:
+                        continue
+                    raise FlowError(f"sin botón {step['tap']}")
+                self.api.push_update(self._callback_update(data))
+            else:
+                self.api.push_update(self._message_update(step["send"]))
+            await self._expect(step, timeout)
+
+
+async def run_load(api, households, caregivers, rounds, step_timeout=STEP_TIMEOUT):
+    """
+    Todos los cuidadores de todas las casas a la vez; cada uno hace `rounds`
+    vueltas por los flujos (rotados para que en cada momento haya de todo).
+    Devuelve el reporte (dict) con throughput y percentiles por flujo.
+    """
+    names = list(FLOWS)
+    results = {name: {"latencies": [], "errors": 0, "timeouts": 0} for name in names}
+
+    async def caregiver_loop(caregiver, offset):
+        for _ in range(rounds):
+            for i in range(len(names)):
+                name = names[(offset + i) % len(names)]
+                start = time.perf_counter()
+                try:
+                    await caregiver.run_flow(FLOWS[name], step_timeout)
+                except asyncio.TimeoutError:
+                    results[name]["timeouts"] += 1
+                except FlowError:
+                    results[name]["errors"] += 1
+                else:
+                    results[name]["latencies"].append(
+                        (time.perf_counter() - start) * 1000
+                    )
+
+    crew = [Caregiver(api, h, k) for h in range(households) for k in range(caregivers)]
+    start = time.perf_counter()
+    await asyncio.gather(*(caregiver_loop(c, i) for i, c in enumerate(crew)))
+    elapsed = time.perf_counter() - start
+
+    flows = {}
+    for name, result in results.items():
+        latencies = result["latencies"]
+        flows[name] = {
+            "runs": len(latencies),
+            "errors": result["errors"],
+            "timeouts": result["timeouts"],
+            "per_second": round(len(latencies) / elapsed, 2),
+            "ms": {q: round(percentile(latencies, q), 1) for q in QUANTILES},
+        }
+    return {
+        "households": households,
+        "caregivers": len(crew),
+        "elapsed_s": round(elapsed, 2),
+        "updates_per_second": round(api.update_count / elapsed, 2),
+        "flows": flows,
+        "api_calls": dict(api.calls),
+    }
+
+
+def format_report(report):
+    """Tabla de texto para la consola"""
+    lines = [
+        f"🏠 {report['households']} casas | 👥 {report['caregivers']} cuidadores | "
+        f"⏱️ {report['elapsed_s']} s | 📨 {report['updates_per_second']} act/s",
+        "",
+        f"{'flujo':<10} {'ok':>5} {'err':>4} {'t/o':>4} {'flujo/s':>8} "
+        f"{'p50':>7} {'p95':>7} {'p99':>7}",
+    ]
+    for name, row in report["flows"].items():
+        ms = row["ms"]
+        lines.append(
+            f"{name:<10} {row['runs']:>5} {row['errors']:>4} {row['timeouts']:>4} "
+            f"{row['per_second']:>8.2f} {ms[0.5]:>7.0f} {ms[0.95]:>7.0f} "
+            f"{ms[0.99]:>7.0f}"
+        )
+    lines.append("")
+    calls = sorted(report["api_calls"].items(), key=lambda c: c[1], reverse=True)
+    lines.append("Bot API: " + ", ".join(f"{m}={n}" for m, n in calls))
+    return "\n".join(lines)
@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import signal
+import sys
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.core_config.models import DiaperSize
+from apps.households.models import Household
+from apps.notifications.models import UserAlertPreference
+from apps.nursery.ledger import set_quantity
+from apps.profiles.models import Profile
+from apps.telegram_bot.fake_api import FAKE_TOKEN, FakeBotAPI
+from apps.telegram_bot.loadtest import (
+    LOADTEST_ID_BASE,
+    STEP_TIMEOUT,
+    caregiver_id,
+    format_report,
+    run_load,
+)
+from apps.telegram_bot.models import BotData, ConversationState
+from apps.users.models import TelegramUser
+
+# Espera máxima (segundos) a que runbot haga su primer getUpdates
+BOT_START_TIMEOUT = 60
+LOADTEST_BABY_NAME = "Bebé Carga"
+LOADTEST_HOUSEHOLD_NAME = "Casa Carga {}"
+LOADTEST_SIZES = ("RN", "P", "M")
+LOADTEST_STOCK = 1_000_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga local: levanta una Bot API falsa, arranca runbot contra "
+        "ella y simula cuidadores usando los flujos de pañal, lactancia, "
+        "tratamiento y reportes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--households", type=int, default=5)
+        parser.add_argument(
+            "--caregivers", type=int, default=2, help="Cuidadores por casa"
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=3, help="Vueltas por los flujos"
+        )
+        parser.add_argument("--port", type=int, default=8081)
+        parser.add_argument(
+            "--database-url",
+            default=f"sqlite:///{settings.BASE_DIR / 'loadtest.sqlite3'}",
+            help="BD de la prueba (NUNCA la de producción)",
+        )
+        parser.add_argument("--step-timeout", type=float, default=STEP_TIMEOUT)
+        parser.add_argument(
+            "--external-bot",
+            action="store_true",
+            help="No lanzar runbot: ya corre con TELEGRAM_API_BASE_URL apuntando aquí",
+        )
+        parser.add_argument(
+            "--seed-only",
+            action="store_true",
+            help="Solo crear los datos sintéticos en la BD actual",
+        )
+        parser.add_argument(
+            "--bot-workers",
+            type=int,
+            default=1,
+            help="Lanzar runbot con --workers N (reparto por shards)",
+        )
+        parser.add_argument("--json", action="store_true", help="Reporte en JSON")
+
+    def handle(self, *args, **options):
+        if options["seed_only"]:
+            seed(options["households"], options["caregivers"])
+            self.stdout.write(self.style.SUCCESS("✅ Datos de carga listos."))
+            return
+
+        # Con --json la salida estándar queda solo para el reporte
+        self.quiet = options["json"]
+        report = asyncio.run(self._run(options))
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(format_report(report))
+
+    async def _run(self, options):
+        api = FakeBotAPI(port=options["port"])
+        await api.start()
+        bot = None
+        try:
+            if not options["external_bot"]:
+                bot = await self._start_bot(api, options)
+            self._progress("⏳ Esperando a que el bot se conecte...")
+            await asyncio.wait_for(api.polling.wait(), timeout=BOT_START_TIMEOUT)
+            return await run_load(
+                api,
+                options["households"],
+                options["caregivers"],
+                options["rounds"],
+                options["step_timeout"],
+            )
+        except asyncio.TimeoutError:
+            raise CommandError("El bot no se conectó a la Bot API falsa.")
+        finally:
+            if bot is not None and bot.returncode is None:
+                # SIGINT = apagado limpio de PTB (vuelca la persistencia)
+                bot.send_signal(signal.SIGINT)
+                await bot.wait()
+            await api.stop()
+
+    async def _start_bot(self, api, options):
+        # El bot hijo usa la BD de la prueba y la Bot API falsa
+        env = {
+            **os.environ,
+            "DATABASE_URL": options["database_url"],
+            "TELEGRAM_TOKEN": FAKE_TOKEN,
+            "TELEGRAM_API_BASE_URL": api.base_url,
+            "TELEGRAM_USE_POLLING": "True",
+            "TELEGRAM_WEBHOOK_URL": "",
+        }
+        await self._manage(env, "migrate", "--noinput")
+        await self._manage(
+            env,
+            "loadtest",
+            "--seed-only",
+            "--households",
+            str(options["households"]),
+            "--caregivers",
+            str(options["caregivers"]),
+        )
+        self._progress("🤖 Arrancando runbot...")
+        return await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "runbot",
+            "--workers",
+            str(options["bot_workers"]),
+            env=env,
+            stdout=asyncio.subprocess.DEVNULL,
+        )
+
+    def _progress(self, message):
+        if not self.quiet:
+            self.stdout.write(message)
+
+    async def _manage(self, env, *args):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            *args,
+            env=env,
+            stdout=asyncio.subprocess.DEVNULL,
+        )
+        if await process.wait() != 0:
+            raise CommandError(f"Falló `manage.py {' '.join(args)}`")
+
+
+def seed(households, caregivers):
+    """
+    Una familia por casa con sus usuarios sintéticos (rango reservado de IDs;
+    el primero es el Owner), un bebé, tallas con stock de sobra y preferencias
+    de alerta. Idempotente: borra el estado de conversaciones de corridas
+    anteriores para empezar limpio.
+    """
+    with transaction.atomic():
+        for h in range(households):
+            name = LOADTEST_HOUSEHOLD_NAME.format(h)
+            household = Household.objects.filter(name=name).first()
+            if household is None:
+                household = Household.objects.create(name=name)
+
+            for k in range(caregivers):
+                user, _ = TelegramUser.objects.get_or_create(
+                    telegram_id=caregiver_id(h, k),
+                    defaults={
+                        "household": household,
+                        "first_name": f"Cuidador {h}-{k}",
+                        "role": (
+                            TelegramUser.Role.OWNER
+                            if k == 0
+                            else TelegramUser.Role.ADMIN
+                        ),
+                        "is_active": True,
+                    },
+                )
+                UserAlertPreference.objects.get_or_create(user=user)
+
+            # Un solo bebé por casa: la lactancia se salta la selección solo si hay uno
+            Profile.objects.get_or_create(
+                household=household,
+                name=LOADTEST_BABY_NAME,
+                profile_type=Profile.ProfileType.BABY,
+                defaults={"birth_date": date.today() - timedelta(days=60)},
+            )
+
+            for order, label in enumerate(LOADTEST_SIZES):
+                size, _ = DiaperSize.objects.update_or_create(
+                    household=household,
+                    label=label,
+                    defaults={"is_active": True, "order": order},
+                )
+                set_quantity(size, LOADTEST_STOCK, note="Prueba de carga")
+
+        BotData.objects.filter(object_id__gte=LOADTEST_ID_BASE).delete()
+        stale = [
+            pk
+            for pk, key in ConversationState.objects.values_list("pk", "key")
+            if json.loads(key)[0] >= LOADTEST_ID_BASE
+        ]
+        ConversationState.objects.filter(pk__in=stale).delete()
@@ -0,0 +1,311 @@
+import contextlib
+import contextvars
+import functools
+import glob
+import json
+import math
+import os
+import time
+from collections import deque
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from telegram.ext import ConversationHandler, JobQueue
+from telegram.request import HTTPXRequest
+
+# --- MÉTRICAS EN MEMORIA (por proceso) ---
+# Cada handler / job / método de la API de Telegram tiene una serie con las
+# últimas ROLLING_WINDOW muestras: tiempo total, consultas ORM, llamadas a la API
+# de Telegram y su latencia. Los percentiles se calculan sobre esa ventana.
+ROLLING_WINDOW = 500
+QUANTILES = (0.5, 0.95, 0.99)
+# Cada cuánto runbot vuelca la foto a disco para el /metrics de Django
+METRICS_SNAPSHOT_SECONDS = 60
+# Fotos de workers más viejas que esto son de procesos que ya no existen
+SNAPSHOT_MAX_AGE = 3 * METRICS_SNAPSHOT_SECONDS
+
+_series = {}
+
+# Muestra de la ejecución en curso (handler o job); None fuera de ellas
+_current = contextvars.ContextVar("babybot_metrics_sample", default=None)
+
+
+def _new_series():
+    return {
+        "calls": 0,
+        "errors": 0,
+        "wall_ms": deque(maxlen=ROLLING_WINDOW),
+        "queries": deque(maxlen=ROLLING_WINDOW),
+        "api_calls": deque(maxlen=ROLLING_WINDOW),
+        "api_ms": deque(maxlen=ROLLING_WINDOW),
+    }
+
+
+def _record(name, wall_ms, sample=None, failed=False):
+    series = _series.get(name)
+    if series is None:
+        series = _series[name] = _new_series()
+    series["calls"] += 1
+    series["errors"] += int(failed)
+    series["wall_ms"].append(wall_ms)
+    if sample is not None:
+        series["queries"].append(sample["queries"])
+        series["api_calls"].append(sample["api_calls"])
+        series["api_ms"].append(sample["api_ms"])
+
+
+def record_error(name):
+    """Errores que no pasan por el wrapper (ej. los que PTB atrapa en los jobs)"""
+    series = _series.get(name)
+    if series is None:
+        series = _series[name] = _new_series()
+    series["errors"] += 1
+
+
+def observe(name, value_ms):
+    """Muestra suelta (ej. retraso de los recordatorios) en la serie `name`"""
+    _record(name, value_ms)
+
+
+def reset():
+    _series.clear()
+
+
+@contextlib.asynccontextmanager
+async def track(name):
+    """Mide todo lo que ocurre dentro del bloque y lo suma a la serie `name`"""
+    sample = {"queries": 0, "api_calls": 0, "api_ms": 0.0}
+    token = _current.set(sample)
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield sample
+    except Exception:
+        failed = True
+        raise
+    finally:
+        _current.reset(token)
+        _record(name, (time.perf_counter() - start) * 1000, sample, failed)
+
+
+# --- CONSULTAS ORM ---
+
+
+def _count_query(execute, sql, params, many, context):
+    # Los hilos del pool de BD heredan el contexto (sync_to_async lo copia)
+    sample = _current.get()
+    if sample is not None:
+        sample["queries"] += 1
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_counter(sender, connection, **kwargs):
+    """Cada conexión nueva (una por hilo) cuenta sus consultas"""
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+# --- API DE TELEGRAM ---
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest que mide cada llamada a la Bot API"""
+
+    async def do_request(self, url, method, *args, **kwargs):
+        start = time.perf_counter()
+        failed = False
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            sample = _current.get()
+            if sample is not None:
+                sample["api_calls"] += 1
+                sample["api_ms"] += elapsed
+            _record(f"api:{url.rsplit('/', 1)[-1]}", elapsed, failed=failed)
+
+
+# --- HANDLERS Y JOBS ---
+
+
+def callback_name(callback):
+    module = callback.__module__.rsplit(".", 1)[-1]
+    return f"{module}.{callback.__name__}"
+
+
+def instrument(callback):
+    """Envuelve el callback de un handler (idempotente)"""
+    if getattr(callback, "_instrumented", False):
+        return callback
+    name = callback_name(callback)
+
+    @functools.wraps(callback)
+    async def wrapper(*args, **kwargs):
+        async with track(name):
+            return await callback(*args, **kwargs)
+
+    wrapper._instrumented = True
+    return wrapper
+
+
+def _instrument_handler(handler):
+    if isinstance(handler, ConversationHandler):
+        for state_handlers in handler.states.values():
+            for child in state_handlers:
+                _instrument_handler(child)
+        for child in handler.entry_points + handler.fallbacks:
+            _instrument_handler(child)
+        return
+    if getattr(handler, "callback", None) is not None:
+        handler.callback = instrument(handler.callback)
+
+
+def instrument_handlers(application):
+    """Envuelve todos los handlers registrados (incluidos los de conversaciones)"""
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            _instrument_handler(handler)
+
+
+class InstrumentedJobQueue(JobQueue):
+    """JobQueue que mide cada ejecución de job (programados, alarmas, sondeo)"""
+
+    @staticmethod
+    async def job_callback(job_queue, job):
+        async with track(f"job:{callback_name(job.callback)}"):
+            await job.run(job_queue.application)
+
+
+# --- EXPOSICIÓN ---
+
+
+def percentile(values, q):
+    """Percentil por rango más cercano"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def snapshot():
+    """Lista de dicts (uno por serie) con contadores y percentiles"""
+    rows = []
+    for name, series in sorted(_series.items()):
+        row = {"name": name, "calls": series["calls"], "errors": series["errors"]}
+        for field in ("wall_ms", "queries", "api_calls", "api_ms"):
+            values = list(series[field])
+            # Las series de la API solo tienen tiempo: sin muestras = sin campo
+            row[field] = (
+                {q: percentile(values, q) for q in QUANTILES} if values else None
+            )
+        rows.append(row)
+    return rows
+
+
+def merge_rows(rows):
+    """
+    Une las filas de varios procesos por serie: llamadas y errores se suman;
+    de cada percentil queda el peor (no se pueden combinar exactos).
+    """
+    merged = {}
+    for row in rows:
+        current = merged.get(row["name"])
+        if current is None:
+            merged[row["name"]] = {k: v for k, v in row.items() if k != "worker"}
+            continue
+        current["calls"] += row["calls"]
+        current["errors"] += row["errors"]
+        for field in ("wall_ms", "queries", "api_calls", "api_ms"):
+            if row[field] is None:
+                continue
+            if current[field] is None:
+                current[field] = dict(row[field])
+            else:
+                for q, value in row[field].items():
+                    current[field][q] = max(current[field].get(q, value), value)
+    return [merged[name] for name in sorted(merged)]
+
+
+def _labels(row):
+    worker = row.get("worker")
+    label = f'name="{row["name"]}"'
+    return label if worker is None else f'{label},worker="{worker}"'
+
+
+def render_text(rows=None):
+    """Formato de texto estilo Prometheus (filas con "worker" llevan esa etiqueta)"""
+    rows = snapshot() if rows is None else rows
+    lines = [
+        "# TYPE babybot_calls_total counter",
+        "# TYPE babybot_errors_total counter",
+    ]
+    for row in rows:
+        label = _labels(row)
+        lines.append(f"babybot_calls_total{{{label}}} {row['calls']}")
+        lines.append(f"babybot_errors_total{{{label}}} {row['errors']}")
+    for field in ("wall_ms", "queries", "api_calls", "api_ms"):
+        lines.append(f"# TYPE babybot_{field} summary")
+        for row in rows:
+            for q, value in (row[field] or {}).items():
+                lines.append(
+                    f'babybot_{field}{{{_labels(row)},quantile="{q}"}} ' f"{value:.2f}"
+                )
+    return "\n".join(lines) + "\n"
+
+
+def worker_snapshot_path(worker_id):
+    return f"{settings.BOT_METRICS_FILE}.{worker_id}"
+
+
+def write_snapshot(path=None):
+    """Vuelca la foto (filas en JSON, escritura atómica) para otro proceso"""
+    path = path or settings.BOT_METRICS_FILE
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path=None):
+    """Filas de una foto, o None si no existe o no se puede leer"""
+    path = path or settings.BOT_METRICS_FILE
+    try:
+        with open(path, encoding="utf-8") as f:
+            rows = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # JSON guarda las claves de los percentiles como texto
+    for row in rows:
+        for field in ("wall_ms", "queries", "api_calls", "api_ms"):
+            if row[field] is not None:
+                row[field] = {float(q): v for q, v in row[field].items()}
+    return rows
+
+
+def read_worker_snapshots(exclude=None):
+    """
+    Fotos vigentes de los workers (runbot --workers N) como filas con su
+    etiqueta "worker". Las de procesos que ya no escriben se ignoran.
+    """
+    rows = []
+    now = time.time()
+    for path in sorted(glob.glob(worker_snapshot_path("*"))):
+        worker = path.rsplit(".", 1)[-1]
+        if not worker.isdigit() or int(worker) == exclude:
+            continue
+        try:
+            if now - os.path.getmtime(path) > SNAPSHOT_MAX_AGE:
+                continue
+        except OSError:
+            continue
+        for row in read_snapshot(path) or []:
+            rows.append({**row, "worker": worker})
+    return rows
+
+
+def has_data():
+    return bool(_series)
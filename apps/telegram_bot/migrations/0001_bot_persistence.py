@@ -0,0 +1,48 @@
+# Generated by Django 4.2.28 on 2026-10-17 22:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('USER', 'Usuario'), ('CHAT', 'Chat')], max_length=4)),
+                ('object_id', models.BigIntegerField(verbose_name='ID Telegram')),
+                ('data', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Datos del Bot',
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversationState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, verbose_name='Conversación')),
+                ('key', models.CharField(max_length=128, verbose_name='Clave (chat, usuario)')),
+                ('state', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estado de Conversación',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='conversationstate',
+            constraint=models.UniqueConstraint(fields=('name', 'key'), name='telegram_conv_name_key_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='botdata',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='telegram_botdata_kind_obj_uniq'),
+        ),
+    ]
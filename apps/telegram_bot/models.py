@@ -1,3 +1,45 @@
 from django.db import models
 
-# Create your models here.
+
+class BotData(models.Model):
+    """user_data / chat_data de PTB serializados (pickle). Una fila por usuario/chat."""
+
+    class Kind(models.TextChoices):
+        USER = "USER", "Usuario"
+        CHAT = "CHAT", "Chat"
+
+    kind = models.CharField(max_length=4, choices=Kind.choices)
+    object_id = models.BigIntegerField(verbose_name="ID Telegram")
+    data = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Datos del Bot"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "object_id"], name="telegram_botdata_kind_obj_uniq"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}"
+
+
+class ConversationState(models.Model):
+    """Estado actual de cada ConversationHandler persistente"""
+
+    name = models.CharField(max_length=64, verbose_name="Conversación")
+    key = models.CharField(max_length=128, verbose_name="Clave (chat, usuario)")
+    state = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estado de Conversación"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "key"], name="telegram_conv_name_key_uniq"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} {self.key} -> {self.state}"
@@ -1,23 +1,24 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, error
 from telegram.ext import ContextTypes, CallbackQueryHandler
-from asgiref.sync import sync_to_async
-from apps.users.models import TelegramUser
-from apps.notifications.utils import get_or_create_preferences, toggle_preference
+from apps.users.repository import list_active_users
+from apps.notifications.repository import get_or_create_preferences, toggle_preference
+from apps.telegram_bot.auth import with_household
 
 # Logger (Capa Transversal)
 logger = logging.getLogger("apps.telegram_bot")
 
 
+@with_household
 async def show_users_for_notifications(
-    update: Update, context: ContextTypes.DEFAULT_TYPE
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
 ):
-    """Muestra la lista de usuarios activos para configurar sus alertas"""
+    """Muestra la lista de usuarios activos de la familia para configurar sus alertas"""
     query = update.callback_query
     await query.answer()
 
     # Obtener usuarios activos
-    users = await sync_to_async(list)(TelegramUser.objects.filter(is_active=True))
+    users = await list_active_users(household_id)
 
     keyboard = []
     for user in users:
@@ -42,21 +43,19 @@ async def show_users_for_notifications(
 
 
 # --- FUNCIÓN AUXILIAR DE RENDERIZADO (DRY Principle) ---
-async def render_preferences_panel(query, target_user_id):
+async def render_preferences_panel(query, household_id, target_user_id):
     """
     Función encargada de construir y mostrar el panel de interruptores.
     Se usa tanto al entrar al menú como al actualizar un switch.
     """
     # 1. Obtener preferencias
-    prefs = await get_or_create_preferences(target_user_id)
+    prefs = await get_or_create_preferences(household_id, target_user_id)
     if not prefs:
         await query.answer("Error: Usuario no encontrado.", show_alert=True)
         return
 
-    # 2. Obtener nombre para el título
-    target_user = await sync_to_async(TelegramUser.objects.get)(
-        telegram_id=target_user_id
-    )
+    # 2. Obtener nombre para el título (las preferencias ya traen al usuario)
+    target_user = prefs.user
     name = target_user.nickname or target_user.first_name
 
     # 3. Construir botones dinámicos (Check/Cross)
@@ -95,18 +94,22 @@ async def render_preferences_panel(query, target_user_id):
 # --- HANDLERS PRINCIPALES ---
 
 
-async def show_user_preferences(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def show_user_preferences(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     """Muestra los switches de alerta para un usuario específico (Entrada inicial)"""
     query = update.callback_query
     # Extraer ID del usuario objetivo desde "config_notif_user_12345"
     target_user_id = int(query.data.split("_")[3])
 
     # Llamamos al renderizador
-    await render_preferences_panel(query, target_user_id)
+    await render_preferences_panel(query, household_id, target_user_id)
 
 
+@with_household
 async def toggle_notification_setting(
-    update: Update, context: ContextTypes.DEFAULT_TYPE
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
 ):
     """Acción al pulsar un switch"""
     query = update.callback_query
@@ -119,7 +122,7 @@ async def toggle_notification_setting(
     field_name = "_".join(data[3:])  # reconstruir 'alert_diapers', etc.
 
     # Ejecutar cambio en BD
-    prefs, new_state = await toggle_preference(target_user_id, field_name)
+    prefs, new_state = await toggle_preference(household_id, target_user_id, field_name)
 
     if prefs:
         # LOGGING (Capa Transversal)
@@ -131,6 +134,6 @@ async def toggle_notification_setting(
 
         # REFRESCAR LA VISTA: Llamamos directamente a la función auxiliar pasando el ID
         # Ya no intentamos modificar query.data, lo cual era ilegal.
-        await render_preferences_panel(query, target_user_id)
+        await render_preferences_panel(query, household_id, target_user_id)
     else:
         await query.answer("Error al guardar preferencia.", show_alert=True)
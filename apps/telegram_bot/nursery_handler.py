@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     ContextTypes,
@@ -8,15 +8,14 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
 from django.utils import timezone
 
-from apps.core_config.models import DiaperSize
 from apps.profiles.models import Profile
-from apps.users.models import TelegramUser
-from apps.nursery.models import DiaperInventory
+from apps.profiles.repository import get_profile, list_babies
+from apps.nursery.repository import add_stock, list_forecasts, list_sizes
 from apps.nursery.business import registrar_uso_panal
-from apps.notifications.services import send_alert
+from apps.notifications.outbox import enqueue_alert, wake_outbox
+from apps.telegram_bot.auth import with_active_user, with_household
 from apps.telegram_bot.keyboards import get_main_menu, get_config_menu
 
 logger = logging.getLogger("apps.telegram_bot")
@@ -49,12 +48,14 @@ async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 # --- FLUJO 4.1: REGISTRO DE USO ---
 
 
-async def start_diaper_flow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def start_diaper_flow(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
-    babies = await sync_to_async(list)(
-        Profile.objects.filter(profile_type=Profile.ProfileType.BABY)
-    )
+    context.user_data["diaper_household_id"] = household_id
+    babies = await list_babies(household_id)
 
     if not babies:
         await query.edit_message_text("⚠️ No hay perfiles de Bebé registrados.")
@@ -76,11 +77,18 @@ async def start_diaper_flow(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_PROFILE
 
 
-async def save_profile_ask_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_profile_ask_time(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
     baby_id = int(query.data.split("_")[1])
-    baby = await sync_to_async(Profile.objects.get)(id=baby_id)
+    try:
+        baby = await get_profile(household_id, baby_id)
+    except Profile.DoesNotExist:
+        await query.edit_message_text("⚠️ Perfil no encontrado.")
+        return ConversationHandler.END
     context.user_data["diaper_profile_id"] = baby_id
     context.user_data["diaper_profile_name"] = baby.name
     return await ask_time_step(update, context, is_new=False)
@@ -137,9 +145,7 @@ async def save_manual_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def ask_size_step(
     update: Update, context: ContextTypes.DEFAULT_TYPE, from_msg=False
 ):
-    sizes = await sync_to_async(list)(
-        DiaperSize.objects.filter(is_active=True).order_by("order")
-    )
+    sizes = await list_sizes(context.user_data["diaper_household_id"], active_only=True)
     keyboard = []
     row = []
     for s in sizes:
@@ -181,22 +187,41 @@ async def save_size_ask_type(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return SELECT_TYPE
 
 
-async def finish_diaper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_active_user
+async def finish_diaper(update: Update, context: ContextTypes.DEFAULT_TYPE, reporter):
     query = update.callback_query
     await query.answer()
 
     waste = query.data
-    reporter = await sync_to_async(TelegramUser.objects.get)(
-        telegram_id=update.effective_user.id
-    )
 
-    log, stock, alert = await registrar_uso_panal(
+    def notify(log, stock, days_left):
+        # En la transacción del registro: el aviso sale si (y solo si) se guarda
+        alert_msg = (
+            f"⚠️ **Alerta de Stock:** Quedan {stock} pañales talla {log.size_label}."
+        )
+        if days_left is not None:
+            runout = timezone.localdate() + timedelta(days=int(days_left))
+            alert_msg += (
+                f"\n📉 Alcanzan para ≈ {days_left:.1f} días "
+                f"(hasta el {runout.strftime('%d/%m')})."
+            )
+        enqueue_alert(
+            log.profile.household_id,
+            "alert_diapers",
+            alert_msg,
+            key=f"diaper_log:{log.id}",
+        )
+
+    log, stock, alert, days_left = await registrar_uso_panal(
         profile_id=context.user_data["diaper_profile_id"],
         size_label=context.user_data["diaper_size"],
         waste_type=waste,
         reporter_user=reporter,
         timestamp=context.user_data.get("diaper_time"),
+        notify=notify,
     )
+    if alert:
+        wake_outbox(context.application)
 
     icon = {"PEE": "💧 Pipí", "POO": "💩 Popó", "BOTH": "☣️ Ambos"}.get(waste, waste)
     time_str = timezone.localtime(log.time).strftime("%I:%M %p")
@@ -231,23 +256,19 @@ async def finish_diaper(update: Update, context: ContextTypes.DEFAULT_TYPE):
         reply_markup=get_main_menu(),
     )
 
-    if alert:
-        await send_alert(
-            context.bot,
-            "alert_diapers",
-            f"⚠️ **Alerta de Stock:** Quedan {stock} pañales talla {log.size_label}.",
-        )
-
     return ConversationHandler.END
 
 
 # --- FLUJO 4.2: RECARGA ---
 
 
-async def start_restock_flow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def start_restock_flow(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
-    sizes = await sync_to_async(list)(DiaperSize.objects.all().order_by("order"))
+    sizes = await list_sizes(household_id)
     keyboard = []
     row = []
     for s in sizes:
@@ -279,7 +300,8 @@ async def save_size_ask_qty(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return INPUT_QTY_RESTOCK
 
 
-async def save_qty_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_active_user
+async def save_qty_finish(update: Update, context: ContextTypes.DEFAULT_TYPE, user):
     if not update.message.text.isdigit():
         await update.message.reply_text("⚠️ Solo números.")
         return INPUT_QTY_RESTOCK
@@ -287,16 +309,11 @@ async def save_qty_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
     qty = int(update.message.text)
     size = context.user_data["restock_size"]
 
-    size_obj = await sync_to_async(DiaperSize.objects.get)(label=size)
-    inv, _ = await sync_to_async(DiaperInventory.objects.get_or_create)(
-        size=size_obj, defaults={"quantity": 0}
-    )
-    inv.quantity += qty
-    await sync_to_async(inv.save)()
+    total = await add_stock(user.household_id, size, qty, user=user)
 
     # Mensaje Persistente
     await update.message.reply_text(
-        f"✅ **INVENTARIO ACTUALIZADO**\n📦 Talla: {size}\n➕ Ingreso: {qty}\n💰 Total: {inv.quantity}",
+        f"✅ **INVENTARIO ACTUALIZADO**\n📦 Talla: {size}\n➕ Ingreso: {qty}\n💰 Total: {total}",
         parse_mode="Markdown",
     )
 
@@ -304,8 +321,44 @@ async def save_qty_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 
+# --- PRONÓSTICO DE PAÑALES ---
+
+
+@with_household
+async def show_diaper_forecast(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
+    query = update.callback_query
+    await query.answer()
+
+    forecasts = await list_forecasts(household_id)
+    lines = ["📈 **Pronóstico de Pañales**", ""]
+    for f in forecasts:
+        if f["daily_rate"] is None:
+            lines.append(f"📏 **{f['label']}**: {f['quantity']} u. | sin consumo aún")
+        elif f["days_left"] is None:
+            lines.append(f"📏 **{f['label']}**: {f['quantity']} u. | sin uso reciente")
+        else:
+            lines.append(
+                f"📏 **{f['label']}**: {f['quantity']} u. | "
+                f"{f['daily_rate']:.1f}/día | ≈ {f['days_left']:.0f} días "
+                f"(→ {f['runout'].strftime('%d/%m')})"
+            )
+    if not forecasts:
+        lines.append("No hay tallas activas.")
+
+    keyboard = [[InlineKeyboardButton("🔙 Volver", callback_data="menu_config")]]
+    await query.edit_message_text(
+        "\n".join(lines),
+        reply_markup=InlineKeyboardMarkup(keyboard),
+        parse_mode="Markdown",
+    )
+
+
 # HANDLERS
 diaper_conv_handler = ConversationHandler(
+    name="diaper_conv_handler",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_diaper_flow, pattern="^menu_diaper$")],
     states={
         SELECT_PROFILE: [
@@ -324,6 +377,8 @@ diaper_conv_handler = ConversationHandler(
 )
 
 restock_conv_handler = ConversationHandler(
+    name="restock_conv_handler",
+    persistent=True,
     entry_points=[
         CallbackQueryHandler(start_restock_flow, pattern="^restock_diapers$")
     ],
@@ -11,8 +11,9 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
+from apps.households.repository import create_household, find_household_by_invite
 from apps.users.models import TelegramUser
+from apps.users.repository import create_user, find_user, get_owner
 
 # Logger (Capa Transversal)
 logger = logging.getLogger("apps.telegram_bot")
@@ -22,16 +23,14 @@ ASKING_NICKNAME = 1
 
 
 async def send_auth_request_to_owner(
-    context: ContextTypes.DEFAULT_TYPE, user_requesting
+    context: ContextTypes.DEFAULT_TYPE, user_requesting, household_id
 ):
     """
-    Función auxiliar para enviar la alerta al Owner con botones.
+    Función auxiliar para enviar la alerta al Owner de la familia con botones.
     Se usa tanto para usuarios nuevos como para reintentos.
     """
-    # Buscamos al Owner
-    owner = await sync_to_async(
-        TelegramUser.objects.filter(role=TelegramUser.Role.OWNER).first
-    )()
+    # Buscamos al Owner de esa familia
+    owner = await get_owner(household_id)
 
     if owner:
         # Creamos los botones con el ID del solicitante
@@ -67,21 +66,16 @@ async def send_auth_request_to_owner(
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    Flujo 1.1 y 1.2: Punto de entrada /start
+    Flujo 1.1 y 1.2: Punto de entrada /start [código de invitación]
     """
     user = update.effective_user
     logger.info(f"Usuario {user.id} ({user.first_name}) inició el bot.")
 
-    # Consultas a BD
-    user_count = await sync_to_async(TelegramUser.objects.count)()
-    user_exists = await sync_to_async(
-        TelegramUser.objects.filter(telegram_id=user.id).exists
-    )()
+    # Desde la caché de usuarios (sin consulta si está caliente)
+    db_user = await find_user(user.id)
 
     # --- CASO A: EL USUARIO YA EXISTE EN BD ---
-    if user_exists:
-        db_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=user.id)
-
+    if db_user:
         if db_user.is_active:
             # Ya está aprobado
             await update.message.reply_text(f"👋 Hola de nuevo, {db_user.nickname}.")
@@ -92,29 +86,28 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "Tu usuario ya existe pero no ha sido aprobado.\n"
                 "🔔 He vuelto a notificar al administrador."
             )
-            await send_auth_request_to_owner(context, user)
+            await send_auth_request_to_owner(context, user, db_user.household_id)
 
         return ConversationHandler.END
 
-    # --- CASO B: BASE DE DATOS VACÍA (PRIMER USUARIO = OWNER) ---
-    if user_count == 0:
-        await update.message.reply_text(
-            "👑 **¡Bienvenido! Sistema Inicializado.**\n\n"
-            "Se ha detectado que eres el primer usuario. Se te asignará el rol de **OWNER**.\n"
-            "Para comenzar, ¿qué apodo usarás en los registros? (Ej: Papá)."
-        )
-        context.user_data["role"] = TelegramUser.Role.OWNER
-        return ASKING_NICKNAME
+    # --- CASO B: NUEVO USUARIO INVITADO (FLUJO 1.2, /start <código>) ---
+    if context.args:
+        household = await find_household_by_invite(context.args[0])
+        if household is None:
+            await update.message.reply_text(
+                "⚠️ **Código de invitación no válido.**\n"
+                "Pide al dueño de la familia un enlace nuevo."
+            )
+            return ConversationHandler.END
 
-    # --- CASO C: NUEVO USUARIO INVITADO (FLUJO 1.2) ---
-    else:
         await update.message.reply_text(
             "⛔ **Acceso Restringido**\n"
-            "Se ha enviado una solicitud al administrador."
+            f"Se ha enviado una solicitud al administrador de {household.name}."
         )
 
-        # Crear usuario inactivo en BD
-        await sync_to_async(TelegramUser.objects.create)(
+        # Crear usuario inactivo en BD (ya ligado a la familia que lo invitó)
+        await create_user(
+            household=household,
             telegram_id=user.id,
             first_name=user.first_name,
             username=user.username,
@@ -122,36 +115,48 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
             is_active=False,
         )
 
-        # Enviar alerta al Owner
-        await send_auth_request_to_owner(context, user)
+        # Enviar alerta al Owner de esa familia
+        await send_auth_request_to_owner(context, user, household.id)
 
         return ConversationHandler.END
 
+    # --- CASO C: SIN INVITACIÓN (FAMILIA NUEVA, EL USUARIO ES SU OWNER) ---
+    await update.message.reply_text(
+        "👑 **¡Bienvenido!**\n\n"
+        "Crearemos una familia nueva y tendrás el rol de **OWNER**.\n"
+        "(Si alguien te invitó, usa el enlace que te compartió.)\n"
+        "Para comenzar, ¿qué apodo usarás en los registros? (Ej: Papá)."
+    )
+    return ASKING_NICKNAME
+
 
 async def save_nickname(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Flujo 1.1: Guardar apodo del Owner"""
+    """Flujo 1.1: Guardar apodo del Owner y crear su familia"""
     nickname = update.message.text
     user = update.effective_user
-    role = context.user_data.get("role", TelegramUser.Role.GUEST)
 
-    # Crear al Owner en BD
-    await sync_to_async(TelegramUser.objects.create)(
+    # Familia + Owner en una sola transacción
+    household, _ = await create_household(
+        f"Casa de {nickname}",
         telegram_id=user.id,
         first_name=user.first_name,
         username=user.username,
         nickname=nickname,
-        role=role,
-        is_active=True,
     )
 
-    logger.info(f"Nuevo usuario registrado: {nickname} ({role})")
-    await update.message.reply_text(f"✅ Configurado. Hola {nickname}.")
+    logger.info(f"Nueva familia {household.id} creada por {nickname}")
+    await update.message.reply_text(
+        f"✅ Configurado. Hola {nickname}.\n"
+        "Invita a los demás desde ⚙️ Configuración → 🔑 Invitar Familiar."
+    )
 
     return ConversationHandler.END
 
 
 # Definición del manejador
 onboarding_handler = ConversationHandler(
+    name="onboarding_handler",
+    persistent=True,
     entry_points=[CommandHandler("start", start_command)],
     states={
         ASKING_NICKNAME: [
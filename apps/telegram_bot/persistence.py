@@ -0,0 +1,319 @@
+import asyncio
+import json
+import logging
+import pickle
+from apps.core_config.db import db_sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from telegram.ext import BasePersistence, ConversationHandler, PersistenceInput
+
+from apps.telegram_bot.models import BotData, ConversationState
+
+logger = logging.getLogger("apps.telegram_bot")
+
+# Cada cuánto PTB entrega a la persistencia los datos modificados
+PERSISTENCE_UPDATE_INTERVAL = 30
+# Espera para agrupar en una sola escritura todo lo que PTB entrega en una ronda
+FLUSH_COALESCE_SECONDS = 0.5
+# Escrituras fallidas de una misma entrada antes de descartarla
+MAX_FLUSH_ATTEMPTS = 3
+
+
+def _encode_key(key):
+    return json.dumps(list(key))
+
+
+def _decode_key(raw):
+    return tuple(json.loads(raw))
+
+
+# --- CONSULTAS (Síncronas) ---
+
+
+def _load_data(kind, object_id):
+    raw = (
+        BotData.objects.filter(kind=kind, object_id=object_id)
+        .values_list("data", flat=True)
+        .first()
+    )
+    if raw is None:
+        return {}
+    try:
+        return pickle.loads(bytes(raw))
+    except Exception as e:
+        logger.error(f"Persistencia: datos ilegibles {kind} {object_id}: {e}")
+        return {}
+
+
+def _load_chat_conversations(chat_id):
+    """Estados de un chat (claves [chat] o [chat, usuario]), agrupados por conversación"""
+    rows = ConversationState.objects.filter(
+        Q(key=_encode_key((chat_id,))) | Q(key__startswith=f"[{chat_id},")
+    ).values_list("name", "key", "state")
+    conversations = {}
+    for name, key, state in rows:
+        conversations.setdefault(name, {})[_decode_key(key)] = state
+    return conversations
+
+
+def _write_batch(data_rows, data_drops, conv_rows, conv_drops):
+    """Aplica todos los cambios pendientes en una transacción (upserts en bloque)"""
+    with transaction.atomic():
+        for kind, object_ids in data_drops.items():
+            BotData.objects.filter(kind=kind, object_id__in=object_ids).delete()
+        if data_rows:
+            BotData.objects.bulk_create(
+                [
+                    BotData(kind=kind, object_id=object_id, data=data)
+                    for (kind, object_id), data in data_rows.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["kind", "object_id"],
+                update_fields=["data", "updated_at"],
+            )
+
+        for name, keys in conv_drops.items():
+            ConversationState.objects.filter(name=name, key__in=keys).delete()
+        if conv_rows:
+            ConversationState.objects.bulk_create(
+                [
+                    ConversationState(name=name, key=key, state=state)
+                    for (name, key), state in conv_rows.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["name", "key"],
+                update_fields=["state", "updated_at"],
+            )
+
+
+class DjangoPersistence(BasePersistence):
+    """
+    Persistencia de PTB sobre el ORM de Django.
+
+    - user_data / chat_data y los estados de conversación se cargan de forma
+      perezosa (al llegar la primera actualización de ese usuario/chat, ver
+      restore_conversations), no todos al arrancar.
+    - Los cambios se serializan al recibirlos (lo que no se puede guardar se
+      registra y se descarta) y se escriben en una sola transacción por ronda
+      de PTB (cada PERSISTENCE_UPDATE_INTERVAL) y al apagar.
+    """
+
+    def __init__(self, update_interval=PERSISTENCE_UPDATE_INTERVAL):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, callback_data=False),
+            update_interval=update_interval,
+        )
+        self._loaded = {BotData.Kind.USER: set(), BotData.Kind.CHAT: set()}
+        self._loaded_chats = set()
+        self._conversation_handlers = None
+
+        # Buffers de cambios pendientes
+        self._dirty_data = {}
+        self._dropped_data = {}
+        self._dirty_conversations = {}
+        self._dropped_conversations = {}
+        # Entrada del buffer -> escrituras fallidas seguidas
+        self._failures = {}
+        self._flush_task = None
+
+    # --- Carga ---
+
+    async def get_user_data(self):
+        return {}  # Perezoso: ver refresh_user_data
+
+    async def get_chat_data(self):
+        return {}  # Perezoso: ver refresh_chat_data
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        return {}  # Perezoso: ver restore_chat_conversations
+
+    async def restore_chat_conversations(self, chat_id, application):
+        """
+        Carga los estados guardados de un chat en sus ConversationHandler
+        (una consulta, solo la primera vez que el chat escribe en esta sesión).
+        """
+        if chat_id in self._loaded_chats:
+            return
+        self._loaded_chats.add(chat_id)
+        stored = await db_sync_to_async(_load_chat_conversations)(chat_id)
+        if not stored:
+            return
+        if self._conversation_handlers is None:
+            self._conversation_handlers = {
+                handler.name: handler
+                for group in application.handlers.values()
+                for handler in group
+                if isinstance(handler, ConversationHandler) and handler.persistent
+            }
+        for name, states in stored.items():
+            handler = self._conversation_handlers.get(name)
+            if handler is None:
+                continue
+            # Lo que ya haya en memoria (de esta sesión) tiene prioridad; END no se restaura
+            handler._conversations.update_no_track(
+                {
+                    key: state
+                    for key, state in states.items()
+                    if key not in handler._conversations
+                    and state != ConversationHandler.END
+                }
+            )
+
+    async def _refresh(self, kind, object_id, data):
+        if object_id in self._loaded[kind]:
+            return
+        self._loaded[kind].add(object_id)
+        stored = await db_sync_to_async(_load_data)(kind, object_id)
+        # Lo que ya haya en memoria (de esta sesión) tiene prioridad
+        for field, value in stored.items():
+            data.setdefault(field, value)
+
+    async def refresh_user_data(self, user_id, user_data):
+        await self._refresh(BotData.Kind.USER, user_id, user_data)
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        await self._refresh(BotData.Kind.CHAT, chat_id, chat_data)
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    # --- Escritura (solo buffers; la BD se toca en _flush_pending) ---
+
+    def _mark_data(self, kind, object_id, data):
+        # Se serializa ya: un valor no serializable no llega al lote de escritura
+        try:
+            raw = pickle.dumps(data)
+        except Exception as e:
+            logger.error(f"Persistencia: {kind} {object_id} no serializable: {e}")
+            return
+        self._dirty_data[(kind, object_id)] = raw
+        self._dropped_data.get(kind, set()).discard(object_id)
+        self._schedule_flush()
+
+    def _drop_data(self, kind, object_id):
+        self._dirty_data.pop((kind, object_id), None)
+        self._dropped_data.setdefault(kind, set()).add(object_id)
+        self._loaded[kind].discard(object_id)
+        self._schedule_flush()
+
+    async def update_user_data(self, user_id, data):
+        self._mark_data(BotData.Kind.USER, user_id, data)
+
+    async def update_chat_data(self, chat_id, data):
+        self._mark_data(BotData.Kind.CHAT, chat_id, data)
+
+    async def drop_user_data(self, user_id):
+        self._drop_data(BotData.Kind.USER, user_id)
+
+    async def drop_chat_data(self, chat_id):
+        self._drop_data(BotData.Kind.CHAT, chat_id)
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def update_conversation(self, name, key, new_state):
+        encoded = _encode_key(key)
+        if new_state is None:
+            self._dirty_conversations.pop((name, encoded), None)
+            self._dropped_conversations.setdefault(name, set()).add(encoded)
+        else:
+            try:
+                json.dumps(new_state)
+            except (TypeError, ValueError) as e:
+                logger.error(
+                    f"Persistencia: estado no serializable en {name} {encoded}: {e}"
+                )
+                return
+            self._dirty_conversations[(name, encoded)] = new_state
+            self._dropped_conversations.get(name, set()).discard(encoded)
+        self._schedule_flush()
+
+    # --- Volcado a BD ---
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._delayed_flush()
+            )
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(FLUSH_COALESCE_SECONDS)
+        await self._flush_pending()
+
+    async def _flush_pending(self):
+        if not (
+            self._dirty_data
+            or self._dropped_data
+            or self._dirty_conversations
+            or self._dropped_conversations
+        ):
+            return
+
+        # Intercambiamos buffers: lo que llegue durante la escritura va a la siguiente
+        batch = (
+            self._dirty_data,
+            self._dropped_data,
+            self._dirty_conversations,
+            self._dropped_conversations,
+        )
+        self._dirty_data, self._dropped_data = {}, {}
+        self._dirty_conversations, self._dropped_conversations = {}, {}
+
+        try:
+            await db_sync_to_async(_write_batch)(*batch)
+        except Exception as e:
+            logger.error(f"Persistencia: error guardando estado: {e}")
+            self._requeue(*batch)
+        else:
+            self._failures.clear()
+
+    def _retry(self, entry):
+        """¿Reintentar esta entrada? Tras MAX_FLUSH_ATTEMPTS fallos se descarta."""
+        self._failures[entry] = self._failures.get(entry, 0) + 1
+        if self._failures[entry] < MAX_FLUSH_ATTEMPTS:
+            return True
+        logger.error(
+            f"Persistencia: descartado {entry} tras {MAX_FLUSH_ATTEMPTS} fallos"
+        )
+        del self._failures[entry]
+        return False
+
+    def _requeue(self, data_rows, data_drops, conv_rows, conv_drops):
+        """Devuelve un lote fallido a los buffers sin pisar cambios más nuevos"""
+        for key, value in data_rows.items():
+            if self._retry(("data", key)):
+                self._dirty_data.setdefault(key, value)
+        for kind, ids in data_drops.items():
+            self._dropped_data.setdefault(kind, set()).update(ids)
+        for key, value in conv_rows.items():
+            if self._retry(("conversation", key)):
+                self._dirty_conversations.setdefault(key, value)
+        for name, keys in conv_drops.items():
+            self._dropped_conversations.setdefault(name, set()).update(keys)
+
+    async def flush(self):
+        """Llamado por PTB al apagar: escribe todo lo pendiente"""
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await self._flush_pending()
+
+
+async def restore_conversations(update, context):
+    """
+    Handler del grupo -1: antes de que los ConversationHandler revisen la
+    actualización, trae de la BD los estados de ese chat.
+    """
+    persistence = context.application.persistence
+    if update.effective_chat and isinstance(persistence, DjangoPersistence):
+        await persistence.restore_chat_conversations(
+            update.effective_chat.id, context.application
+        )
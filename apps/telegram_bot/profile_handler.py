@@ -8,10 +8,11 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
 
 # Importamos modelos y teclados
 from apps.profiles.models import Profile
+from apps.profiles.repository import count_profiles, create_profile
+from apps.telegram_bot.auth import with_household
 from apps.telegram_bot.keyboards import (
     get_profiles_menu,
     get_config_menu,
@@ -48,11 +49,14 @@ async def show_config_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def show_profiles_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def show_profiles_menu(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
 
-    count = await sync_to_async(Profile.objects.count)()
+    count = await count_profiles(household_id)
     text = f"👥 **Gestión de Perfiles**\nHay {count} perfil(es) registrado(s)."
 
     await query.edit_message_text(
@@ -113,7 +117,10 @@ async def save_type_ask_date(update: Update, context: ContextTypes.DEFAULT_TYPE)
     return ASK_BIRTHDATE
 
 
-async def save_profile_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_profile_finish(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     """Paso Final: Validar, Guardar y Confirmar (PERSISTENTE)"""
     date_text = update.message.text
     try:
@@ -122,8 +129,8 @@ async def save_profile_finish(update: Update, context: ContextTypes.DEFAULT_TYPE
         p_type = context.user_data["profile_type"]
 
         # GUARDAR EN BD
-        await sync_to_async(Profile.objects.create)(
-            name=name, profile_type=p_type, birth_date=birth_date
+        await create_profile(
+            household_id, name=name, profile_type=p_type, birth_date=birth_date
         )
 
         logger.info(f"Nuevo perfil creado: {name} ({p_type})")
@@ -156,6 +163,8 @@ async def save_profile_finish(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 # --- DEFINICIÓN DEL HANDLER ---
 profile_conv_handler = ConversationHandler(
+    name="profile_conv_handler",
+    persistent=True,
     entry_points=[CallbackQueryHandler(start_add_profile, pattern="^add_profile$")],
     states={
         ASK_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, save_name_ask_type)],
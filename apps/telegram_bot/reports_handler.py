@@ -1,24 +1,34 @@
 import logging
+from datetime import timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackQueryHandler, ConversationHandler
-from asgiref.sync import sync_to_async
+from django.utils import timezone
 
 from apps.profiles.models import Profile
-from apps.reports.business import get_day_summary, get_what_is_next
+from apps.profiles.repository import get_profile, list_profiles
+from apps.reports.business import (
+    get_day_summary,
+    get_range_summary,
+    get_what_is_next,
+)
+from apps.telegram_bot.auth import with_household
 from apps.telegram_bot.keyboards import get_main_menu
 
 logger = logging.getLogger("apps.telegram_bot")
 
 # Estados
-SELECT_PROFILE_R = range(1)
+(SELECT_PROFILE_R,) = range(1)
 
 
 # --- MENÚ REPORTES ---
-async def show_reports_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def show_reports_menu(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
 
-    profiles = await sync_to_async(list)(Profile.objects.all())
+    profiles = await list_profiles(household_id)
 
     if len(profiles) == 1:
         context.user_data["report_profile_id"] = profiles[0].id
@@ -40,11 +50,18 @@ async def show_reports_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_PROFILE_R
 
 
-async def save_profile_r(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_profile_r(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
     pid = int(query.data.split("_")[2])
-    profile = await sync_to_async(Profile.objects.get)(id=pid)
+    try:
+        profile = await get_profile(household_id, pid)
+    except Profile.DoesNotExist:
+        await query.edit_message_text("⚠️ Perfil no encontrado.")
+        return ConversationHandler.END
 
     context.user_data["report_profile_id"] = pid
     context.user_data["report_profile_name"] = profile.name
@@ -58,6 +75,11 @@ async def show_actions_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [
         [InlineKeyboardButton("📅 Resumen de Hoy", callback_data="REP_TODAY")],
         [InlineKeyboardButton("⏳ ¿Qué Sigue?", callback_data="REP_NEXT")],
+        [
+            InlineKeyboardButton("📈 7 días", callback_data="REP_RANGE_7"),
+            InlineKeyboardButton("📈 30 días", callback_data="REP_RANGE_30"),
+            InlineKeyboardButton("📈 90 días", callback_data="REP_RANGE_90"),
+        ],
         [InlineKeyboardButton("🔙 Menú Principal", callback_data="main_menu")],
     ]
 
@@ -70,12 +92,15 @@ async def show_actions_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_PROFILE_R
 
 
-async def report_today(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def report_today(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     query = update.callback_query
     await query.answer()
 
     pid = context.user_data["report_profile_id"]
-    profile = await sync_to_async(Profile.objects.get)(id=pid)
+    profile = await get_profile(household_id, pid)
 
     # Obtener datos
     data = await get_day_summary(profile)
@@ -106,12 +131,57 @@ async def report_today(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return SELECT_PROFILE_R
 
 
-async def report_next(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def report_range(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
+    query = update.callback_query
+    await query.answer()
+
+    days = int(query.data.split("_")[2])  # REP_RANGE_7
+    pid = context.user_data["report_profile_id"]
+    profile = await get_profile(household_id, pid)
+
+    end_date = timezone.localtime().date()
+    start_date = end_date - timedelta(days=days - 1)
+    data = await get_range_summary(profile, start_date, end_date)
+
+    msg = (
+        f"📈 **ÚLTIMOS {days} DÍAS**\n"
+        f"👤 {profile.name}\n"
+        f"🗓️ {data['start']} - {data['end']}\n"
+        f"━━━━━━━━━━━━━━━━━━\n"
+    )
+
+    if data["is_baby"]:
+        msg += (
+            f"💩 **Pañales:** {data['diapers_total']} ({data['avg_diapers']}/día)\n"
+            f"   (💧{data['pee']} | 💩{data['poo']})\n\n"
+            f"🍼 **Lactancia:** {data['feedings']} tomas ({data['avg_feedings']}/día)\n"
+            f"   (Tiempo total: {data['feeding_mins']} min, "
+            f"{data['avg_feeding_mins']} min/día)\n\n"
+        )
+
+    msg += (
+        f"💊 **Medicinas:** {data['meds_count']} dosis\n"
+        f"📆 Días con registros: {data['days_with_data']}/{data['days']}\n"
+        f"━━━━━━━━━━━━━━━━━━"
+    )
+
+    keyboard = [[InlineKeyboardButton("🔙 Volver", callback_data=f"rep_prof_{pid}")]]
+    await query.edit_message_text(
+        msg, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode="Markdown"
+    )
+    return SELECT_PROFILE_R
+
+
+@with_household
+async def report_next(update: Update, context: ContextTypes.DEFAULT_TYPE, household_id):
     query = update.callback_query
     await query.answer()
 
     pid = context.user_data["report_profile_id"]
-    profile = await sync_to_async(Profile.objects.get)(id=pid)
+    profile = await get_profile(household_id, pid)
 
     events = await get_what_is_next(profile)
 
@@ -144,12 +214,15 @@ async def back_to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- HANDLER ---
 reports_conv_handler = ConversationHandler(
+    name="reports_conv_handler",
+    persistent=True,
     entry_points=[CallbackQueryHandler(show_reports_menu, pattern="^menu_status$")],
     states={
         SELECT_PROFILE_R: [
             CallbackQueryHandler(save_profile_r, pattern="^rep_prof_"),
             CallbackQueryHandler(report_today, pattern="^REP_TODAY$"),
             CallbackQueryHandler(report_next, pattern="^REP_NEXT$"),
+            CallbackQueryHandler(report_range, pattern=r"^REP_RANGE_\d+$"),
             CallbackQueryHandler(back_to_main, pattern="^main_menu$"),
         ]
     },
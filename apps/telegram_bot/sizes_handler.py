@@ -7,10 +7,11 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from asgiref.sync import sync_to_async
 
 # Importamos el modelo de Tallas y el handler de configuración para volver
 from apps.core_config.models import DiaperSize
+from apps.nursery.repository import create_size_if_missing, list_sizes, toggle_size
+from apps.telegram_bot.auth import with_household
 from apps.telegram_bot.config_handler import show_global_config
 
 logger = logging.getLogger("apps.telegram_bot")
@@ -19,13 +20,16 @@ logger = logging.getLogger("apps.telegram_bot")
 ADD_SIZE_LABEL = 1
 
 
-async def show_sizes_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def show_sizes_menu(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     """Muestra lista de tallas con Check/X para activar/desactivar"""
     query = update.callback_query
     await query.answer()
 
     # 1. Obtener todas las tallas ordenadas
-    sizes = await sync_to_async(list)(DiaperSize.objects.all().order_by("order"))
+    sizes = await list_sizes(household_id)
 
     keyboard = []
     # 2. Generar botones dinámicos
@@ -52,17 +56,17 @@ async def show_sizes_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def toggle_size_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def toggle_size_status(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     """Acción al tocar una talla: Cambia su estado"""
     query = update.callback_query
     # Extraer ID del callback "toggle_size_5"
     size_id = int(query.data.split("_")[2])
 
     try:
-        size = await sync_to_async(DiaperSize.objects.get)(id=size_id)
-        # Invertir estado
-        size.is_active = not size.is_active
-        await sync_to_async(size.save)()
+        size = await toggle_size(household_id, size_id)
 
         logger.info(
             f"Talla {size.label} cambiada a is_active={size.is_active} por usuario {update.effective_user.id}"
@@ -89,23 +93,25 @@ async def ask_new_size(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ADD_SIZE_LABEL
 
 
-async def save_new_size(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_household
+async def save_new_size(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, household_id
+):
     label = (
         update.message.text.strip().upper()
     )  # Guardamos en mayúsculas por convención
 
-    # Verificar si ya existe
-    exists = await sync_to_async(DiaperSize.objects.filter(label=label).exists)()
+    # Crear talla (si ya existe no se duplica)
+    size, created = await create_size_if_missing(
+        household_id,
+        label,
+        is_active=True,
+        order=10,  # Por defecto al final, luego se puede mejorar la ordenación
+    )
 
-    if exists:
+    if not created:
         await update.message.reply_text("⚠️ Esa talla ya existe.")
     else:
-        # Crear talla
-        await sync_to_async(DiaperSize.objects.create)(
-            label=label,
-            is_active=True,
-            order=10,  # Por defecto al final, luego se puede mejorar la ordenación
-        )
         logger.info(f"Nueva talla creada: {label}")
         await update.message.reply_text(f"✅ Talla **{label}** agregada.")
 
@@ -118,6 +124,8 @@ async def save_new_size(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 # --- DEFINICIÓN HANDLER ---
 sizes_conv_handler = ConversationHandler(
+    name="sizes_conv_handler",
+    persistent=True,
     entry_points=[CallbackQueryHandler(ask_new_size, pattern="^add_new_size$")],
     states={
         ADD_SIZE_LABEL: [MessageHandler(filters.TEXT & ~filters.COMMAND, save_new_size)]
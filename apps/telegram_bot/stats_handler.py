@@ -0,0 +1,82 @@
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes, CommandHandler
+
+from apps.core_config import sharding
+from apps.telegram_bot import metrics
+from apps.telegram_bot.auth import has_owner_role, with_user
+
+logger = logging.getLogger("apps.telegram_bot")
+
+# Filas que caben cómodas en un mensaje de Telegram
+STATS_TOP_ROWS = 15
+
+
+@with_user
+async def send_stats(update: Update, context: ContextTypes.DEFAULT_TYPE, user):
+    """
+    Comando /stats : Latencias por handler (solo Owner).
+    Ordenado por p95 de tiempo total, los más lentos primero.
+    """
+    if not has_owner_role(user):
+        await update.message.reply_text("⛔ Comando desconocido.")
+        return
+
+    snapshot = metrics.snapshot()
+    title = "📊 **Métricas**"
+    if sharding.is_sharded():
+        # Con workers: este proceso (al día) + la última foto de los demás
+        worker = sharding.current_worker()
+        snapshot = metrics.merge_rows(
+            snapshot + metrics.read_worker_snapshots(exclude=worker)
+        )
+        title = "📊 **Métricas** (todos los workers; percentil = el peor)"
+    rows = [r for r in snapshot if not r["name"].startswith(("api:", "lag:"))]
+    if not rows:
+        await update.message.reply_text("📊 Aún no hay métricas.")
+        return
+
+    rows.sort(key=lambda r: r["wall_ms"][0.95], reverse=True)
+    lines = [
+        f"{'handler':<32} {'n':>5} {'p50':>6} {'p95':>6} {'p99':>6} {'q95':>3} {'tg95':>4}"
+    ]
+    for r in rows[:STATS_TOP_ROWS]:
+        wall = r["wall_ms"]
+        lines.append(
+            f"{r['name'][:32]:<32} {r['calls']:>5} {wall[0.5]:>6.0f} "
+            f"{wall[0.95]:>6.0f} {wall[0.99]:>6.0f} "
+            f"{r['queries'][0.95]:>3.0f} {r['api_calls'][0.95]:>4.0f}"
+        )
+
+    # Latencia de la Bot API por método
+    api_rows = [r for r in snapshot if r["name"].startswith("api:")]
+    api_rows.sort(key=lambda r: r["calls"], reverse=True)
+    if api_rows:
+        lines.append("")
+        lines.append(f"{'api':<32} {'n':>5} {'p50':>6} {'p95':>6} {'p99':>6}")
+        for r in api_rows[:STATS_TOP_ROWS]:
+            wall = r["wall_ms"]
+            lines.append(
+                f"{r['name'][4:36]:<32} {r['calls']:>5} {wall[0.5]:>6.0f} "
+                f"{wall[0.95]:>6.0f} {wall[0.99]:>6.0f}"
+            )
+
+    # Retraso de los recordatorios respecto a su hora programada
+    for r in snapshot:
+        if r["name"].startswith("lag:"):
+            wall = r["wall_ms"]
+            lines.append("")
+            lines.append(
+                f"{r['name']:<32} {r['calls']:>5} {wall[0.5]:>6.0f} "
+                f"{wall[0.95]:>6.0f} {wall[0.99]:>6.0f}"
+            )
+
+    table = "\n".join(lines)
+    await update.message.reply_text(
+        f"{title} (ms; q = consultas, tg = llamadas API)\n```\n{table}\n```",
+        parse_mode="Markdown",
+    )
+
+
+# Definimos el handler para exportarlo
+stats_handler = CommandHandler("stats", send_stats)
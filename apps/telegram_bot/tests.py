@@ -1,3 +1,474 @@
-from django.test import TestCase
+import asyncio
+import queue
+import tempfile
+from datetime import date, datetime, timedelta
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from telegram import (
+    Bot,
+    Chat,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+    Update,
+)
+from telegram.ext import ConversationHandler
+from telegram.ext._utils.trackingdict import TrackingDict
 
-# Create your tests here.
+from apps.core_config import sharding
+from apps.health.models import MedicationLog, Treatment
+from apps.households.models import Household
+from apps.notifications.models import ScheduledEvent
+from apps.profiles.models import Profile
+from apps.telegram_bot import loadtest, metrics, persistence, views, workers
+from apps.telegram_bot.concurrency import PerChatUpdateProcessor
+from apps.telegram_bot.fake_api import FAKE_BOT, FAKE_TOKEN, FakeBotAPI
+from apps.telegram_bot.health_handler import handle_dose_action
+from apps.telegram_bot.models import ConversationState
+from apps.telegram_bot.persistence import DjangoPersistence
+from apps.users.models import TelegramUser
+
+
+def chat_update(update_id, chat_id):
+    chat = Chat(id=chat_id, type=Chat.PRIVATE)
+    message = Message(message_id=update_id, date=datetime.now(), chat=chat)
+    return Update(update_id=update_id, message=message)
+
+
+class PerChatUpdateProcessorTests(SimpleTestCase):
+    """Un chat ocupado no debe frenar a los demás"""
+
+    async def test_busy_chat_does_not_block_others(self):
+        processor = PerChatUpdateProcessor(max_concurrent_updates=2)
+        release = asyncio.Event()
+        order = []
+
+        async def handler(name, wait=False):
+            if wait:
+                await release.wait()
+            order.append(name)
+
+        # Chat 1: uno bloqueado (ej. import lento) y varios más en cola detrás
+        busy = [
+            asyncio.create_task(
+                processor.process_update(
+                    chat_update(i, 1), handler(f"a{i}", wait=(i == 0))
+                )
+            )
+            for i in range(5)
+        ]
+        other = asyncio.create_task(
+            processor.process_update(chat_update(99, 2), handler("b"))
+        )
+        await asyncio.wait_for(other, timeout=1)
+        self.assertEqual(order, ["b"])
+
+        release.set()
+        await asyncio.gather(*busy)
+        # Dentro del chat se respeta el orden de llegada
+        self.assertEqual(order, ["b", "a0", "a1", "a2", "a3", "a4"])
+
+
+class FakeApplication:
+    """Lo mínimo que usa restore_chat_conversations"""
+
+    def __init__(self, *handlers):
+        self.handlers = {0: list(handlers)}
+
+
+def persistent_conversation(name):
+    handler = ConversationHandler(
+        entry_points=[], states={}, fallbacks=[], name=name, persistent=True
+    )
+    # Como tras Application.initialize(): el dict lo provee la persistencia
+    handler._conversations = TrackingDict()
+    return handler
+
+
+class DjangoPersistenceTests(TestCase):
+    async def test_round_trip(self):
+        writer = DjangoPersistence()
+        await writer.update_user_data(7, {"diaper_size": "P"})
+        await writer.update_conversation("diaper", (5, 7), 2)
+        await writer.update_conversation("diaper", (6, 7), 1)
+        await writer.flush()
+
+        reader = DjangoPersistence()
+        user_data = {}
+        await reader.refresh_user_data(7, user_data)
+        self.assertEqual(user_data, {"diaper_size": "P"})
+
+        # Perezoso: solo el chat que escribe, y sin pisar lo que ya hay en memoria
+        self.assertEqual(await reader.get_conversations("diaper"), {})
+        handler = persistent_conversation("diaper")
+        await reader.restore_chat_conversations(5, FakeApplication(handler))
+        self.assertEqual(dict(handler._conversations), {(5, 7): 2})
+
+        # Terminar la conversación borra la fila
+        await reader.update_conversation("diaper", (5, 7), None)
+        await reader.flush()
+        keys = ConversationState.objects.values_list("key", flat=True)
+        self.assertEqual(await persistence.db_sync_to_async(list)(keys), ["[6, 7]"])
+
+    async def test_unserializable_entries_do_not_block_the_batch(self):
+        writer = DjangoPersistence()
+        # Ej. un estado `range(1)` (X = range(1) en vez de (X,) = range(1))
+        await writer.update_conversation("reports", (5, 7), range(1))
+        await writer.update_user_data(7, {"callback": lambda: None})
+        await writer.update_conversation("diaper", (5, 7), 2)
+        await writer.flush()
+
+        rows = ConversationState.objects.values_list("name", "state")
+        self.assertEqual(
+            await persistence.db_sync_to_async(list)(rows), [("diaper", 2)]
+        )
+
+    async def test_failing_entry_is_dropped_after_max_attempts(self):
+        writer = DjangoPersistence()
+        await writer.update_conversation("diaper", (5, 7), 2)
+        with mock.patch.object(persistence, "_write_batch", side_effect=ValueError):
+            for _ in range(persistence.MAX_FLUSH_ATTEMPTS):
+                await writer._flush_pending()
+        self.assertEqual(writer._dirty_conversations, {})
+
+
+class FakeProcess:
+    def __init__(self):
+        self.alive = True
+        self.exitcode = None
+
+    def is_alive(self):
+        return self.alive
+
+
+class FakeInbox(queue.Queue):
+    def close(self):
+        pass
+
+
+class FakeDispatcher(workers.ShardDispatcher):
+    """Despachador sin procesos reales: registra lanzamientos y drenajes"""
+
+    def __init__(self, count):
+        super().__init__("token", count)
+        self.spawned = []
+        for worker_id in self.members:
+            self._spawn(worker_id)
+
+    def _spawn(self, worker_id, pending=()):
+        inbox = FakeInbox()
+        for message in pending:
+            inbox.put(message)
+        self.inboxes[worker_id] = inbox
+        self.processes[worker_id] = FakeProcess()
+        self.spawned.append(worker_id)
+
+    async def _stop_workers(self):
+        self.processes.clear()
+
+    def crash(self, worker_id):
+        self.processes[worker_id].alive = False
+        self.processes[worker_id].exitcode = 1
+
+    def queued(self, worker_id):
+        return list(self.inboxes[worker_id].queue)
+
+
+def update_message(chat_id):
+    return (workers._UPDATE, sharding.chat_key(chat_id), {"update_id": chat_id})
+
+
+class ShardDispatcherTests(SimpleTestCase):
+    async def test_crashed_worker_restarts_with_its_queue(self):
+        dispatcher = FakeDispatcher(2)
+        message = update_message(5)
+        dispatcher._send(message)
+        owner = sharding.rendezvous_owner(message[1], [0, 1])
+
+        dispatcher.crash(owner)
+        await dispatcher._supervise()
+        self.assertEqual(dispatcher.spawned[-1], owner)
+        self.assertEqual(dispatcher.members, [0, 1])
+        # Lo que no llegó a leer sigue en su cola, en el mismo shard
+        self.assertEqual(dispatcher.queued(owner), [message])
+
+    async def test_worker_leaves_after_max_restarts_and_queue_moves(self):
+        dispatcher = FakeDispatcher(3)
+        for _ in range(workers.MAX_RESTARTS):
+            dispatcher.crash(2)
+            await dispatcher._supervise()
+        self.assertEqual(dispatcher.members, [0, 1, 2])
+
+        messages = [update_message(chat) for chat in range(30)]
+        for message in messages:
+            dispatcher._send(message)
+        dispatcher.crash(2)
+        await dispatcher._supervise()
+
+        self.assertEqual(dispatcher.members, [0, 1])
+        self.assertNotIn(2, dispatcher.inboxes)
+        # Cada pendiente queda en la cola de su dueño con el nuevo reparto
+        for worker_id in (0, 1):
+            for message in dispatcher.queued(worker_id):
+                self.assertEqual(
+                    sharding.rendezvous_owner(message[1], [0, 1]), worker_id
+                )
+        routed = dispatcher.queued(0) + dispatcher.queued(1)
+        self.assertEqual(sorted(m[2]["update_id"] for m in routed), list(range(30)))
+
+    async def test_resize_adds_and_removes_workers(self):
+        dispatcher = FakeDispatcher(2)
+        dispatcher._request_resize(1)
+        await dispatcher._supervise()
+        self.assertEqual(dispatcher.members, [0, 1, 2])
+
+        dispatcher._request_resize(-1)
+        await dispatcher._supervise()
+        self.assertEqual(dispatcher.members, [0, 1])
+        # Nunca por debajo de uno
+        dispatcher._request_resize(-1)
+        await dispatcher._supervise()
+        dispatcher._request_resize(-1)
+        await dispatcher._supervise()
+        self.assertEqual(dispatcher.members, [0])
+
+
+class WorkerMetricsTests(SimpleTestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_worker_snapshots_are_merged(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(BOT_METRICS_FILE=f"{tmp}/bot_metrics.prom"):
+                for worker_id, wall_ms in ((0, 10.0), (1, 40.0)):
+                    metrics.reset()
+                    metrics.observe("lag:reminders", wall_ms)
+                    metrics.write_snapshot(metrics.worker_snapshot_path(worker_id))
+
+                rows = metrics.read_worker_snapshots()
+                text = metrics.render_text(rows)
+                self.assertIn('name="lag:reminders",worker="0"', text)
+                self.assertIn('name="lag:reminders",worker="1"', text)
+
+                (merged,) = metrics.merge_rows(rows)
+                self.assertEqual(merged["calls"], 2)
+                self.assertEqual(merged["wall_ms"][0.95], 40.0)
+                # El propio worker no se lee de disco
+                self.assertEqual(len(metrics.read_worker_snapshots(exclude=1)), 1)
+
+
+class FakeWebhookApplication:
+    bot = None
+
+    def __init__(self):
+        self.update_queue = asyncio.Queue()
+
+
+@override_settings(TELEGRAM_WEBHOOK_SECRET="s3cret")
+class TelegramWebhookTests(SimpleTestCase):
+    def setUp(self):
+        self.application = FakeWebhookApplication()
+        patcher = mock.patch.object(
+            views, "get_application", return_value=self.application
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def post(self, body, secret="s3cret"):
+        headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+        return await self.async_client.post(
+            reverse("telegram_webhook"),
+            body,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    async def test_valid_update_is_queued(self):
+        response = await self.post('{"update_id": 1}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.application.update_queue.get_nowait().update_id, 1)
+
+    async def test_bad_or_missing_secret_is_rejected(self):
+        for secret in ("otro", None):
+            response = await self.post('{"update_id": 1}', secret=secret)
+            self.assertEqual(response.status_code, 403)
+        self.assertTrue(self.application.update_queue.empty())
+
+    async def test_malformed_body_is_rejected(self):
+        for body in ("null", "{no es json", "[1, 2]", '"texto"', "{}"):
+            response = await self.post(body)
+            self.assertEqual(response.status_code, 400, body)
+        self.assertTrue(self.application.update_queue.empty())
+
+
+class DoseActionAuthTests(TestCase):
+    """Una solicitud pendiente (ligada a la familia, inactiva) no registra dosis"""
+
+    def setUp(self):
+        household = Household.objects.create(name="Casa")
+        profile = Profile.objects.create(
+            household=household, name="Bebé", birth_date=date(2025, 1, 1)
+        )
+        self.treatment = Treatment.objects.create(
+            profile=profile,
+            medicine_name="Jarabe",
+            dose="2ml",
+            frequency_hours=8,
+            start_date=timezone.now() - timedelta(days=1),
+            duration_days=5,
+        )
+        self.member = TelegramUser.objects.create(household=household, telegram_id=1)
+        self.pending = TelegramUser.objects.create(
+            household=household,
+            telegram_id=2,
+            role=TelegramUser.Role.GUEST,
+            is_active=False,
+        )
+
+    async def press(self, user, action):
+        update = mock.Mock(callback_query=mock.AsyncMock())
+        update.effective_user.id = user.telegram_id
+        update.callback_query.data = f"DOSE_{action}_{self.treatment.id}"
+        await handle_dose_action(update, mock.Mock(bot=mock.AsyncMock()))
+        return update.callback_query.edit_message_text.call_args.args[0]
+
+    async def test_pending_user_cannot_record_or_snooze(self):
+        for action in ("TAKE", "SNOOZE"):
+            reply = await self.press(self.pending, action)
+            self.assertIn("No perteneces", reply)
+        self.assertFalse(await MedicationLog.objects.aexists())
+        self.assertFalse(await ScheduledEvent.objects.aexists())
+
+    async def test_active_member_records_dose(self):
+        reply = await self.press(self.member, "TAKE")
+        self.assertIn("Dosis Registrada", reply)
+        self.assertEqual(await MedicationLog.objects.acount(), 1)
+
+
+class FakeBotAPITests(SimpleTestCase):
+    """El servidor falso habla Bot API real: PTB se conecta sin saber la diferencia"""
+
+    async def start_server(self):
+        self.api = FakeBotAPI(port=0)
+        await self.api.start()
+        self.bot = Bot(
+            FAKE_TOKEN,
+            base_url=f"{self.api.base_url}/bot",
+            base_file_url=f"{self.api.base_url}/file/bot",
+        )
+        await self.bot.initialize()
+
+    async def stop_server(self):
+        await self.bot.shutdown()
+        await self.api.stop()
+
+    async def run_with_server(self, test):
+        await self.start_server()
+        try:
+            await test()
+        finally:
+            await self.stop_server()
+
+    async def test_updates_and_messages_round_trip(self):
+        async def test():
+            self.assertEqual(self.bot.username, FAKE_BOT["username"])
+            self.assertEqual(await self.bot.get_updates(timeout=0), ())
+
+            update_id = self.api.push_update(
+                {"message": {**chat_update(1, 5).message.to_dict(), "text": "/menu"}}
+            )
+            updates = await self.bot.get_updates(timeout=1)
+            self.assertEqual([u.update_id for u in updates], [update_id])
+            self.assertEqual(updates[0].message.text, "/menu")
+            # Con offset, lo ya leído no vuelve
+            self.assertEqual(await self.bot.get_updates(offset=update_id + 1), ())
+
+            inbox = self.api.inbox(5)
+            keyboard = InlineKeyboardMarkup(
+                [[InlineKeyboardButton("Ir", callback_data="go")]]
+            )
+            sent = await self.bot.send_message(5, "Hola", reply_markup=keyboard)
+            delivered = inbox.get_nowait()
+            self.assertEqual(delivered["text"], "Hola")
+            self.assertEqual(list(loadtest._buttons(delivered)), ["go"])
+
+            await self.bot.edit_message_text(
+                "Listo", chat_id=5, message_id=sent.message_id
+            )
+            edited = inbox.get_nowait()
+            self.assertEqual(
+                (edited["message_id"], edited["text"]), (sent.message_id, "Listo")
+            )
+            self.assertNotIn("reply_markup", edited)
+            self.assertEqual(self.api.calls["sendMessage"], 1)
+
+        await self.run_with_server(test)
+
+    async def test_uploaded_file_can_be_downloaded(self):
+        async def test():
+            document = self.api.add_file(b"perfil,fecha\n", "historial.csv")
+            file = await self.bot.get_file(document["file_id"])
+            self.assertEqual(
+                bytes(await file.download_as_bytearray()), b"perfil,fecha\n"
+            )
+
+        await self.run_with_server(test)
+
+
+class LoadDriverTests(SimpleTestCase):
+    """El driver recorre los flujos, mide cada vuelta y cuenta los fallos"""
+
+    FLOWS = {
+        "menu": [
+            loadtest.send("/menu", button=r"^go$"),
+            loadtest.tap(r"^skip$", button=r"^go$", optional=True),
+            loadtest.tap(r"^go$", expect=r"hecho"),
+        ],
+        "broken": [
+            loadtest.send("/menu", button=r"^go$"),
+            loadtest.tap(r"^missing$", expect=r"nunca"),
+        ],
+    }
+
+    async def respond(self, bot):
+        """Bot mínimo: /menu muestra un botón y pulsarlo edita el mensaje"""
+        keyboard = InlineKeyboardMarkup(
+            [[InlineKeyboardButton("Ir", callback_data="go")]]
+        )
+        offset = 0
+        while True:
+            for update in await bot.get_updates(offset=offset, timeout=1):
+                offset = update.update_id + 1
+                if update.message:
+                    await bot.send_message(
+                        update.message.chat_id, "Menú", reply_markup=keyboard
+                    )
+                else:
+                    await update.callback_query.message.edit_text("hecho")
+
+    async def test_report_counts_runs_and_errors(self):
+        api = FakeBotAPI(port=0)
+        await api.start()
+        bot = Bot(FAKE_TOKEN, base_url=f"{api.base_url}/bot")
+        await bot.initialize()
+        responder = asyncio.create_task(self.respond(bot))
+        try:
+            with mock.patch.object(loadtest, "FLOWS", self.FLOWS):
+                report = await loadtest.run_load(
+                    api, households=2, caregivers=2, rounds=3, step_timeout=2
+                )
+        finally:
+            responder.cancel()
+            await bot.shutdown()
+            await api.stop()
+
+        self.assertEqual(report["caregivers"], 4)
+        menu, broken = report["flows"]["menu"], report["flows"]["broken"]
+        self.assertEqual((menu["runs"], menu["errors"], menu["timeouts"]), (12, 0, 0))
+        self.assertEqual((broken["runs"], broken["errors"]), (0, 12))
+        self.assertGreater(menu["ms"][0.5], 0)
+        self.assertEqual(report["api_calls"]["sendMessage"], 24)
+        self.assertIn("menu", loadtest.format_report(report))
@@ -1,3 +1,72 @@
-from django.shortcuts import render
+import hmac
+import json
+import logging
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
+from telegram import Update
 
-# Create your views here.
+from apps.telegram_bot import metrics
+from apps.telegram_bot.bot import get_application, is_valid_secret
+
+logger = logging.getLogger("apps.telegram_bot")
+
+
+async def telegram_webhook(request):
+    """Recibe una actualización de Telegram y la encola en la Application"""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    if not is_valid_secret(request.headers.get("X-Telegram-Bot-Api-Secret-Token")):
+        return HttpResponse(status=403)
+
+    application = get_application()
+    if application is None:
+        # Telegram reintentará más tarde
+        return HttpResponse(status=503)
+
+    try:
+        data = json.loads(request.body)
+        # `null`, listas o escalares no son una actualización
+        update = (
+            Update.de_json(data, application.bot) if isinstance(data, dict) else None
+        )
+    except (ValueError, TypeError, KeyError) as e:
+        logger.error(f"Webhook: actualización inválida ({e})")
+        return HttpResponse(status=400)
+    if update is None:
+        logger.error("Webhook: cuerpo sin actualización")
+        return HttpResponse(status=400)
+
+    # Respondemos de inmediato; los handlers corren en el loop de la Application
+    await application.update_queue.put(update)
+    return HttpResponse(status=200)
+
+
+# csrf_exempt de Django 4.2 no preserva vistas async: marcamos el atributo directo
+telegram_webhook.csrf_exempt = True
+
+
+def _has_metrics_token(request):
+    expected = settings.METRICS_TOKEN
+    if not expected:
+        return False
+    received = request.headers.get("Authorization", "")
+    return hmac.compare_digest(received.encode(), f"Bearer {expected}".encode())
+
+
+def bot_metrics(request):
+    """Métricas del bot en texto estilo Prometheus (requiere METRICS_TOKEN)"""
+    if not settings.METRICS_TOKEN:
+        raise Http404()
+    if not _has_metrics_token(request):
+        return HttpResponse(status=403)
+
+    # Modo webhook: el bot vive en este proceso. Polling: fotos que deja runbot
+    # (una con un solo proceso; una por worker, etiquetada, con --workers N)
+    if metrics.has_data():
+        rows = metrics.snapshot()
+    else:
+        rows = metrics.read_worker_snapshots() or metrics.read_snapshot() or []
+    return HttpResponse(
+        metrics.render_text(rows), content_type="text/plain; version=0.0.4"
+    )
@@ -1,28 +1,20 @@
 import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CommandHandler
-from asgiref.sync import sync_to_async
-from apps.users.models import TelegramUser
+from apps.telegram_bot.auth import has_owner_role, with_user
 
 logger = logging.getLogger("apps.telegram_bot")
 
 
-async def send_admin_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
+@with_user
+async def send_admin_url(update: Update, context: ContextTypes.DEFAULT_TYPE, user):
     """
     Comando /panel : Envía el link del Django Admin solo al Owner.
     Totalmente aislado del resto de la lógica.
     """
-    user = update.effective_user
-
     # 1. Validar que el usuario sea el Owner
-    is_owner = await sync_to_async(
-        TelegramUser.objects.filter(
-            telegram_id=user.id, role=TelegramUser.Role.OWNER
-        ).exists
-    )()
-
     # Si es tu esposa o un intruso, el bot se hace el loco
-    if not is_owner:
+    if not has_owner_role(user):
         await update.message.reply_text("⛔ Comando desconocido.")
         return
 
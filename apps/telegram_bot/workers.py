@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import signal
+import time
+from django.conf import settings
+from telegram import Bot, Update
+from telegram.error import TelegramError
+from telegram.request import HTTPXRequest
+
+from apps.core_config import sharding
+from apps.telegram_bot.concurrency import serialization_key
+
+logger = logging.getLogger("apps.telegram_bot")
+
+# --- BOT EN VARIOS PROCESOS (runbot --workers N) ---
+# Un despachador hace el long polling y reparte cada actualización por su chat
+# (rendezvous hash) a la cola FIFO de un worker: un chat siempre cae en el
+# mismo proceso y en orden. Cada worker es una Application completa que solo
+# carga los recordatorios (ScheduledEvent) de las familias de su shard.
+
+# Espera (segundos) del long polling del despachador
+POLL_TIMEOUT = 10
+# Espera de las llamadas HTTP a Telegram (misma que la Application)
+HTTP_TIMEOUT = 30
+# Reinicios tolerados por worker dentro de la ventana antes de darlo de baja
+MAX_RESTARTS = 3
+RESTART_WINDOW = 300
+# Espera máxima a que un worker vacíe su cola y vuelque la persistencia
+STOP_TIMEOUT = 60
+# Cada cuánto revisa un worker si su despachador sigue vivo
+INBOX_WAIT = 1.0
+
+# Mensajes de la cola de cada worker: (tipo, clave de reparto, actualización)
+_UPDATE = "update"
+_STOP = "stop"
+
+
+def _context():
+    # spawn: cada worker arranca un intérprete limpio (sin conexiones de BD ni
+    # hilos heredados del despachador)
+    return multiprocessing.get_context("spawn")
+
+
+def route_key(update):
+    """Clave de reparto: el chat (o usuario); sin ninguno, la propia actualización"""
+    key = serialization_key(update)
+    if key is None:
+        return f"update:{update.update_id}"
+    return sharding.chat_key(key)
+
+
+# --- WORKER ---
+
+
+def run_worker(worker_id, workers, token, inbox):
+    """Punto de entrada del proceso worker"""
+    import django
+
+    django.setup()
+    # Ctrl+C llega a todo el grupo de procesos: el apagado lo ordena el despachador
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    sharding.configure(worker_id, workers)
+    asyncio.run(_serve(worker_id, token, inbox))
+
+
+async def _serve(worker_id, token, inbox):
+    from apps.telegram_bot import metrics
+    from apps.telegram_bot.bot import build_application
+
+    application = build_application(token)
+    # Una foto de métricas por worker (BOT_METRICS_FILE.<id>)
+    application.job_queue.run_repeating(
+        _write_metrics_snapshot,
+        interval=metrics.METRICS_SNAPSHOT_SECONDS,
+        first=metrics.METRICS_SNAPSHOT_SECONDS,
+        data=metrics.worker_snapshot_path(worker_id),
+        name="metrics_snapshot",
+    )
+    parent = multiprocessing.parent_process()
+    loop = asyncio.get_running_loop()
+
+    async with application:
+        await application.start()
+        logger.info(f"Worker {worker_id} listo.")
+        while True:
+            try:
+                kind, _, payload = await loop.run_in_executor(
+                    None, inbox.get, True, INBOX_WAIT
+                )
+            except queue.Empty:
+                # Si el despachador murió sin avisar, no quedamos huérfanos
+                if parent is not None and not parent.is_alive():
+                    logger.error(f"Worker {worker_id}: el despachador ya no existe.")
+                    break
+                continue
+            if kind == _STOP:
+                break
+            await application.update_queue.put(Update.de_json(payload, application.bot))
+        # stop() atiende lo que quedaba en la cola antes de salir
+        await application.stop()
+    logger.info(f"Worker {worker_id} detenido.")
+
+
+async def _write_metrics_snapshot(context):
+    from apps.telegram_bot import metrics
+
+    try:
+        metrics.write_snapshot(context.job.data)
+    except OSError as e:
+        logger.error(f"No se pudo escribir la foto de métricas: {e}")
+
+
+# --- DESPACHADOR ---
+
+
+class ShardDispatcher:
+    """
+    Recibe las actualizaciones y las reparte entre los workers.
+
+    - Un worker que se cae se relanza con el mismo id (mismo shard); su cola
+      conserva lo pendiente.
+    - Si se cae MAX_RESTARTS veces en RESTART_WINDOW sale del reparto. Con
+      SIGTTIN/SIGTTOU (como gunicorn) se suma o quita un worker.
+    - Cambiar el reparto es un drenaje: se deja de leer de Telegram, todos los
+      workers terminan su cola y vuelcan la persistencia, y arrancan de nuevo
+      con los nuevos dueños. Ningún chat se atiende en dos procesos a la vez.
+    """
+
+    def __init__(self, token, workers):
+        self.token = token
+        self.mp = _context()
+        self.members = list(range(workers))
+        self.next_id = workers
+        self.processes = {}
+        self.inboxes = {}
+        self.restarts = {}
+        self.resize_step = 0
+        self.stopping = None
+
+    # --- Procesos ---
+
+    def _spawn(self, worker_id, pending=()):
+        inbox = self.mp.Queue()
+        for message in pending:
+            inbox.put(message)
+        process = self.mp.Process(
+            target=run_worker,
+            args=(worker_id, tuple(self.members), self.token, inbox),
+            name=f"babybot-worker-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        self.inboxes[worker_id] = inbox
+        self.processes[worker_id] = process
+
+    def _drain(self, worker_id):
+        """Mensajes que un worker (ya detenido) no llegó a leer, en orden"""
+        inbox = self.inboxes.pop(worker_id)
+        pending = []
+        while True:
+            try:
+                message = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == _UPDATE:
+                pending.append(message)
+        inbox.close()
+        return pending
+
+    async def _stop_workers(self):
+        """Pide a todos que terminen su cola y espera (en paralelo) a que salgan"""
+        loop = asyncio.get_running_loop()
+        for inbox in self.inboxes.values():
+            inbox.put((_STOP, None, None))
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(None, process.join, STOP_TIMEOUT)
+                for process in self.processes.values()
+            )
+        )
+        for worker_id, process in self.processes.items():
+            if process.is_alive():
+                logger.error(f"Worker {worker_id} no terminó a tiempo; se fuerza.")
+                process.terminate()
+                process.join()
+        self.processes.clear()
+
+    async def _rebalance(self, members):
+        """Drena todos los workers y los arranca con el nuevo reparto"""
+        await self._stop_workers()
+        pending = []
+        for worker_id in list(self.inboxes):
+            pending.extend(self._drain(worker_id))
+        self.members = sorted(members)
+        logger.warning(f"Nuevo reparto de workers: {self.members}")
+        for worker_id in self.members:
+            self._spawn(worker_id)
+        # Lo que quedó sin leer se reparte antes de volver a leer de Telegram
+        for message in pending:
+            self._send(message)
+
+    async def _supervise(self):
+        """Relanza los workers caídos y da de baja a los que no se recuperan"""
+        now = time.monotonic()
+        left = []
+        for worker_id, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            recent = [
+                t for t in self.restarts.get(worker_id, []) if now - t < RESTART_WINDOW
+            ]
+            if len(recent) >= MAX_RESTARTS:
+                logger.error(
+                    f"Worker {worker_id} sale del reparto tras {MAX_RESTARTS} caídas."
+                )
+                left.append(worker_id)
+                continue
+            self.restarts[worker_id] = recent + [now]
+            logger.warning(
+                f"Worker {worker_id} terminó (código {process.exitcode}); se relanza."
+            )
+            self._spawn(worker_id, self._drain(worker_id))
+
+        members = [m for m in self.members if m not in left]
+        if self.resize_step > 0:
+            members.append(self.next_id)
+            self.next_id += 1
+        elif self.resize_step < 0 and len(members) > 1:
+            members.remove(max(members))
+        self.resize_step = 0
+
+        if not members:
+            raise RuntimeError("No queda ningún worker del bot en pie.")
+        if members != self.members:
+            await self._rebalance(members)
+
+    def _request_resize(self, step):
+        self.resize_step = step
+
+    # --- Reparto ---
+
+    def _send(self, message):
+        _, key, _ = message
+        worker_id = sharding.rendezvous_owner(key, self.members)
+        self.inboxes[worker_id].put(message)
+
+    def dispatch(self, update):
+        self._send((_UPDATE, route_key(update), update.to_dict()))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stopping.set)
+        loop.add_signal_handler(signal.SIGTTIN, self._request_resize, 1)
+        loop.add_signal_handler(signal.SIGTTOU, self._request_resize, -1)
+
+        async with self._build_bot() as bot:
+            await bot.delete_webhook()
+            for worker_id in self.members:
+                self._spawn(worker_id)
+            logger.info(f"Despachador con {len(self.members)} workers.")
+            offset = None
+            try:
+                while not self.stopping.is_set():
+                    await self._supervise()
+                    updates = await self._poll(bot, offset)
+                    for update in updates:
+                        self.dispatch(update)
+                        offset = update.update_id + 1
+            finally:
+                if offset is not None:
+                    await self._confirm(bot, offset)
+                await self._stop_workers()
+                for worker_id in list(self.inboxes):
+                    self._drain(worker_id)
+
+    async def _poll(self, bot, offset):
+        """Un getUpdates que se corta si llega la orden de apagado"""
+        poll = asyncio.ensure_future(
+            bot.get_updates(
+                offset=offset,
+                timeout=POLL_TIMEOUT,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        )
+        stop = asyncio.ensure_future(self.stopping.wait())
+        await asyncio.wait({poll, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if not poll.done():
+            poll.cancel()
+            return []
+        try:
+            return poll.result()
+        except TelegramError as e:
+            logger.error(f"getUpdates falló: {e}")
+            await asyncio.sleep(1)
+            return []
+
+    async def _confirm(self, bot, offset):
+        """Confirma a Telegram lo ya repartido para que no se reenvíe al reiniciar"""
+        try:
+            await bot.get_updates(offset=offset, timeout=0)
+        except TelegramError as e:
+            logger.error(f"No se pudo confirmar el último offset: {e}")
+
+    def _build_bot(self):
+        timeouts = {
+            "read_timeout": HTTP_TIMEOUT,
+            "write_timeout": HTTP_TIMEOUT,
+            "connect_timeout": HTTP_TIMEOUT,
+            "pool_timeout": HTTP_TIMEOUT,
+        }
+        urls = {}
+        api_base = settings.TELEGRAM_API_BASE_URL
+        if api_base:
+            # Bot API alternativa (servidor falso de las pruebas de carga)
+            urls = {
+                "base_url": f"{api_base}/bot",
+                "base_file_url": f"{api_base}/file/bot",
+            }
+        return Bot(
+            self.token,
+            request=HTTPXRequest(**timeouts),
+            get_updates_request=HTTPXRequest(**timeouts),
+            **urls,
+        )
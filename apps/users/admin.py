@@ -4,4 +4,5 @@ from .models import TelegramUser
 
 @admin.register(TelegramUser)
 class TelegramUserAdmin(admin.ModelAdmin):
-    list_display = ("nickname", "role", "telegram_id", "is_active")
+    list_display = ("nickname", "household", "role", "telegram_id", "is_active")
+    list_filter = ("household", "role", "is_active")
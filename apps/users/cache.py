@@ -0,0 +1,69 @@
+import time
+from apps.core_config.db import db_sync_to_async
+from apps.users.models import TelegramUser
+
+# --- CACHÉ EN MEMORIA DE USUARIOS ---
+# Todos los usuarios en un dict {telegram_id: TelegramUser}, cargado en una consulta.
+# Se invalida al guardar/borrar un usuario (señales: aprobación, rechazo, rol, apodo).
+# Las señales solo limpian la caché del proceso que guarda: los cambios hechos
+# desde otro (Django Admin en gunicorn, otro worker del bot) llegan al vencer.
+USER_CACHE_TTL = 300
+# Para autorizar (with_user / with_household) la caché dura mucho menos: un
+# usuario revocado en otro proceso pierde el acceso en segundos, no en minutos.
+USER_AUTH_MAX_AGE = 10
+# Recarga forzada por un usuario ausente/inactivo: como mucho una cada tanto
+USER_REFRESH_MIN_SECONDS = 5
+
+_cache = {"users": None, "loaded_at": 0.0, "version": 0}
+
+
+def invalidate_user_cache():
+    _cache["users"] = None
+    _cache["version"] += 1
+
+
+def _is_fresh(max_age=USER_CACHE_TTL):
+    return (
+        _cache["users"] is not None and time.monotonic() - _cache["loaded_at"] < max_age
+    )
+
+
+def _load_users():
+    """Trae TODOS los usuarios en una sola consulta"""
+    version = _cache["version"]
+    users = {user.telegram_id: user for user in TelegramUser.objects.all()}
+    # Si hubo una invalidación mientras leíamos, no guardamos datos viejos
+    if _cache["version"] == version:
+        _cache["users"] = users
+        _cache["loaded_at"] = time.monotonic()
+    return users
+
+
+async def get_users(max_age=USER_CACHE_TTL):
+    """Dict {telegram_id: TelegramUser} (desde memoria si tiene menos de max_age s)"""
+    users = _cache["users"]
+    if not _is_fresh(max_age):
+        users = await db_sync_to_async(_load_users)()
+    return users
+
+
+async def get_cached_user(telegram_id, max_age=USER_CACHE_TTL):
+    """El usuario registrado o None (una búsqueda en dict)"""
+    return (await get_users(max_age)).get(telegram_id)
+
+
+async def refresh_cached_user(telegram_id):
+    """
+    Relee los usuarios cuando la caché da a alguien por ausente o inactivo: su
+    aprobación pudo hacerse en otro proceso (otro worker del bot). Un
+    desconocido insistente no fuerza más de una recarga cada
+    USER_REFRESH_MIN_SECONDS.
+    """
+    if time.monotonic() - _cache["loaded_at"] >= USER_REFRESH_MIN_SECONDS:
+        await db_sync_to_async(_load_users)()
+    return await get_cached_user(telegram_id)
+
+
+async def warm_user_cache():
+    """Precarga al arrancar el bot para que la primera actualización no pague la consulta"""
+    await db_sync_to_async(_load_users)()
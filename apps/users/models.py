@@ -1,4 +1,6 @@
 from django.db import models
+from apps.households.managers import TenantManager
+from apps.households.models import Household
 
 
 class TelegramUser(models.Model):
@@ -25,12 +27,26 @@ class TelegramUser(models.Model):
     role = models.CharField(
         max_length=10, choices=Role.choices, default=Role.GUEST, verbose_name="Rol"
     )
+    household = models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        related_name="members",
+        verbose_name="Familia",
+    )
     is_active = models.BooleanField(default=True, verbose_name="¿Activo?")
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.nickname or self.first_name} ({self.role})"
 
+    objects = TenantManager()
+
     class Meta:
         verbose_name = "Usuario del Bot"
         verbose_name_plural = "Usuarios del Bot"
+        indexes = [
+            # Destinatarios de difusiones: WHERE household_id = ? AND is_active
+            models.Index(
+                fields=["household", "is_active"], name="users_household_active_idx"
+            ),
+        ]
@@ -0,0 +1,73 @@
+from apps.core_config.db import db_sync_to_async
+from apps.users.cache import get_cached_user, get_users
+from apps.users.models import TelegramUser
+
+# Acceso a datos de usuarios: las lecturas salen de la caché en memoria
+# (apps.users.cache); las escrituras son un solo salto al pool de BD y la
+# invalidan vía señales.
+
+
+def _approve_user(household_id, telegram_id, nickname, role):
+    user = TelegramUser.objects.for_household(household_id).get(telegram_id=telegram_id)
+    user.nickname = nickname
+    user.role = role
+    user.is_active = True  # ¡ACCESO CONCEDIDO!
+    user.save(update_fields=["nickname", "role", "is_active"])
+    return user
+
+
+def _delete_user(household_id, telegram_id):
+    user = TelegramUser.objects.for_household(household_id).get(telegram_id=telegram_id)
+    user.delete()
+    return user
+
+
+async def get_user(telegram_id):
+    """Lanza TelegramUser.DoesNotExist si no está registrado"""
+    user = await get_cached_user(telegram_id)
+    if user is None:
+        raise TelegramUser.DoesNotExist(f"Usuario {telegram_id} no registrado.")
+    return user
+
+
+async def is_owner(telegram_id):
+    user = await get_cached_user(telegram_id)
+    return user is not None and user.role == TelegramUser.Role.OWNER
+
+
+async def get_owner(household_id):
+    users = await get_users()
+    return next(
+        (
+            u
+            for u in users.values()
+            if u.household_id == household_id and u.role == TelegramUser.Role.OWNER
+        ),
+        None,
+    )
+
+
+async def list_active_users(household_id):
+    users = await get_users()
+    return [u for u in users.values() if u.household_id == household_id and u.is_active]
+
+
+async def find_user(telegram_id):
+    """El usuario registrado o None (para /start)"""
+    return await get_cached_user(telegram_id)
+
+
+async def create_user(**fields):
+    return await db_sync_to_async(TelegramUser.objects.create)(**fields)
+
+
+async def approve_user(household_id, telegram_id, nickname, role):
+    """Lanza TelegramUser.DoesNotExist si no es una solicitud de esa familia"""
+    return await db_sync_to_async(_approve_user)(
+        household_id, telegram_id, nickname, role
+    )
+
+
+async def delete_user(household_id, telegram_id):
+    """Borra y devuelve el usuario (para mostrar su nombre)"""
+    return await db_sync_to_async(_delete_user)(household_id, telegram_id)
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.cache import invalidate_user_cache
+from apps.users.models import TelegramUser
+
+
+@receiver(post_save, sender=TelegramUser)
+@receiver(post_delete, sender=TelegramUser)
+def telegram_user_changed(sender, **kwargs):
+    """Alta, aprobación, rechazo, cambio de rol o apodo (bot o Django Admin)"""
+    # Tras el commit: así una recarga concurrente no vuelve a leer el estado viejo
+    transaction.on_commit(invalidate_user_cache)
@@ -1,3 +1,50 @@
+import time
+from unittest import mock
+from asgiref.sync import sync_to_async
 from django.test import TestCase
 
-# Create your tests here.
+from apps.households.models import Household
+from apps.telegram_bot.auth import with_household
+from apps.users import cache
+from apps.users.models import TelegramUser
+
+
+@with_household
+async def household_of(update, context, household_id):
+    return household_id
+
+
+class UserCacheAuthTests(TestCase):
+    """Un usuario desactivado pierde el acceso en la siguiente actualización"""
+
+    def setUp(self):
+        self.household = Household.objects.create(name="Casa")
+        self.user = TelegramUser.objects.create(household=self.household, telegram_id=1)
+        cache.invalidate_user_cache()
+
+    async def call(self):
+        update = mock.Mock(callback_query=None, message=mock.AsyncMock())
+        update.effective_user.id = self.user.telegram_id
+        return await household_of(update, None)
+
+    async def test_deactivation_in_this_process_is_immediate(self):
+        self.assertEqual(await self.call(), self.household.id)
+
+        def deactivate():
+            # La señal invalida la caché tras el commit
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.is_active = False
+                self.user.save()
+
+        await sync_to_async(deactivate)()
+        self.assertEqual(await self.call(), -1)
+
+    async def test_deactivation_in_another_process_expires_quickly(self):
+        self.assertEqual(await self.call(), self.household.id)
+
+        # Sin señales, como el Admin en otro proceso
+        await TelegramUser.objects.filter(pk=self.user.pk).aupdate(is_active=False)
+        # Medio minuto después (muy por debajo del TTL general de la caché)
+        later = time.monotonic() + 30
+        with mock.patch.object(cache.time, "monotonic", return_value=later):
+            self.assertEqual(await self.call(), -1)
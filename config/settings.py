@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 import dj_database_url
 
@@ -36,6 +37,24 @@ if allowed_hosts_env:
 else:
     ALLOWED_HOSTS = []
 
+# --- TELEGRAM (Modo Webhook) ---
+# Con URL pública el bot recibe las actualizaciones en /telegram/webhook/ (ASGI).
+# TELEGRAM_USE_POLLING=True fuerza el modo polling clásico (runbot).
+TELEGRAM_WEBHOOK_URL = os.environ.get("TELEGRAM_WEBHOOK_URL", "")
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
+TELEGRAM_USE_POLLING = os.environ.get("TELEGRAM_USE_POLLING") == "True"
+# Servidor alternativo de la Bot API (ej. el falso de `manage.py loadtest`).
+# Vacío = api.telegram.org
+TELEGRAM_API_BASE_URL = os.environ.get("TELEGRAM_API_BASE_URL", "").rstrip("/")
+
+# --- MÉTRICAS DEL BOT ---
+# /metrics solo responde si hay token (Authorization: Bearer <token>).
+# En modo polling runbot deja la foto en BOT_METRICS_FILE para el proceso web.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+BOT_METRICS_FILE = os.environ.get(
+    "BOT_METRICS_FILE", str(BASE_DIR / "bot_metrics.prom")
+)
+
 
 # Application definition
 
@@ -47,6 +66,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     # --- MIS MÓDULOS (BABYBOT) ---
+    "apps.households",
     "apps.users",
     "apps.profiles",
     "apps.core_config",
@@ -87,6 +107,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 
 # Database
@@ -98,6 +119,11 @@ DATABASES = {
     )
 }
 
+# Hilos para las consultas ORM del bot (apps.core_config.db).
+# 0 = un solo hilo (sync_to_async clásico); SQLite no gana nada con más escritores.
+_is_sqlite = "sqlite" in DATABASES["default"]["ENGINE"]
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "0" if _is_sqlite else "4"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -140,6 +166,10 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # CONFIGURACIÓN DE LOGGING (CAPA TRANSVERSAL)
+# En `manage.py test` los errores provocados a propósito no llegan al log real
+TESTING = sys.argv[1:2] == ["test"]
+ERROR_LOG_FILE = os.devnull if TESTING else str(BASE_DIR / "babybot_errors.log")
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -158,7 +188,7 @@ LOGGING = {
         "file": {
             "level": "ERROR",
             "class": "logging.FileHandler",
-            "filename": "babybot_errors.log",
+            "filename": ERROR_LOG_FILE,
             "formatter": "verbose",
         },
     },
@@ -17,6 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from apps.telegram_bot.bot import WEBHOOK_PATH
+from apps.telegram_bot.views import bot_metrics, telegram_webhook
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path(WEBHOOK_PATH, telegram_webhook, name='telegram_webhook'),
+    path('metrics', bot_metrics, name='bot_metrics'),
 ]
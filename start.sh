@@ -5,12 +5,19 @@ set -o errexit
 # 1. Aplicar migraciones (por seguridad, cada vez que arranque)
 python manage.py migrate
 
-# 2. Arrancar el Bot en SEGUNDO PLANO (fíjate en el '&' al final)
-# Esto permite que el script siga ejecutándose hacia abajo sin bloquearse aquí
-echo "🤖 Iniciando BabyBot..."
-python manage.py runbot &
+if [ -n "$TELEGRAM_WEBHOOK_URL" ] && [ "$TELEGRAM_USE_POLLING" != "True" ]; then
+    # 2. MODO WEBHOOK: un solo proceso ASGI sirve el Admin y el Bot
+    # (1 worker: la Application y el JobQueue viven en memoria de ese proceso)
+    echo "🌍🤖 Iniciando Servidor Web + BabyBot (Webhook)..."
+    uvicorn config.asgi:application --host 0.0.0.0 --port "${PORT:-8000}" --workers 1 --lifespan on
+else
+    # 2. Arrancar el Bot en SEGUNDO PLANO (fíjate en el '&' al final)
+    # Esto permite que el script siga ejecutándose hacia abajo sin bloquearse aquí
+    echo "🤖 Iniciando BabyBot..."
+    python manage.py runbot &
 
-# 3. Arrancar el Servidor Web (Django Admin) en PRIMER PLANO
-# Esto es lo que mantiene a Render feliz escuchando el puerto HTTP
-echo "🌍 Iniciando Servidor Web..."
-gunicorn config.wsgi:application
+    # 3. Arrancar el Servidor Web (Django Admin) en PRIMER PLANO
+    # Esto es lo que mantiene a Render feliz escuchando el puerto HTTP
+    echo "🌍 Iniciando Servidor Web..."
+    gunicorn config.wsgi:application
+fi